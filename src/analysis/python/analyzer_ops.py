@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Analyzer Operations
+
+Shared registry of the analyzers that can run inside long-lived worker
+processes (analyzer_server.py, batch_analyzer.py). Analyzer modules are
+imported lazily, once per process, and looked up by op name.
+"""
+
+# Analyzers that can share a single read of a file (see combined_analyzer.py)
+FILE_OPS = ('lizard', 'comments', 'classes', 'dom', 'clones')
+
+ANALYSIS_OPS = FILE_OPS + ('all',)
+
+# Ops run for every file in a batch when none are requested explicitly
+DEFAULT_FILE_OPS = ('lizard', 'comments', 'classes')
+
+# Ops still run on files the prefilter classifies as light (see file_classifier.py)
+LIGHT_FILE_OPS = ('comments', 'classes', 'dom')
+
+
+def load_analyzers():
+    """
+    Import the analyzer modules
+
+    Returns:
+        Dictionary mapping op names to analyzer functions taking a file path
+    """
+    import lizard_analyzer
+    import python_comment_analyzer
+    import class_counter_analyzer
+    import html_dom_parser
+    import clone_detector
+    import combined_analyzer
+
+    return {
+        'lizard': lizard_analyzer.analyze_file,
+        'comments': python_comment_analyzer.analyze_comments,
+        'classes': class_counter_analyzer.analyze_classes,
+        'dom': html_dom_parser.analyze_html_file,
+        'clones': clone_detector.analyze_file,
+        'all': combined_analyzer.analyze_all,
+    }
+
+
+_analyzers = None
+_cache = None
+_parent_cache = None
+
+
+def _new_timer(profile, profile_dir):
+    """PhaseTimer for a profiled request, or None"""
+    if not profile and not profile_dir:
+        return None
+    from profiling import PhaseTimer
+    return PhaseTimer(profile_dir)
+
+
+def init_worker(cache_dir=None):
+    """
+    Worker initializer: load all analyzers before the first request arrives
+
+    Args:
+        cache_dir: Result cache directory, or None to run without the cache
+    """
+    global _analyzers, _cache
+    _analyzers = load_analyzers()
+    if cache_dir is not None:
+        from result_cache import ResultCache
+        _cache = ResultCache(cache_dir)
+
+
+def _get_analyzers():
+    """Return the analyzer table, loading it on first use"""
+    global _analyzers
+    if _analyzers is None:
+        _analyzers = load_analyzers()
+    return _analyzers
+
+
+def run_analysis(op, file_path, profile=False, profile_dir=None):
+    """
+    Run one analyzer in the current process
+
+    Args:
+        op: Analyzer name (one of ANALYSIS_OPS)
+        file_path: Path to the file to analyze
+        profile: Add a "timings" block (see profiling.py) to the result
+        profile_dir: Also write a cProfile dump for the file into this directory
+
+    Returns:
+        The analyzer's result dictionary
+    """
+    timer = _new_timer(profile, profile_dir)
+    if timer is None:
+        return _run_analysis(op, file_path)
+
+    result = timer.run(file_path, _run_analysis, op, file_path, timer)
+    if isinstance(result, dict):
+        result["timings"] = timer.as_dict()
+    return result
+
+
+def _run_analysis(op, file_path, timer=None):
+    """Dispatch one op, through the result cache when one is configured"""
+    analyzers = _get_analyzers()
+    if _cache is None:
+        if op == 'all':
+            return analyzers['all'](file_path, DEFAULT_FILE_OPS, None, timer)
+        return analyzers[op](file_path, timer=timer)
+
+    if op == 'all':
+        return analyzers['all'](file_path, DEFAULT_FILE_OPS, _cache, timer)
+
+    # Single ops go through the combined path so they can be served from the cache
+    combined = analyzers['all'](file_path, (op,), _cache, timer)
+    if op not in combined:
+        return combined
+    result = combined[op]
+    result["cache"] = combined["cache"]
+    return result
+
+
+def run_file_analyses(file_path, ops=DEFAULT_FILE_OPS, profile=False, profile_dir=None):
+    """
+    Run several analyzers on one file from a single read
+
+    Args:
+        file_path: Path to the file to analyze
+        ops: Analyzer names to run (subset of FILE_OPS)
+        profile: Add a "timings" block (see profiling.py) to the result
+        profile_dir: Also write a cProfile dump for the file into this directory
+
+    Returns:
+        Combined result with line counts and one entry per op
+    """
+    analyze_all = _get_analyzers()['all']
+    timer = _new_timer(profile, profile_dir)
+    if timer is None:
+        return analyze_all(file_path, ops, _cache)
+
+    result = timer.run(file_path, analyze_all, file_path, ops, _cache, timer)
+    result["timings"] = timer.as_dict()
+    return result
+
+
+def run_budgeted_file_analyses(file_path, budget, ops=DEFAULT_FILE_OPS, profile=False, profile_dir=None):
+    """
+    run_file_analyses in a child process under per-file limits (see file_budget.py)
+
+    Args:
+        file_path: Path to the file to analyze
+        budget: FileBudget with the CPU time, memory and wall-clock limits
+        ops: Analyzer names to run (subset of FILE_OPS)
+        profile: Add a "timings" block (see profiling.py) to the result
+        profile_dir: Also write a cProfile dump for the file into this directory
+
+    Returns:
+        Combined result; its status is "timeout" or "oom" (with the metrics
+        gathered so far) when the file ran out of budget
+    """
+    from file_budget import run_with_budget
+    if 'lizard' in ops:
+        # Import numpy (for the complexity summary) before forking: OpenBLAS
+        # reserves its buffers on import and exits when that fails, which
+        # under the child's memory limit would lose the whole result
+        from complexity_stats import load_numpy
+        load_numpy()
+    return run_with_budget(budget, _budgeted_child, file_path, ops, profile, profile_dir)
+
+
+def _budgeted_child(file_path, ops, profile, profile_dir):
+    """Child side of run_budgeted_file_analyses"""
+    global _cache, _parent_cache
+    if _cache is not None:
+        # A SQLite connection must not be used (or closed) across fork: keep the
+        # worker's cache object alive untouched and open a connection of our own
+        from result_cache import ResultCache
+        _parent_cache = _cache
+        _cache = ResultCache(_cache.cache_dir, _cache.max_bytes)
+    return run_file_analyses(file_path, ops, profile, profile_dir)
@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Analyzer Server
+
+Long-lived analyzer process for the CodeXR extension. The lizard, comment,
+class and DOM analyzers are imported once per worker process and requests
+are answered over stdin/stdout as newline-delimited JSON, so a directory scan
+no longer pays interpreter startup and `import lizard` for every file.
+
+Request:  {"id": 1, "op": "lizard" | "comments" | "classes" | "dom", "path": "...", "profile": false,
+           "priority": "interactive" | "background"}
+          {"id": 2, "op": "stats"} | {"op": "health"} | {"op": "shutdown"}
+Response: {"id": 1, "op": "lizard", "status": "success", "result": {...}}
+          {"id": 1, "op": "lizard", "status": "cancelled", "supersededBy": 7}
+
+Responses are written as soon as each request finishes, so they may arrive
+out of order; clients match them by "id".
+
+Analysis requests are queued in the server (see request_scheduler.py) and
+handed to the workers one at a time per worker: queued "interactive"
+requests (the editor's file) always go before queued "background" ones (the
+default, for scans). A newer request for the same op and path cancels the
+older one, queued or in flight; the older one is answered with status
+"cancelled". The "stats" op reports queue depths and latencies per priority.
+
+Results are cached on disk by content hash (see result_cache.py) unless
+--no-cache is given; the "stats" op reports the cache hit/miss counters.
+
+With "profile": true the result gains a "timings" block (read, decode,
+parse, scan, cache and serialize durations plus peak RSS, see
+profiling.py); with --profile-dir a cProfile dump is also written for
+every profiled request.
+
+Usage: python analyzer_server.py [--workers N] [--max-requests N] [--cache-dir DIR | --no-cache]
+                                 [--profile-dir DIR]
+"""
+
+import sys
+import json
+import os
+import time
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from analyzer_ops import ANALYSIS_OPS, init_worker, run_analysis
+from result_cache import default_cache_dir
+from profiling import dumps_with_timings, embed_encoded
+from request_scheduler import PRIORITIES, DEFAULT_PRIORITY, RequestScheduler, ScheduledRequest
+
+
+# Number of requests a worker pool serves before it is replaced by a fresh one
+DEFAULT_MAX_REQUESTS = 500
+
+
+class AnalyzerServer:
+    """Dispatches JSON-lines requests to a recycled pool of analyzer workers"""
+
+    def __init__(self, workers=1, max_requests=DEFAULT_MAX_REQUESTS, output=None, cache_dir=None,
+                 profile_dir=None):
+        self.workers = max(1, workers)
+        self.max_requests = max(1, max_requests)
+        self.cache_dir = cache_dir
+        self.profile_dir = profile_dir
+        self.output = output or sys.stdout
+        self.started_at = time.time()
+
+        self._write_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._executor = None
+        self._executor_requests = 0
+        self._in_flight = 0
+        self._idle = threading.Condition(self._state_lock)
+        self._scheduler = RequestScheduler()
+        self._running = 0  # Requests handed to the pool, including superseded ones still running
+        self._work = threading.Condition(self._state_lock)
+        self._closing = False
+        self._dispatcher = None
+
+        self.stats = {
+            'requests': 0,
+            'completed': 0,
+            'errors': 0,
+            'recycles': 0,
+            'byOp': {op: 0 for op in ANALYSIS_OPS},
+            'completedByOp': {op: 0 for op in ANALYSIS_OPS},
+            'totalSeconds': {op: 0.0 for op in ANALYSIS_OPS},
+            'cacheHits': 0,
+            'cacheMisses': 0,
+        }
+
+    def _get_executor(self):
+        """Return the current worker pool, recycling it after max_requests"""
+        if self._executor is not None and self._executor_requests >= self.max_requests:
+            # Queued work on the old pool still completes; its processes exit afterwards
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self.stats['recycles'] += 1
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=init_worker,
+                initargs=(self.cache_dir,)
+            )
+            self._executor_requests = 0
+
+        self._executor_requests += 1
+        return self._executor
+
+    def _discard_executor(self, executor):
+        """Drop a pool whose worker died so the next request gets a fresh one"""
+        with self._state_lock:
+            if self._executor is executor:
+                self._executor = None
+                self.stats['recycles'] += 1
+
+    def write(self, response):
+        """Write a single response line to the output stream"""
+        result = response.get("result")
+        if isinstance(result, dict) and "timings" in result:
+            # Profiled request: include the time spent encoding the result
+            result = dict(result)
+            timings = result.pop("timings")
+            envelope = {key: value for key, value in response.items() if key != "result"}
+            line = embed_encoded(envelope, "result", dumps_with_timings(result, timings))
+        else:
+            line = json.dumps(response)
+        with self._write_lock:
+            self.output.write(line + '\n')
+            self.output.flush()
+
+    def get_stats(self):
+        """Build the payload for the "stats" op"""
+        with self._state_lock:
+            by_op = dict(self.stats['byOp'])
+            completed = self.stats['completedByOp']
+            average_ms = {
+                op: round(self.stats['totalSeconds'][op] * 1000 / completed[op], 2) if completed[op] else 0
+                for op in ANALYSIS_OPS
+            }
+            return {
+                'pid': os.getpid(),
+                'uptimeSeconds': round(time.time() - self.started_at, 3),
+                'workers': self.workers,
+                'maxRequests': self.max_requests,
+                'requests': self.stats['requests'],
+                'completed': self.stats['completed'],
+                'errors': self.stats['errors'],
+                'inFlight': self._in_flight,
+                'recycles': self.stats['recycles'],
+                'byOp': by_op,
+                'averageMs': average_ms,
+                'cache': {
+                    'enabled': self.cache_dir is not None,
+                    'hits': self.stats['cacheHits'],
+                    'misses': self.stats['cacheMisses'],
+                },
+                'priorities': self._scheduler.get_stats(),
+            }
+
+    def handle_line(self, line):
+        """
+        Handle one request line
+
+        Args:
+            line: Raw JSON request line
+
+        Returns:
+            False when the server should stop reading requests, True otherwise
+        """
+        line = line.strip()
+        if not line:
+            return True
+
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            self.write({"id": None, "status": "error", "error": f"Invalid request: {str(e)}"})
+            return True
+
+        request_id = request.get('id')
+        op = request.get('op')
+
+        if op == 'health':
+            self.write({"id": request_id, "op": op, "status": "success",
+                        "result": {"status": "ok", "pid": os.getpid()}})
+            return True
+
+        if op == 'stats':
+            self.write({"id": request_id, "op": op, "status": "success", "result": self.get_stats()})
+            return True
+
+        if op == 'shutdown':
+            self.write({"id": request_id, "op": op, "status": "success"})
+            return False
+
+        if op not in ANALYSIS_OPS:
+            self.write({"id": request_id, "op": op, "status": "error",
+                        "error": f"Unknown op: {op}"})
+            return True
+
+        file_path = request.get('path')
+        if not file_path:
+            self.write({"id": request_id, "op": op, "status": "error",
+                        "error": "No file path provided"})
+            return True
+
+        priority = request.get('priority', DEFAULT_PRIORITY)
+        if priority not in PRIORITIES:
+            self.write({"id": request_id, "op": op, "status": "error",
+                        "error": f"Unknown priority: {priority}"})
+            return True
+
+        self.submit(request_id, op, file_path, profile=bool(request.get('profile')), priority=priority)
+        return True
+
+    def submit(self, request_id, op, file_path, profile=False, priority=DEFAULT_PRIORITY):
+        """Queue an analysis request; it is dispatched once a worker is free and nothing more urgent waits"""
+        request = ScheduledRequest(request_id, op, file_path, priority, profile)
+        with self._state_lock:
+            self.stats['requests'] += 1
+            self.stats['byOp'][op] += 1
+            self._in_flight += 1
+            superseded = self._scheduler.push(request)
+            if superseded is not None:
+                self._in_flight -= 1
+                self._idle.notify_all()
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name='dispatcher', daemon=True)
+                self._dispatcher.start()
+            self._work.notify()
+
+        if superseded is not None:
+            self.write({"id": superseded.request_id, "op": superseded.op, "status": "cancelled",
+                        "supersededBy": request_id})
+
+    def _dispatch_loop(self):
+        """Hand queued requests to the pool, at most one per worker at a time"""
+        while True:
+            with self._state_lock:
+                while not self._closing and (self._running >= self.workers or not self._scheduler):
+                    self._work.wait()
+                if self._closing:
+                    return
+                request = self._scheduler.pop()
+                self._running += 1
+                executor = self._get_executor()
+            self._start(executor, request)
+
+    def _start(self, executor, request):
+        """Submit one dispatched request to the worker pool"""
+        try:
+            if request.profile:
+                future = executor.submit(run_analysis, request.op, request.path, True, self.profile_dir)
+            else:
+                future = executor.submit(run_analysis, request.op, request.path)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._discard_executor(executor)
+            self._finish(request, error=f"Worker pool unavailable: {str(e)}")
+            return
+
+        def on_done(done_future):
+            try:
+                result = done_future.result()
+            except BrokenProcessPool:
+                self._discard_executor(executor)
+                self._finish(request, error="Analyzer worker terminated unexpectedly")
+            except Exception as e:
+                self._finish(request, error=str(e))
+            else:
+                self._finish(request, result=result)
+
+        future.add_done_callback(on_done)
+
+    def _finish(self, request, result=None, error=None):
+        """Record stats for a finished request and write its response (unless it was superseded)"""
+        request_id, op = request.request_id, request.op
+        elapsed = time.perf_counter() - request.started_at
+        with self._state_lock:
+            self._running -= 1
+            self._work.notify()
+            current = self._scheduler.finish(request)
+        if not current:
+            return
+
+        if error is not None:
+            response = {"id": request_id, "op": op, "status": "error", "error": error}
+        else:
+            response = {"id": request_id, "op": op, "status": "success", "result": result}
+
+        try:
+            self.write(response)
+        finally:
+            with self._state_lock:
+                self.stats['completed'] += 1
+                self.stats['completedByOp'][op] += 1
+                self.stats['totalSeconds'][op] += elapsed
+                if error is not None:
+                    self.stats['errors'] += 1
+                elif isinstance(result, dict) and isinstance(result.get('cache'), dict):
+                    self.stats['cacheHits'] += result['cache'].get('hits', 0)
+                    self.stats['cacheMisses'] += result['cache'].get('misses', 0)
+                self._in_flight -= 1
+                self._idle.notify_all()
+
+    def wait_idle(self):
+        """Block until every submitted request has been answered"""
+        with self._state_lock:
+            while self._in_flight > 0:
+                self._idle.wait()
+
+    def close(self):
+        """Wait for outstanding work and stop the worker pool"""
+        self.wait_idle()
+        with self._state_lock:
+            self._closing = True
+            self._work.notify_all()
+            dispatcher = self._dispatcher
+            executor, self._executor = self._executor, None
+        if dispatcher is not None:
+            dispatcher.join()
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def serve(self, input_stream=None):
+        """Read requests until EOF or a shutdown request"""
+        if input_stream is None:
+            # Read through a stream of our own: worker processes are forked by the
+            # dispatcher thread while this thread blocks in readline, and a forked
+            # child closes sys.stdin, which would wait forever on the copied lock
+            input_stream = open(sys.stdin.fileno(), 'r', encoding=sys.stdin.encoding, closefd=False)
+        try:
+            for line in input_stream:
+                if not self.handle_line(line):
+                    break
+        finally:
+            self.close()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="CodeXR analyzer server (JSON lines over stdio)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of analyzer worker processes (default: 1)")
+    parser.add_argument('--max-requests', type=int, default=DEFAULT_MAX_REQUESTS,
+                        help="Requests served before the worker pool is recycled")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Result cache directory (default: CODEXR_CACHE_DIR or ~/.cache/codexr)")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the on-disk result cache")
+    parser.add_argument('--profile-dir', default=None,
+                        help="Write a cProfile dump per profiled request into this directory")
+    args = parser.parse_args()
+
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+    server = AnalyzerServer(workers=args.workers, max_requests=args.max_requests, cache_dir=cache_dir,
+                            profile_dir=args.profile_dir)
+    server.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+"""
+Batch Analyzer
+
+Analyzes a whole manifest of files in parallel and streams the results as
+newline-delimited JSON, one record per file as soon as it finishes.
+
+Manifest: one file path per line, read from --manifest or from stdin.
+Each file is read once and all requested analyzers share that buffer
+(see combined_analyzer.analyze_all).
+
+Records written to stdout:
+  {"type": "result", "path": "...", "results": {"lines": {...}, "lizard": {...}, ...}}
+  {"type": "error", "path": "...", "error": "..."}
+  {"type": "timeout", "path": "...", "error": "...", "budget": {...}, "results": {...}}  (or "oom")
+  {"type": "skipped", "path": "...", "reason": "minified", "detail": "mean line length 2048"}
+  {"type": "progress", "completed": 12, "total": 5000, "currentFile": "..."}
+  {"type": "clones", "clusters": [{"size": 3, "similarity": 0.82, "functions": [...]}, ...]}
+  {"type": "directory", "directory": "...", "fileCount": 40, "functionCount": 812, "distribution": {...}}
+  {"type": "summary", "total": 5000, "succeeded": 4998, "failed": 2, ...}
+
+A failing or crashing file only produces an error record for that file;
+the rest of the batch keeps going. Results are served from the on-disk
+result cache (result_cache.py) when the file contents were seen before.
+
+With --profile every result carries a "timings" block (see profiling.py)
+and the summary lists the slowest files; --profile-dir also writes a
+cProfile dump per file.
+
+With --rollup the lizard function metrics are collected per directory (the
+files directly in it): one "directory" record per directory with the
+complexity distribution (see complexity_stats.py) is written before the
+summary, which carries the distribution over the whole batch. With
+--store DIR the lizard function metrics are also written as a columnar
+metrics store (see metrics_store.py) once the batch is done.
+
+With --cpu-limit, --memory-limit or --timeout every file is analyzed in a
+child process of its worker under those limits (see file_budget.py). A file
+that runs out of budget produces a "timeout" or "oom" record whose results
+hold the metrics gathered before it was stopped, so one pathological file
+bounds the batch's tail latency instead of stalling it.
+
+Before a file is queued, the prefilter in file_classifier.py classifies it
+from its path, size and first few KB: minified, generated, vendored and
+binary files are not analyzed (a "skipped" record says why), and light
+files (very large or data-heavy ones) only get the linear-time analyzers;
+their result records carry "analysis": "light" with the reason. --force PATH
+analyzes the files under PATH in full regardless, --no-classify turns the
+prefilter off.
+
+With --clones DIR the functions of every file are fingerprinted (see
+clone_detector.py) and kept in a persistent clone index in DIR. Only files
+whose contents changed since the last run are re-indexed, and indexed files
+under the batch's directory that no longer exist are dropped. Once
+the batch is done a "clones" record lists the clone clusters; with --rollup
+every directory record also counts its cloned functions. The fingerprints
+themselves are left out of the result records.
+
+Usage: python batch_analyzer.py [--manifest FILE] [--workers N] [--ops lizard,comments,classes]
+                                [--cache-dir DIR | --no-cache] [--profile] [--profile-dir DIR] [--rollup]
+                                [--store DIR] [--cpu-limit SECONDS] [--memory-limit MB] [--timeout SECONDS]
+                                [--force PATH ...] [--no-classify] [--clones DIR]
+"""
+
+import sys
+import json
+import os
+import time
+import heapq
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from analyzer_ops import (FILE_OPS, DEFAULT_FILE_OPS, LIGHT_FILE_OPS, init_worker, run_file_analyses,
+                          run_budgeted_file_analyses)
+from result_cache import default_cache_dir
+from profiling import dumps_with_timings, embed_encoded
+from complexity_stats import FunctionColumns
+from metrics_store import MetricsStoreWriter
+from file_budget import BUDGET_STATUSES, FileBudget
+from file_classifier import FileClassifier
+from clone_detector import CloneIndex
+
+
+# Pending futures per worker; keeps memory flat for very large manifests
+QUEUE_DEPTH_PER_WORKER = 4
+
+# Files listed in the summary's "slowestFiles" when profiling
+SLOWEST_FILES = 10
+
+# Changed files whose fingerprints are buffered before they are written to the clone index
+CLONE_INDEX_BATCH = 256
+
+
+def read_manifest(stream):
+    """
+    Read file paths from a manifest stream
+
+    Args:
+        stream: Text stream with one path per line
+
+    Returns:
+        List of non-empty paths
+    """
+    return [line.strip() for line in stream if line.strip()]
+
+
+def default_worker_count():
+    """Size the process pool to the available CPUs"""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+class BatchAnalyzer:
+    """Fans files out over a process pool and streams one record per file"""
+
+    def __init__(self, ops=DEFAULT_FILE_OPS, workers=None, output=None, cache_dir=None,
+                 profile=False, profile_dir=None, rollup=False, store_dir=None, budget=None, classifier=None,
+                 clones_dir=None):
+        self.ops = tuple(ops)
+        if clones_dir and 'clones' not in self.ops:
+            self.ops += ('clones',)
+        self.workers = workers or default_worker_count()
+        self.output = output or sys.stdout
+        self.cache_dir = cache_dir
+        self.profile = profile or bool(profile_dir)
+        self.profile_dir = profile_dir
+        self._slowest = []  # min-heap of (totalMs, path)
+        self.rollup = rollup
+        self._directories = {}  # directory -> [file count, FunctionColumns]
+        self._store = MetricsStoreWriter(store_dir) if store_dir else None
+        self.budget = budget if budget is not None and budget.enabled else None
+        self.classifier = classifier
+        self._root = None  # Common directory of the batch, for the vendored-path check
+        self._light = {}  # path -> prefilter verdict of files queued with the light ops
+        self._clones = CloneIndex(clones_dir) if clones_dir else None
+        self._indexed = None  # path -> source hash of the files in the clone index
+        self._clone_updates = []  # (path, source hash, functions) of changed files not yet indexed
+        self._clone_error = None  # First clone index update failure; no further updates are tried
+        self.skipped = 0
+        self.skip_reasons = {}
+        self.light = 0
+        self.total = 0
+        self.completed = 0
+        self.failed = 0
+        self.over_budget = dict.fromkeys(BUDGET_STATUSES, 0)
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def emit(self, record):
+        """Write one NDJSON record"""
+        self._write_line(json.dumps(record))
+
+    def _write_line(self, line):
+        self.output.write(line + '\n')
+        self.output.flush()
+
+    def _emit_result(self, file_path, results):
+        """Emit a result record, timing its serialization when profiling"""
+        record = {"type": "result", "path": file_path}
+        verdict = self._light.pop(file_path, None)
+        if verdict is not None:
+            record.update(verdict)
+        timings = results.pop("timings", None) if self.profile else None
+        if timings is None:
+            record["results"] = results
+            self.emit(record)
+            return
+
+        encoded = dumps_with_timings(results, timings)
+        self._write_line(embed_encoded(record, "results", encoded))
+
+        # Worker-side total; serialization happens here and is small in comparison
+        entry = (timings.get("totalMs", 0.0), file_path)
+        if len(self._slowest) < SLOWEST_FILES:
+            heapq.heappush(self._slowest, entry)
+        else:
+            heapq.heappushpop(self._slowest, entry)
+
+    def _collect(self, file_path, results):
+        """Add a file's lizard functions to its directory's roll-up and the metrics store"""
+        lizard_result = results.get("lizard")
+        if not isinstance(lizard_result, dict) or lizard_result.get("status") != "success":
+            return
+        if self._store is not None:
+            self._store.add_file(file_path, lizard_result.get("functions", []))
+        if not self.rollup:
+            return
+        directory = os.path.dirname(os.path.abspath(file_path))
+        entry = self._directories.get(directory)
+        if entry is None:
+            entry = self._directories[directory] = [0, FunctionColumns()]
+        entry[0] += 1
+        entry[1].extend(lizard_result.get("functions", []))
+
+    def _collect_clones(self, file_path, results):
+        """Queue a file's fingerprints for the clone index if it changed, and drop them from its record"""
+        entry = results.get("clones")
+        if not isinstance(entry, dict) or entry.get("status") != "success":
+            return
+        path = os.path.abspath(file_path)
+        if self._clone_error is None and self._indexed.get(path) != entry["sourceHash"]:
+            self._clone_updates.append((path, entry["sourceHash"], entry["functions"]))
+            if len(self._clone_updates) >= CLONE_INDEX_BATCH:
+                self._flush_clone_updates()
+        entry["functions"] = [
+            {key: value for key, value in func.items() if key != "fingerprints"}
+            for func in entry["functions"]
+        ]
+
+    def _flush_clone_updates(self):
+        """Write the buffered fingerprints to the clone index, recording the first failure"""
+        try:
+            self._clones.update(self._clone_updates)
+        except Exception as e:
+            self._clone_error = f"Error updating clone index: {str(e)}"
+        self._clone_updates = []
+
+    def _index_clones(self, file_paths):
+        """
+        Bring the clone index up to date and emit the "clones" record
+
+        Args:
+            file_paths: Every path of the batch; indexed files under their common
+                directory that no longer exist are dropped
+
+        Returns:
+            Tuple of (summary block, directory -> cloned function and cluster counts)
+        """
+        started = time.perf_counter()
+        if self._clone_error is None:
+            self._flush_clone_updates()
+        if self._clone_error is not None:
+            return {"error": self._clone_error}, {}
+        try:
+            try:
+                root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in file_paths])
+            except ValueError:
+                root = None  # Empty batch, or paths on different drives
+            pruned = self._clones.prune(root) if root else 0
+            clusters = self._clones.clusters()
+            indexed = self._clones.function_count()
+        except Exception as e:
+            return {"error": f"Error updating clone index: {str(e)}"}, {}
+        self.emit({"type": "clones", "clusters": clusters})
+
+        per_directory = {}
+        for cluster_index, cluster in enumerate(clusters):
+            for func in cluster["functions"]:
+                counts = per_directory.setdefault(os.path.dirname(func["filePath"]), [0, set()])
+                counts[0] += 1
+                counts[1].add(cluster_index)
+        summary = {
+            "indexedFunctions": indexed,
+            "prunedFiles": pruned,
+            "clusters": len(clusters),
+            "clonedFunctions": sum(cluster["size"] for cluster in clusters),
+            "elapsedSeconds": round(time.perf_counter() - started, 3)
+        }
+        return summary, {
+            directory: {"clonedFunctions": count, "clusters": len(cluster_ids)}
+            for directory, (count, cluster_ids) in per_directory.items()
+        }
+
+    def _emit_rollup(self, clones=None):
+        """
+        Emit one record per directory
+
+        Args:
+            clones: Directory -> clone counts from _index_clones, if clones were indexed
+
+        Returns:
+            Distribution over every collected function
+        """
+        total = FunctionColumns()
+        for directory in sorted(self._directories):
+            file_count, columns = self._directories[directory]
+            total.merge(columns)
+            record = {
+                "type": "directory",
+                "directory": directory,
+                "fileCount": file_count,
+                "functionCount": len(columns),
+                "distribution": columns.summarize()
+            }
+            if clones is not None:
+                record["clones"] = clones.get(directory, {"clonedFunctions": 0, "clusters": 0})
+            self.emit(record)
+        return total.summarize()
+
+    def _classify(self, file_path):
+        """
+        Prefilter verdict for a file (see file_classifier.py)
+
+        Returns:
+            Verdict dictionary; unreadable files are left to the analyzers to report
+        """
+        rel_path = os.path.relpath(os.path.abspath(file_path), self._root) if self._root else None
+        try:
+            return self.classifier.classify(file_path, rel_path)
+        except OSError:
+            return {"analysis": "full"}
+
+    def _skip(self, file_path, verdict):
+        """Emit the record of a file the prefilter skipped followed by a progress event"""
+        self.completed += 1
+        self.skipped += 1
+        self.skip_reasons[verdict["reason"]] = self.skip_reasons.get(verdict["reason"], 0) + 1
+        self.emit({"type": "skipped", "path": file_path, "reason": verdict["reason"], "detail": verdict["detail"]})
+        self.emit({
+            "type": "progress",
+            "completed": self.completed,
+            "total": self.total,
+            "currentFile": file_path
+        })
+
+    def _submit(self, executor, file_path):
+        """Queue one file on a worker pool"""
+        ops = self.ops
+        if file_path in self._light:
+            ops = tuple(op for op in ops if op in LIGHT_FILE_OPS)
+        if self.budget is not None:
+            return executor.submit(run_budgeted_file_analyses, file_path, self.budget, ops,
+                                   self.profile, self.profile_dir)
+        if self.profile:
+            return executor.submit(run_file_analyses, file_path, ops, True, self.profile_dir)
+        return executor.submit(run_file_analyses, file_path, ops)
+
+    def _record(self, file_path, results=None, error=None):
+        """Emit the record for a finished file followed by a progress event"""
+        self.completed += 1
+        if error is None and results.get("status") not in BUDGET_STATUSES and \
+                (results.get("status") == "error" or "error" in results):
+            # The analyzers report a file they could not read or parse as an error result
+            error = results.get("error") or "Analysis failed"
+        if error is not None:
+            self.failed += 1
+            self._light.pop(file_path, None)
+            self.emit({"type": "error", "path": file_path, "error": error})
+        elif results.get("status") in BUDGET_STATUSES:
+            status = results["status"]
+            self.failed += 1
+            self.over_budget[status] += 1
+            self.emit({"type": status, "path": file_path, "error": results.get("error"),
+                       "budget": results.pop("budget", None), "results": results})
+        else:
+            cache = results.get("cache")
+            if cache:
+                self.cache_hits += cache["hits"]
+                self.cache_misses += cache["misses"]
+            if self.rollup or self._store is not None:
+                self._collect(file_path, results)
+            if self._clones is not None:
+                self._collect_clones(file_path, results)
+            self._emit_result(file_path, results)
+
+        self.emit({
+            "type": "progress",
+            "completed": self.completed,
+            "total": self.total,
+            "currentFile": file_path
+        })
+
+    def _isolate(self, file_paths):
+        """
+        Re-run files that were in flight when a worker died, one pool per file,
+        so only the file that actually crashes its worker is reported as failed
+        """
+        for file_path in file_paths:
+            with ProcessPoolExecutor(max_workers=1, initializer=init_worker,
+                                     initargs=(self.cache_dir,)) as executor:
+                try:
+                    results = self._submit(executor, file_path).result()
+                except BrokenProcessPool:
+                    self._record(file_path, error="Analyzer worker crashed while processing this file")
+                except Exception as e:
+                    self._record(file_path, error=str(e))
+                else:
+                    self._record(file_path, results=results)
+
+    def run(self, file_paths):
+        """
+        Analyze all files, streaming records as they complete
+
+        Args:
+            file_paths: Paths to analyze
+
+        Returns:
+            Summary dictionary (also emitted as the final record)
+        """
+        started = time.perf_counter()
+        self.total = len(file_paths)
+        if self.classifier is not None and file_paths:
+            try:
+                self._root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in file_paths])
+            except ValueError:
+                self._root = None  # Paths on different drives
+        clone_summary, directory_clones = None, None
+        if self._clones is not None:
+            try:
+                self._indexed = self._clones.source_hashes()
+            except Exception as e:
+                clone_summary = {"error": f"Error opening clone index: {str(e)}"}
+                self._clones = None
+        pending_paths = list(reversed(file_paths))
+        max_pending = self.workers * QUEUE_DEPTH_PER_WORKER
+
+        while pending_paths:
+            crashed = []
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                           initargs=(self.cache_dir,))
+            in_flight = {}
+            try:
+                while pending_paths or in_flight:
+                    while pending_paths and len(in_flight) < max_pending:
+                        file_path = pending_paths.pop()
+                        if self.classifier is not None:
+                            verdict = self._classify(file_path)
+                            if verdict["analysis"] == 'skip':
+                                self._skip(file_path, verdict)
+                                continue
+                            if verdict["analysis"] == 'light':
+                                self.light += 1
+                                self._light[file_path] = verdict
+                        in_flight[self._submit(executor, file_path)] = file_path
+
+                    if not in_flight:
+                        continue
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = in_flight.pop(future)
+                        try:
+                            results = future.result()
+                        except BrokenProcessPool:
+                            crashed.append(file_path)
+                        except Exception as e:
+                            self._record(file_path, error=str(e))
+                        else:
+                            self._record(file_path, results=results)
+
+                    if crashed:
+                        # Every future still in flight is lost with the pool
+                        crashed.extend(in_flight.values())
+                        in_flight.clear()
+                        break
+            finally:
+                executor.shutdown(wait=not crashed, cancel_futures=True)
+
+            if crashed:
+                self._isolate(crashed)
+
+        if self._clones is not None:
+            clone_summary, directory_clones = self._index_clones(file_paths)
+            self._clones.close()
+        distribution = self._emit_rollup(directory_clones) if self.rollup else None
+
+        summary = {
+            "type": "summary",
+            "total": self.total,
+            "succeeded": self.completed - self.failed - self.skipped,
+            "failed": self.failed,
+            "workers": self.workers,
+            "cache": {"hits": self.cache_hits, "misses": self.cache_misses},
+            "elapsedSeconds": round(time.perf_counter() - started, 3)
+        }
+        if self.classifier is not None:
+            summary["skipped"] = self.skipped
+            summary["skipReasons"] = dict(sorted(self.skip_reasons.items()))
+            summary["light"] = self.light
+        if self.budget is not None:
+            summary["overBudget"] = dict(self.over_budget)
+        if distribution is not None:
+            summary["distribution"] = distribution
+        if clone_summary is not None:
+            summary["clones"] = clone_summary
+        if self._store is not None:
+            try:
+                summary["store"] = {"path": self._store.write(), "rows": len(self._store)}
+            except OSError as e:
+                summary["store"] = {"error": f"Error writing metrics store: {str(e)}"}
+        if self.profile:
+            summary["slowestFiles"] = [
+                {"path": file_path, "totalMs": total_ms}
+                for total_ms, file_path in sorted(self._slowest, reverse=True)
+            ]
+        self.emit(summary)
+        return summary
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Analyze many files in parallel, streaming NDJSON results")
+    parser.add_argument('--manifest', help="File with one path per line (default: read stdin)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes (default: number of CPUs)")
+    parser.add_argument('--ops', default=','.join(DEFAULT_FILE_OPS),
+                        help=f"Comma-separated analyzers to run ({', '.join(FILE_OPS)})")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Result cache directory (default: CODEXR_CACHE_DIR or ~/.cache/codexr)")
+    parser.add_argument('--no-cache', action='store_true', help="Do not use the on-disk result cache")
+    parser.add_argument('--profile', action='store_true',
+                        help="Add per-phase timings to every result and list the slowest files")
+    parser.add_argument('--profile-dir', default=None, help="Also write a cProfile dump per file here")
+    parser.add_argument('--rollup', action='store_true',
+                        help="Emit complexity distributions per directory and for the whole batch")
+    parser.add_argument('--store', default=None,
+                        help="Also write the lizard function metrics as a columnar store in this directory")
+    parser.add_argument('--cpu-limit', type=float, default=None,
+                        help="CPU seconds each file may take before it is stopped")
+    parser.add_argument('--memory-limit', type=float, default=None,
+                        help="Memory (MB) each file's analysis may allocate")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="Wall-clock seconds after which a file's analysis is killed")
+    parser.add_argument('--force', action='append', default=[],
+                        help="Analyze this file, or everything under this directory, in full (repeatable)")
+    parser.add_argument('--no-classify', action='store_true',
+                        help="Analyze every file in full, without the skip/light prefilter")
+    parser.add_argument('--clones', default=None,
+                        help="Keep a clone index in this directory and report clone clusters")
+    args = parser.parse_args()
+
+    ops = [op.strip() for op in args.ops.split(',') if op.strip()]
+    unknown = [op for op in ops if op not in FILE_OPS]
+    if unknown or not ops:
+        print(json.dumps({"type": "error", "error": f"Unknown ops: {', '.join(unknown) or '(none)'}"}))
+        sys.exit(1)
+
+    try:
+        if args.manifest:
+            with open(args.manifest, 'r', encoding='utf-8') as manifest:
+                file_paths = read_manifest(manifest)
+        else:
+            file_paths = read_manifest(sys.stdin)
+    except Exception as e:
+        print(json.dumps({"type": "error", "error": f"Error reading manifest: {str(e)}"}))
+        sys.exit(1)
+
+    cache_dir = None if args.no_cache else (args.cache_dir or default_cache_dir())
+    BatchAnalyzer(ops=ops, workers=args.workers, cache_dir=cache_dir,
+                  profile=args.profile, profile_dir=args.profile_dir, rollup=args.rollup,
+                  store_dir=args.store,
+                  budget=FileBudget(args.cpu_limit, args.memory_limit, args.timeout),
+                  classifier=None if args.no_classify else FileClassifier(args.force),
+                  clones_dir=args.clones).run(file_paths)
+
+
+if __name__ == "__main__":
+    main()
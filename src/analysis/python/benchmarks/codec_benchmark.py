@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Output Codec Benchmark
+
+Compares the output codecs of output_codecs.py on real analyzer results:
+every file of the synthetic corpus (corpus.py) is analyzed once (lizard,
+comments and classes for source files, the DOM parser for HTML), then each
+result is encoded and decoded with every codec. Reported per analyzer
+group and codec: payload bytes, encode and decode time (best of --repeat
+runs), and, when node is on PATH, the time Node's JSON.parse takes for the
+JSON-based payloads (the extension's side of the pipe).
+
+The plain json.dumps text the analyzers print without --codec is the
+"text" baseline.
+
+Usage: python codec_benchmark.py [--output FILE] [--scale N] [--repeat N] [--no-node] [--keep-corpus DIR]
+"""
+
+import sys
+import json
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import corpus
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, ANALYZER_DIR)
+
+import output_codecs  # noqa: E402
+from combined_analyzer import analyze_all  # noqa: E402
+from html_dom_parser import CODEC_MAX_TREE_DEPTH, parse_html  # noqa: E402
+from source_reader import read_source  # noqa: E402
+
+
+# Size factors of corpus.SIZE_FACTORS used here (the largest ones dominate anyway)
+DEFAULT_FACTORS = (1, 8)
+
+NODE_PARSE_SCRIPT = r'''
+const fs = require('fs');
+const [file, repeat] = [process.argv[1], Number(process.argv[2])];
+const text = fs.readFileSync(file, 'utf8');
+let best = Infinity;
+for (let i = 0; i < repeat; i++) {
+  const started = process.hrtime.bigint();
+  JSON.parse(text);
+  best = Math.min(best, Number(process.hrtime.bigint() - started) / 1e6);
+}
+process.stdout.write(JSON.stringify({ms: best}));
+'''
+
+
+def collect_results(files):
+    """
+    Analyze every corpus file the way the extension would
+
+    Returns:
+        Dictionary group name -> list of result dictionaries
+    """
+    groups = {'source': [], 'dom': []}
+    for path in files:
+        if path.endswith(('.html', '.htm')):
+            parser = parse_html(read_source(path))
+            # Same rule as html_dom_parser --codec: deep trees are written flat
+            groups['dom'].append(parser.get_analysis_result(path, parser.max_depth > CODEC_MAX_TREE_DEPTH))
+        else:
+            groups['source'].append(analyze_all(path))
+    return {name: results for name, results in groups.items() if results}
+
+
+def best_time(function, repeat):
+    """Best wall time of repeat calls (seconds) and the last return value"""
+    best = float('inf')
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value = function()
+        best = min(best, time.perf_counter() - started)
+    return best, value
+
+
+def node_parse_ms(payloads, repeat, work_dir):
+    """Total best JSON.parse time in Node over text payloads, or None without node"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    total = 0.0
+    path = os.path.join(work_dir, 'payload.json')
+    for payload in payloads:
+        with open(path, 'wb') as file:
+            file.write(payload)
+        completed = subprocess.run([node, '-e', NODE_PARSE_SCRIPT, path, str(repeat)],
+                                   capture_output=True, text=True, timeout=300)
+        if completed.returncode != 0:
+            return None
+        total += json.loads(completed.stdout)["ms"]
+    return round(total, 3)
+
+
+def benchmark_group(results, repeat, use_node, work_dir):
+    """
+    Measure every codec on one group of results
+
+    Returns:
+        Dictionary codec -> {"bytes", "encodeMs", "decodeMs", "nodeParseMs"}
+    """
+    codecs = {'text': (lambda value: json.dumps(value).encode('utf-8'), lambda payload: json.loads(payload), True)}
+    for codec in output_codecs.CODECS:
+        tag = output_codecs.CODEC_TAGS[codec]
+        codecs[codec] = (
+            lambda value, codec=codec: output_codecs.encode_payload(value, codec),
+            lambda payload, tag=tag: output_codecs.decode_payload(payload, tag),
+            tag in (b'J', b'K'),
+        )
+
+    report = {}
+    for name, (encode, decode, is_json) in codecs.items():
+        encode_seconds, payloads = best_time(lambda: [encode(result) for result in results], repeat)
+        decode_seconds, decoded = best_time(lambda: [decode(payload) for payload in payloads], repeat)
+        if decoded != results:
+            raise AssertionError(f"{name} does not round-trip")
+        report[name] = {
+            "bytes": sum(len(payload) for payload in payloads),
+            "encodeMs": round(encode_seconds * 1000, 3),
+            "decodeMs": round(decode_seconds * 1000, 3),
+            "nodeParseMs": node_parse_ms(payloads, repeat, work_dir) if use_node and is_json else None,
+        }
+    return report
+
+
+def print_report(report):
+    """Human-readable table on stderr"""
+    for group, codecs in report["groups"].items():
+        baseline = codecs['text']["bytes"] or 1
+        sys.stderr.write(f"\n{group} ({report['files'][group]} files)\n")
+        sys.stderr.write(f"  {'codec':<8} {'bytes':>12} {'size':>6} {'encode ms':>10} {'decode ms':>10} {'node ms':>9}\n")
+        for name, row in codecs.items():
+            node = '-' if row["nodeParseMs"] is None else f"{row['nodeParseMs']:.1f}"
+            sys.stderr.write(f"  {name:<8} {row['bytes']:>12} {row['bytes'] / baseline:>6.2f} "
+                             f"{row['encodeMs']:>10.1f} {row['decodeMs']:>10.1f} {node:>9}\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare analyzer output codecs")
+    parser.add_argument('--output', default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--scale', type=int, default=1, help="Multiply the corpus size factors")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement (best is kept)")
+    parser.add_argument('--no-node', action='store_true', help="Skip the Node JSON.parse measurements")
+    parser.add_argument('--keep-corpus', default=None, help="Generate the corpus here and keep it")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='codexr-codecs-')
+    corpus_dir = args.keep_corpus or os.path.join(work_dir, 'corpus')
+    try:
+        cases = corpus.build_corpus(corpus_dir, factors=tuple(f * args.scale for f in DEFAULT_FACTORS),
+                                    files_per_case=1)
+        groups = collect_results([path for case in cases for path in case["files"]])
+        report = {
+            "python": sys.version.split()[0],
+            "orjson": output_codecs.get_orjson() is not None,
+            "msgpack": output_codecs.get_msgpack() is not None,
+            "files": {name: len(results) for name, results in groups.items()},
+            "groups": {name: benchmark_group(results, args.repeat, not args.no_node, work_dir)
+                       for name, results in groups.items()},
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+Synthetic Benchmark Corpus
+
+Generates deterministic source files for every extension handled by the
+comment and class analyzers, at several sizes, plus pathological shapes
+(single-line minified JavaScript, very long C files, class-dense C# files
+with over 100k lines, deeply nested HTML).
+
+Each language has a small "unit" template (a class, a function with some
+branching, line and block comments, a string containing a comment marker)
+that is repeated with distinct names until the requested size is reached.
+
+Usage: python corpus.py <output_dir> [--scale N]
+"""
+
+import sys
+import json
+import os
+
+
+# Placeholder replaced by the unit number in every template
+N = '@N@'
+
+UNIT_TEMPLATES = {
+    'c': '''/* Block comment for unit @N@
+ * spanning several lines */
+static int compute_@N@(int value, const char *label) {
+    // line comment with a "quote"
+    const char *url = "http://example.com/@N@"; /* trailing */
+    if (value > @N@ && label != 0) {
+        return value * 2;
+    } else if (value < 0) {
+        return -value;
+    }
+    for (int i = 0; i < value; i++) { value += i % 3; }
+    return value;
+}
+
+''',
+    'cpp': '''/* Block comment for unit @N@
+ * spanning several lines */
+class Widget@N@ : public Base {
+public:
+    // line comment with a "quote"
+    int compute(int value) const {
+        const char *url = "http://example.com/@N@"; /* trailing */
+        if (value > @N@) { return value * 2; }
+        else if (value < 0) { return -value; }
+        for (int i = 0; i < value; ++i) { value += i % 3; }
+        return value;
+    }
+};
+enum class Mode@N@ { Off, On };
+struct Point@N@ { int x; int y; };
+
+''',
+    'objc': '''/* Block comment for unit @N@ */
+@interface Widget@N@ : NSObject
+// line comment
+- (int)compute:(int)value;
+@end
+
+@implementation Widget@N@
+- (int)compute:(int)value {
+    NSString *url = @"http://example.com/@N@"; /* trailing */
+    if (value > @N@) { return value * 2; }
+    return value;
+}
+@end
+
+''',
+    'csharp': '''/// <summary>Doc comment for unit @N@</summary>
+public class Widget@N@ : IWidget
+{
+    // line comment with a "quote"
+    public int Compute(int value)
+    {
+        var url = "http://example.com/@N@"; /* trailing */
+        var verbatim = @"C:\\path\\@N@";
+        if (value > @N@) { return value * 2; }
+        else if (value < 0) { return -value; }
+        foreach (var i in Enumerable.Range(0, value)) { value += i % 3; }
+        return value;
+    }
+}
+public interface IShape@N@ { int Area(); }
+
+''',
+    'java': '''/**
+ * Javadoc for unit @N@
+ */
+public class Widget@N@ extends Base implements Shape {
+    // line comment with a "quote"
+    public int compute(int value) {
+        String url = "http://example.com/@N@"; /* trailing */
+        if (value > @N@) { return value * 2; }
+        else if (value < 0) { return -value; }
+        for (int i = 0; i < value; i++) { value += i % 3; }
+        return value;
+    }
+}
+interface Shape@N@ { int area(); }
+
+''',
+    'javascript': '''/**
+ * JSDoc for unit @N@
+ */
+class Widget@N@ extends Base {
+  // line comment with a "quote"
+  compute(value) {
+    const url = `http://example.com/${value}/@N@`; /* trailing */
+    if (value > @N@) { return value * 2; }
+    else if (value < 0) { return -value; }
+    for (let i = 0; i < value; i++) { value += i % 3; }
+    return value;
+  }
+}
+function helper@N@(a, b) { return a && b ? a : b; }
+
+''',
+    'typescript': '''/**
+ * TSDoc for unit @N@
+ */
+export class Widget@N@ implements Shape {
+  // line comment with a "quote"
+  compute(value: number): number {
+    const url: string = `http://example.com/${value}/@N@`; /* trailing */
+    if (value > @N@) { return value * 2; }
+    else if (value < 0) { return -value; }
+    for (let i = 0; i < value; i++) { value += i % 3; }
+    return value;
+  }
+}
+interface Shape@N@ { area(): number; }
+
+''',
+    'go': '''// Widget@N@ is documented here
+type Widget@N@ struct {
+	value int
+}
+
+/* Block comment for unit @N@ */
+func (w *Widget@N@) Compute(value int) int {
+	url := `http://example.com/@N@ // not a comment`
+	_ = url
+	if value > @N@ {
+		return value * 2
+	} else if value < 0 {
+		return -value
+	}
+	for i := 0; i < value; i++ {
+		value += i % 3
+	}
+	return value
+}
+
+type Shape@N@ interface { Area() int }
+
+''',
+    'rust': '''/// Doc comment for unit @N@
+pub struct Widget@N@ {
+    value: i32,
+}
+
+/* Block comment /* nested */ for unit @N@ */
+impl Widget@N@ {
+    pub fn compute(&self, value: i32) -> i32 {
+        let url = r#"http://example.com/@N@ // raw"#;
+        let quote = '"';
+        if value > @N@ { return value * 2; }
+        else if value < 0 { return -value; }
+        for i in 0..value { let _ = i % 3; }
+        value
+    }
+}
+trait Shape@N@ { fn area(&self) -> i32; }
+
+''',
+    'kotlin': '''/**
+ * KDoc for unit @N@
+ */
+class Widget@N@(val value: Int) : Base() {
+    // line comment with a "quote"
+    fun compute(value: Int): Int {
+        val url = "http://example.com/@N@" /* trailing */
+        if (value > @N@) { return value * 2 }
+        else if (value < 0) { return -value }
+        for (i in 0 until value) { println(i % 3) }
+        return value
+    }
+}
+interface Shape@N@ { fun area(): Int }
+
+''',
+    'swift': '''/// Doc comment for unit @N@
+class Widget@N@: Base {
+    // line comment with a "quote"
+    func compute(_ value: Int) -> Int {
+        let url = "http://example.com/@N@" /* trailing */
+        if value > @N@ { return value * 2 }
+        else if value < 0 { return -value }
+        for i in 0..<value { print(i % 3) }
+        return value
+    }
+}
+protocol Shape@N@ { func area() -> Int }
+struct Point@N@ { var x: Int }
+
+''',
+    'scala': '''/**
+ * Scaladoc for unit @N@
+ */
+class Widget@N@(value: Int) extends Base {
+  // line comment with a "quote"
+  def compute(value: Int): Int = {
+    val url = "http://example.com/@N@" /* trailing */
+    if (value > @N@) value * 2
+    else if (value < 0) -value
+    else value
+  }
+}
+trait Shape@N@ { def area(): Int }
+object Registry@N@ { val size = @N@ }
+
+''',
+    'php': '''/**
+ * PHPDoc for unit @N@
+ */
+class Widget@N@ extends Base implements Shape {
+    // line comment with a "quote"
+    public function compute($value) {
+        $url = "http://example.com/@N@"; # hash comment
+        if ($value > @N@) { return $value * 2; }
+        elseif ($value < 0) { return -$value; }
+        foreach (range(0, $value) as $i) { $value += $i % 3; }
+        return $value;
+    }
+}
+interface Shape@N@ { public function area(); }
+
+''',
+    'python': '''class Widget@N@(Base):
+    """Docstring for unit @N@
+    spanning several lines."""
+
+    # line comment with a "quote"
+    def compute(self, value):
+        url = "http://example.com/@N@#anchor"  # trailing
+        if value > @N@:
+            return value * 2
+        elif value < 0:
+            return -value
+        for i in range(value):
+            value += i % 3
+        return value
+
+
+''',
+    'gdscript': '''# Comment for unit @N@
+class Widget@N@:
+    var value = @N@
+
+    func compute(value):
+        var url = "http://example.com/@N@#anchor"  # trailing
+        if value > @N@:
+            return value * 2
+        elif value < 0:
+            return -value
+        return value
+
+
+''',
+    'ruby': '''# Comment for unit @N@
+class Widget@N@ < Base
+  # line comment with a "quote"
+  def compute(value)
+    url = "http://example.com/@N@#{value}" # trailing
+    if value > @N@
+      value * 2
+    elsif value < 0
+      -value
+    else
+      value
+    end
+  end
+end
+module Helpers@N@
+end
+=begin
+Block comment for unit @N@
+=end
+
+''',
+    'perl': '''# Comment for unit @N@
+package Widget@N@;
+
+sub compute {
+    my ($self, $value) = @_;
+    my $url = "http://example.com/@N@#anchor"; # trailing
+    my $last = $#{$self->{items}};
+    if ($value > @N@) { return $value * 2; }
+    elsif ($value < 0) { return -$value; }
+    return $value;
+}
+
+=pod
+
+Documentation for unit @N@
+
+=cut
+
+''',
+    'lua': '''-- Comment for unit @N@
+local Widget@N@ = {}
+
+--[[ Block comment
+for unit @N@ ]]
+function Widget@N@.compute(value)
+  local url = "http://example.com/@N@--not"
+  if value > @N@ then
+    return value * 2
+  elseif value < 0 then
+    return -value
+  end
+  for i = 1, value do value = value + i % 3 end
+  return value
+end
+
+''',
+    'erlang': '''%% Comment for unit @N@
+-record(widget@N@, {value = @N@}).
+
+compute_@N@(Value) when Value > @N@ ->
+    Url = "http://example.com/@N@%not", % trailing
+    _ = Url,
+    Value * 2;
+compute_@N@(Value) when Value < 0 ->
+    -Value;
+compute_@N@(Value) ->
+    Value.
+
+''',
+    'fortran': '''! Comment for unit @N@
+function compute_@N@(value) result(r)
+    integer, intent(in) :: value
+    integer :: r
+    character(len=32) :: url = "http://example.com/@N@!not"  ! trailing
+    if (value > @N@) then
+        r = value * 2
+    else
+        r = value
+    end if
+end function compute_@N@
+
+''',
+    'r': '''# Comment for unit @N@
+compute_@N@ <- function(value) {
+  url <- "http://example.com/@N@#anchor"  # trailing
+  if (value > @N@) {
+    return(value * 2)
+  } else if (value < 0) {
+    return(-value)
+  }
+  value
+}
+
+''',
+    'zig': '''// Comment for unit @N@
+fn compute_@N@(value: i32) i32 {
+    const url = "http://example.com/@N@"; // trailing
+    _ = url;
+    if (value > @N@) {
+        return value * 2;
+    }
+    return value;
+}
+
+''',
+    'solidity': '''/// NatSpec for unit @N@
+contract Widget@N@ {
+    // line comment with a "quote"
+    function compute(uint value) public pure returns (uint) {
+        string memory url = "http://example.com/@N@"; /* trailing */
+        if (value > @N@) { return value * 2; }
+        return value;
+    }
+}
+
+''',
+    'ttcn': '''/* Block comment for unit @N@ */
+function f_compute_@N@(integer p_value) return integer {
+    // line comment with a "quote"
+    var charstring v_url := "http://example.com/@N@";
+    if (p_value > @N@) { return p_value * 2; }
+    return p_value;
+}
+
+''',
+    'vue': '''<!-- Comment for unit @N@ -->
+<div class="widget-@N@">
+  <span :title="'http://example.com/@N@'">{{ value@N@ }}</span>
+  <!-- multi-line
+       comment -->
+</div>
+''',
+    'html': '''<!-- Section @N@ -->
+<section id="s@N@" class="card">
+  <h2>Heading @N@</h2>
+  <p>Paragraph with <a href="/item/@N@">a link</a> and <b>bold</b> text.<br>
+  <img src="/img/@N@.png" alt="image @N@"></p>
+  <ul><li>one<li>two<li>three</ul>
+</section>
+''',
+}
+
+# Text wrapped around the repeated units, per template
+WRAPPERS = {
+    'vue': ('<template>\n<div>\n', '</div>\n</template>\n<script>\nexport default { name: "Bench" }\n</script>\n'),
+    'html': ('<!DOCTYPE html>\n<html>\n<head><title>Bench</title><style>.card { margin: 0 }</style></head>\n<body>\n',
+             '</body>\n</html>\n'),
+    'php': ('<?php\n', ''),
+    'java': ('package bench;\n\n', ''),
+    'go': ('package bench\n\n', ''),
+    'erlang': ('-module(bench).\n-compile(export_all).\n\n', ''),
+    'scala': ('package bench\n\n', ''),
+}
+
+EXTENSION_TEMPLATES = {
+    '.c': 'c', '.h': 'c',
+    '.cpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp', '.hpp': 'cpp', '.hh': 'cpp',
+    '.m': 'objc', '.mm': 'objc',
+    '.cs': 'csharp',
+    '.java': 'java',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.kt': 'kotlin', '.kts': 'kotlin',
+    '.swift': 'swift',
+    '.scala': 'scala', '.sc': 'scala',
+    '.php': 'php', '.phtml': 'php', '.php3': 'php', '.php4': 'php', '.php5': 'php', '.phps': 'php',
+    '.py': 'python',
+    '.gd': 'gdscript',
+    '.rb': 'ruby',
+    '.pl': 'perl', '.pm': 'perl', '.t': 'perl', '.pod': 'perl',
+    '.lua': 'lua',
+    '.erl': 'erlang', '.hrl': 'erlang',
+    '.f90': 'fortran', '.f95': 'fortran', '.f03': 'fortran', '.f08': 'fortran',
+    '.r': 'r',
+    '.zig': 'zig',
+    '.sol': 'solidity',
+    '.ttcn': 'ttcn', '.ttcn3': 'ttcn',
+    '.vue': 'vue',
+    '.html': 'html',
+}
+
+# Number of template units in the smallest corpus file; larger sizes multiply it
+BASE_UNITS = 200
+SIZE_FACTORS = (1, 4, 16)
+
+
+def generate_units(template, count, start=0):
+    """
+    Repeat a unit template with distinct numbers
+
+    Args:
+        template: Template name from UNIT_TEMPLATES
+        count: Number of units
+        start: First unit number
+
+    Returns:
+        Generated source text
+    """
+    unit = UNIT_TEMPLATES[template]
+    head, tail = WRAPPERS.get(template, ('', ''))
+    body = ''.join(unit.replace(N, str(number)) for number in range(start, start + count))
+    return head + body + tail
+
+
+def minified_js(count):
+    """JavaScript with every unit joined on a single line"""
+    units = []
+    for number in range(count):
+        units.append(
+            f'function f{number}(a,b){{if(a>{number}){{return a*2}}else if(b){{return "//"+b}}'
+            f'for(var i=0;i<a;i++){{b+=i%3}}return b}}'
+            f'var s{number}="/* not a comment */",t{number}=`x${{f{number}(1,2)}}`;'
+        )
+    return ''.join(units) + '\n'
+
+
+def long_source(template, lines):
+    """Repeated units of one template making up roughly the given number of lines"""
+    unit_lines = UNIT_TEMPLATES[template].count('\n')
+    return generate_units(template, max(1, lines // unit_lines))
+
+
+def long_c(lines):
+    """A C file of roughly the given number of lines"""
+    return long_source('c', lines)
+
+
+def long_csharp(lines):
+    """A C# file of roughly the given number of lines, two type declarations per unit"""
+    return long_source('csharp', lines)
+
+
+def deep_html(depth):
+    """HTML nested depth levels deep, with a void element at every level"""
+    opening = ''.join(f'<div class="d{level % 7}"><br>' for level in range(depth))
+    closing = '</div>' * depth
+    return f'<!DOCTYPE html>\n<html>\n<body>\n{opening}deep text{closing}\n</body>\n</html>\n'
+
+
+# Pathological shapes: name -> (extension, generator, argument per size factor)
+PATHOLOGICAL_SHAPES = {
+    'minified-js': ('.js', minified_js, lambda factor: BASE_UNITS * factor),
+    'long-c': ('.c', long_c, lambda factor: 100000 * factor // SIZE_FACTORS[-1]),
+    # Class scanning must stay linear in file length (was quadratic in the line numbering)
+    'long-cs': ('.cs', long_csharp, lambda factor: 160000 * factor // SIZE_FACTORS[-1]),
+    'deep-html': ('.html', deep_html, lambda factor: 5000 * factor // SIZE_FACTORS[-1]),
+}
+
+
+def build_corpus(output_dir, extensions=None, factors=SIZE_FACTORS, files_per_case=3, shapes=True):
+    """
+    Write the corpus to disk
+
+    Args:
+        output_dir: Directory to write into (created if missing)
+        extensions: Extensions to generate (default: all in EXTENSION_TEMPLATES)
+        factors: Size multipliers of BASE_UNITS
+        files_per_case: Files per (extension, size) case, each with distinct names
+        shapes: Whether to include the pathological shapes
+
+    Returns:
+        List of cases: {"name", "extension", "factor", "files", "bytes", "lines"}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    cases = []
+
+    def write_case(name, extension, factor, texts):
+        paths = []
+        total_bytes = 0
+        total_lines = 0
+        for index, text in enumerate(texts):
+            path = os.path.join(output_dir, f'{name}-x{factor}-{index}{extension}')
+            data = text.encode('utf-8')
+            with open(path, 'wb') as file:
+                file.write(data)
+            paths.append(path)
+            total_bytes += len(data)
+            total_lines += text.count('\n') + 1
+        cases.append({
+            "name": name,
+            "extension": extension,
+            "factor": factor,
+            "files": paths,
+            "bytes": total_bytes,
+            "lines": total_lines,
+        })
+
+    for extension in (extensions or sorted(EXTENSION_TEMPLATES)):
+        template = EXTENSION_TEMPLATES[extension]
+        for factor in factors:
+            units = BASE_UNITS * factor
+            texts = [generate_units(template, units, start=index * units) for index in range(files_per_case)]
+            write_case(extension.lstrip('.'), extension, factor, texts)
+
+    if shapes:
+        for name, (extension, generator, argument) in PATHOLOGICAL_SHAPES.items():
+            if extensions and extension not in extensions:
+                continue
+            for factor in factors:
+                write_case(name, extension, factor, [generator(argument(factor))])
+
+    return cases
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "No output directory provided"}))
+        sys.exit(1)
+
+    factors = SIZE_FACTORS
+    if '--scale' in sys.argv[2:-1]:
+        scale = int(sys.argv[sys.argv.index('--scale') + 1])
+        factors = tuple(factor * scale for factor in SIZE_FACTORS)
+
+    cases = build_corpus(sys.argv[1], factors=factors)
+    print(json.dumps({"cases": len(cases), "bytes": sum(case["bytes"] for case in cases)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Import-Time Budget
+
+Guards the cold-start latency of the one-shot analyzers. Every analyzer
+module is imported in a fresh interpreter under -X importtime and its
+cumulative import time is checked against IMPORT_BUDGETS_MS. It also checks
+that analyzing a Python file loads only the lizard language readers that
+file needs, and that lizard_loader's extension table still matches the
+installed lizard. Exits with status 1 when any check fails.
+
+With --bundle the modules are imported from a build_bundle.py zipapp under
+-I -S. Standard-library modules that site would otherwise preload are then
+counted against the analyzers, so those numbers run a few ms higher.
+
+Usage: python import_budget.py [--runs N] [--scale FACTOR] [--bundle FILE.pyz]
+"""
+
+import sys
+import json
+import os
+import argparse
+import shutil
+import tempfile
+import subprocess
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Cumulative import time allowed per module (ms, warm bytecode cache); about twice
+# the typical figure, so only real regressions such as an eager lizard import trip it
+IMPORT_BUDGETS_MS = {
+    'lizard_analyzer': 50.0,
+    'python_comment_analyzer': 30.0,
+    'class_counter_analyzer': 30.0,
+    'html_dom_parser': 35.0,
+    'combined_analyzer': 30.0,
+}
+
+# lizard_languages modules a .py analysis may load: the shared base
+# modules, CLikeReader (lizard's fallback reader) and the Python reader
+PYTHON_READER_MODULES = {
+    'lizard_languages', 'lizard_languages.code_reader', 'lizard_languages.script_language',
+    'lizard_languages.clike', 'lizard_languages.python',
+}
+
+# Modules that must never be loaded for a .py analysis
+FORBIDDEN_MODULES = ('pygments', 'importlib.metadata')
+
+_LOADED_MODULES_SCRIPT = '''
+import sys, json
+import lizard_analyzer
+lizard_analyzer.analyze_source("sample.py", "def f(x):\\n    return x\\n")
+print(json.dumps(sorted(sys.modules)))
+'''
+
+_READER_TABLE_SCRIPT = '''
+import sys, json, lizard_languages, lizard_loader
+mismatches = []
+for reader in lizard_languages.languages():
+    for ext in reader.ext:
+        expected = lizard_languages.get_reader_for("sample." + ext).__name__
+        lazy = lizard_loader._EXTENSIONS.get(ext.lower(), (None, None))[1]
+        if lazy != expected:
+            mismatches.append({"extension": ext, "lizard": expected, "loader": lazy})
+print(json.dumps(mismatches))
+'''
+
+
+# Bytecode cache for the measured interpreters, kept out of the source tree
+_PYCACHE_DIR = tempfile.mkdtemp(prefix='codexr-importtime-')
+
+
+def _python(args, **kwargs):
+    """Run the current interpreter in the analyzer directory with a writable bytecode cache"""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    return subprocess.run([sys.executable, '-X', f'pycache_prefix={_PYCACHE_DIR}'] + args,
+                          cwd=ANALYZER_DIR, capture_output=True, text=True, env=env, **kwargs)
+
+
+def cumulative_import_ms(module, runs, bundle=None):
+    """
+    Fastest cumulative import time of a module over several fresh interpreters
+
+    Args:
+        module: Module name
+        runs: Number of interpreters to start
+        bundle: Optional zipapp to import from (run with -I -S)
+
+    Returns:
+        Milliseconds, or None when the module failed to import
+    """
+    if bundle:
+        args = ['-I', '-S', '-X', 'importtime', '-c',
+                f"import sys; sys.path.insert(0, {os.path.abspath(bundle)!r}); import {module}"]
+    else:
+        args = ['-X', 'importtime', '-c', f"import {module}"]
+
+    # First run populates __pycache__ so compile time is not counted
+    _python(args)
+    best = None
+    for _ in range(runs):
+        completed = _python(args)
+        if completed.returncode != 0:
+            return None
+        for line in completed.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module and fields[2].startswith(' ' + module):
+                micros = int(fields[1])
+                best = micros if best is None else min(best, micros)
+    return round(best / 1000, 3) if best is not None else None
+
+
+def check_budgets(runs, scale, bundle=None):
+    """Import time of every analyzer module against its budget"""
+    checks = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        elapsed = cumulative_import_ms(module, runs, bundle)
+        limit = round(budget * scale, 3)
+        checks.append({
+            "check": "importTime",
+            "module": module,
+            "importMs": elapsed,
+            "budgetMs": limit,
+            "passed": elapsed is not None and elapsed <= limit
+        })
+    return checks
+
+
+def check_lazy_readers():
+    """A .py analysis must load only the Python reader's modules"""
+    completed = _python(['-c', _LOADED_MODULES_SCRIPT])
+    if completed.returncode != 0:
+        return {"check": "lazyReaders", "passed": False, "error": completed.stderr.strip()[-500:]}
+
+    loaded = json.loads(completed.stdout)
+    extra_readers = [name for name in loaded
+                     if name.startswith('lizard_languages') and name not in PYTHON_READER_MODULES]
+    forbidden = [name for name in loaded if name.split('.')[0] in FORBIDDEN_MODULES
+                 or name in FORBIDDEN_MODULES]
+    return {
+        "check": "lazyReaders",
+        "unexpectedReaders": extra_readers,
+        "forbiddenModules": forbidden,
+        "passed": not extra_readers and not forbidden
+    }
+
+
+def check_reader_table():
+    """lizard_loader.READERS must pick the same reader as lizard for every extension"""
+    completed = _python(['-c', _READER_TABLE_SCRIPT])
+    if completed.returncode != 0:
+        return {"check": "readerTable", "passed": False, "error": completed.stderr.strip()[-500:]}
+    mismatches = json.loads(completed.stdout)
+    return {"check": "readerTable", "mismatches": mismatches, "passed": not mismatches}
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Check the analyzers' import time against a budget")
+    parser.add_argument('--runs', type=int, default=5, help="Interpreters per module; the fastest counts")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply every budget (slow machines)")
+    parser.add_argument('--bundle', default=None, help="Measure imports from a build_bundle.py zipapp")
+    args = parser.parse_args()
+
+    try:
+        checks = check_budgets(max(1, args.runs), args.scale, args.bundle)
+        checks.append(check_lazy_readers())
+        checks.append(check_reader_table())
+    finally:
+        shutil.rmtree(_PYCACHE_DIR, ignore_errors=True)
+
+    failed = sum(1 for check in checks if not check["passed"])
+    print(json.dumps({"checks": checks, "failed": failed, "status": "success" if not failed else "error"}))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
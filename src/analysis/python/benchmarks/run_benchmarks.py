@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Analyzer Benchmarks
+
+Runs every analyzer over the synthetic corpus (corpus.py) and reports
+files/s, MB/s and peak RSS per analyzer, extension and size. Each
+measurement runs in a fresh interpreter so peak RSS belongs to that case
+alone. Time is fitted against input size per analyzer and corpus; an
+exponent clearly above 1 is flagged as super-linear scaling.
+
+Results are written as JSON so two runs (e.g. before and after a lizard
+upgrade) can be compared with --diff.
+
+Usage: python run_benchmarks.py [--output FILE] [--analyzers lizard,comments,classes,dom]
+                                [--extensions .py,.c] [--quick] [--repeat N] [--keep-corpus DIR]
+                                [--compare BASELINE.json]
+       python run_benchmarks.py --diff BASELINE.json CURRENT.json
+"""
+
+import sys
+import json
+import os
+import time
+import math
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import corpus
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ANALYZER_DIR = os.path.dirname(BENCHMARK_DIR)
+
+
+# analyzer name -> (module, file-based entry point)
+ANALYZERS = {
+    'lizard': ('lizard_analyzer', 'analyze_file'),
+    'comments': ('python_comment_analyzer', 'analyze_comments'),
+    'classes': ('class_counter_analyzer', 'analyze_classes'),
+    'dom': ('html_dom_parser', 'analyze_html_file'),
+}
+
+# Fitted time ~ size^k; k above this is reported as super-linear
+SUPERLINEAR_EXPONENT = 1.3
+# Cases faster than this are dominated by noise and are left out of the fit
+MIN_FIT_SECONDS = 0.02
+# A case this much slower than the baseline is reported as a regression
+REGRESSION_RATIO = 1.2
+# Per-case subprocess timeout (seconds)
+CASE_TIMEOUT = 600
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def analyzer_applies(analyzer, extension):
+    """Whether an analyzer handles files with the given extension"""
+    sys.path.insert(0, ANALYZER_DIR)
+    try:
+        if analyzer == 'lizard':
+            from lizard_languages import get_reader_for
+            return get_reader_for(f'file{extension}') is not None
+        if analyzer == 'comments':
+            from comment_lexer import get_spec
+            return extension == '.py' or get_spec(extension) is not None
+        if analyzer == 'classes':
+            from class_counter_analyzer import EXTENSION_LANGUAGES
+            return extension in EXTENSION_LANGUAGES
+        return extension == '.html'
+    finally:
+        sys.path.remove(ANALYZER_DIR)
+
+
+def measure(analyzer, file_paths, repeat):
+    """
+    Time one analyzer over a set of files (runs inside the worker process)
+
+    Args:
+        analyzer: Key of ANALYZERS
+        file_paths: Files to analyze
+        repeat: Number of passes; the fastest one is reported
+
+    Returns:
+        Dictionary with seconds, errors and RSS figures
+    """
+    sys.path.insert(0, ANALYZER_DIR)
+    module_name, function_name = ANALYZERS[analyzer]
+    started = time.perf_counter()
+    analyze = getattr(__import__(module_name), function_name)
+    import_seconds = time.perf_counter() - started
+    baseline_rss = peak_rss_kb()
+
+    best = None
+    errors = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for file_path in file_paths:
+            result = analyze(file_path)
+            if isinstance(result, dict) and result.get("error"):
+                errors += 1
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "seconds": best,
+        "importSeconds": import_seconds,
+        "errors": errors // max(1, repeat),
+        "baselineRssKb": baseline_rss,
+        "peakRssKb": peak_rss_kb(),
+    }
+
+
+def run_case(analyzer, case, repeat):
+    """Measure one (analyzer, corpus case) pair in a fresh interpreter"""
+    command = [sys.executable, os.path.abspath(__file__), '--measure', analyzer,
+               '--repeat', str(repeat), *case["files"]]
+    try:
+        completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                   text=True, timeout=CASE_TIMEOUT)
+        measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+    except subprocess.TimeoutExpired:
+        return {"error": f"Timed out after {CASE_TIMEOUT}s"}
+    except (ValueError, IndexError):
+        return {"error": f"Worker failed with exit code {completed.returncode}"}
+
+    seconds = measurement["seconds"]
+    rate = 1 / seconds if seconds > 0 else float('inf')
+    return {
+        **measurement,
+        "filesPerSecond": round(len(case["files"]) * rate, 2),
+        "mbPerSecond": round(case["bytes"] / (1024 * 1024) * rate, 3),
+        "linesPerSecond": round(case["lines"] * rate),
+        "peakRssMb": round(measurement["peakRssKb"] / 1024, 1) if measurement["peakRssKb"] else None,
+    }
+
+
+def fit_exponent(points):
+    """
+    Least-squares fit of log(time) against log(size)
+
+    Args:
+        points: (size, seconds) pairs
+
+    Returns:
+        The exponent k of time ~ size^k, or None with fewer than two usable points
+    """
+    usable = [(math.log(size), math.log(seconds)) for size, seconds in points
+              if size > 0 and seconds >= MIN_FIT_SECONDS]
+    if len(usable) < 2:
+        return None
+    mean_x = sum(x for x, _ in usable) / len(usable)
+    mean_y = sum(y for _, y in usable) / len(usable)
+    spread = sum((x - mean_x) ** 2 for x, _ in usable)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in usable) / spread
+
+
+def scaling_report(results):
+    """Fit every (analyzer, corpus) series across sizes and flag super-linear ones"""
+    series = {}
+    for entry in results:
+        if "seconds" in entry:
+            series.setdefault((entry["analyzer"], entry["name"]), []).append((entry["bytes"], entry["seconds"]))
+
+    report = []
+    for (analyzer, name), points in sorted(series.items()):
+        exponent = fit_exponent(points)
+        report.append({
+            "analyzer": analyzer,
+            "name": name,
+            "exponent": round(exponent, 3) if exponent is not None else None,
+            "superLinear": exponent is not None and exponent > SUPERLINEAR_EXPONENT,
+        })
+    return report
+
+
+def _case_key(entry):
+    return (entry["analyzer"], entry["name"], entry["factor"])
+
+
+def diff_results(baseline, current):
+    """
+    Compare two result documents case by case
+
+    Returns:
+        List of {"analyzer", "name", "factor", "baselineSeconds", "seconds", "ratio", "regression"}
+    """
+    before = {_case_key(entry): entry for entry in baseline["results"] if "seconds" in entry}
+    changes = []
+    for entry in current["results"]:
+        old = before.get(_case_key(entry))
+        if old is None or "seconds" not in entry or old["seconds"] <= 0:
+            continue
+        ratio = entry["seconds"] / old["seconds"]
+        changes.append({
+            "analyzer": entry["analyzer"],
+            "name": entry["name"],
+            "factor": entry["factor"],
+            "baselineSeconds": round(old["seconds"], 4),
+            "seconds": round(entry["seconds"], 4),
+            "ratio": round(ratio, 3),
+            "regression": ratio > REGRESSION_RATIO and entry["seconds"] >= MIN_FIT_SECONDS,
+        })
+    return changes
+
+
+def environment():
+    """Describe the machine and analyzer dependencies for the results file"""
+    sys.path.insert(0, ANALYZER_DIR)
+    try:
+        import lizard
+        lizard_version = lizard.version
+    except ImportError:
+        lizard_version = None
+    finally:
+        sys.path.remove(ANALYZER_DIR)
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "lizard": lizard_version,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def run_benchmarks(analyzers, extensions, factors, files_per_case, repeat, corpus_dir):
+    """
+    Build the corpus and measure every applicable (analyzer, case) pair
+
+    Returns:
+        Results document with environment, per-case results and the scaling report
+    """
+    cases = corpus.build_corpus(corpus_dir, extensions=extensions, factors=factors,
+                                files_per_case=files_per_case)
+    results = []
+    for case in cases:
+        for analyzer in analyzers:
+            if not analyzer_applies(analyzer, case["extension"]):
+                continue
+            measurement = run_case(analyzer, case, repeat)
+            entry = {
+                "analyzer": analyzer,
+                "name": case["name"],
+                "extension": case["extension"],
+                "factor": case["factor"],
+                "files": len(case["files"]),
+                "bytes": case["bytes"],
+                "lines": case["lines"],
+                **measurement,
+            }
+            results.append(entry)
+            print(_format_entry(entry), file=sys.stderr, flush=True)
+
+    return {
+        "environment": environment(),
+        "settings": {"factors": list(factors), "filesPerCase": files_per_case, "repeat": repeat,
+                     "baseUnits": corpus.BASE_UNITS},
+        "results": results,
+        "scaling": scaling_report(results),
+    }
+
+
+def _format_entry(entry):
+    """One human-readable progress line"""
+    if "error" in entry:
+        return f"{entry['analyzer']:>9} {entry['name']:<14} x{entry['factor']:<3} ERROR {entry['error']}"
+    return (f"{entry['analyzer']:>9} {entry['name']:<14} x{entry['factor']:<3} "
+            f"{entry['seconds']:8.4f}s {entry['filesPerSecond']:9.1f} files/s "
+            f"{entry['mbPerSecond']:8.2f} MB/s  peak {entry['peakRssMb']} MB")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the CodeXR analyzers on a synthetic corpus")
+    parser.add_argument('--output', default='benchmark-results.json', help="Results file (JSON)")
+    parser.add_argument('--analyzers', default=','.join(ANALYZERS), help="Comma-separated analyzers")
+    parser.add_argument('--extensions', default=None, help="Comma-separated extensions (default: all)")
+    parser.add_argument('--quick', action='store_true', help="Small sizes and one file per case")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes per case; the fastest is kept")
+    parser.add_argument('--keep-corpus', metavar='DIR', default=None,
+                        help="Write the corpus to DIR and keep it (default: temporary directory)")
+    parser.add_argument('--compare', metavar='BASELINE', default=None,
+                        help="Compare this run against an earlier results file")
+    parser.add_argument('--diff', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help="Only compare two existing results files")
+    parser.add_argument('--measure', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('files', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Worker mode: measure one case and report it on stdout
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.files, max(1, args.repeat))))
+        return
+
+    if args.diff:
+        with open(args.diff[0], 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        with open(args.diff[1], 'r', encoding='utf-8') as file:
+            current = json.load(file)
+        changes = diff_results(baseline, current)
+        print(json.dumps({"changes": changes, "regressions": sum(1 for c in changes if c["regression"])}))
+        return
+
+    analyzers = [name.strip() for name in args.analyzers.split(',') if name.strip()]
+    unknown = [name for name in analyzers if name not in ANALYZERS]
+    if unknown:
+        print(json.dumps({"error": f"Unknown analyzers: {', '.join(unknown)}"}))
+        sys.exit(1)
+
+    extensions = None
+    if args.extensions:
+        extensions = [ext if ext.startswith('.') else f'.{ext}' for ext in args.extensions.split(',') if ext]
+        missing = [ext for ext in extensions if ext not in corpus.EXTENSION_TEMPLATES]
+        if missing:
+            print(json.dumps({"error": f"No corpus template for: {', '.join(missing)}"}))
+            sys.exit(1)
+
+    factors = (1, 2, 4) if args.quick else corpus.SIZE_FACTORS
+    files_per_case = 1 if args.quick else 3
+
+    corpus_dir = args.keep_corpus or tempfile.mkdtemp(prefix='codexr-bench-')
+    try:
+        document = run_benchmarks(analyzers, extensions, factors, files_per_case, args.repeat, corpus_dir)
+    finally:
+        if not args.keep_corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            document["comparison"] = diff_results(json.load(file), document)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2)
+
+    summary = {
+        "output": args.output,
+        "cases": len(document["results"]),
+        "errors": sum(1 for entry in document["results"] if "error" in entry),
+        "superLinear": [f"{s['analyzer']}:{s['name']}" for s in document["scaling"] if s["superLinear"]],
+    }
+    if "comparison" in document:
+        summary["regressions"] = [f"{c['analyzer']}:{c['name']}:x{c['factor']}"
+                                  for c in document["comparison"] if c["regression"]]
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Analyzer Bundle Builder
+
+Packs the analyzer scripts into a single zipapp with precompiled bytecode,
+so a one-shot invocation skips compiling the sources and runs fine in
+isolated mode:
+
+    python -I -S codexr-analyzers.pyz lizard <file_path> [options]
+
+The first argument picks the analyzer (see ENTRY_POINTS); the remaining
+arguments are passed to it unchanged. lizard (lizard, lizard_ext and
+lizard_languages) is bundled as well because -S hides site-packages; add
+--include pygments to also analyze Erlang files under -S. Bytecode is
+compiled for the interpreter running the build. Sources are stored next to
+it, so other Python versions still work, only without the start-up saving.
+
+Usage: python build_bundle.py [--output FILE] [--include PACKAGE ...] [--no-lizard]
+"""
+
+import sys
+import json
+import os
+import shutil
+import zipapp
+import argparse
+import tempfile
+import py_compile
+from importlib.machinery import PathFinder
+
+
+ANALYZER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_OUTPUT = os.path.join(ANALYZER_DIR, 'dist', 'codexr-analyzers.pyz')
+
+# Command name -> module whose main() it runs
+ENTRY_POINTS = {
+    'lizard': 'lizard_analyzer',
+    'comments': 'python_comment_analyzer',
+    'classes': 'class_counter_analyzer',
+    'dom': 'html_dom_parser',
+    'all': 'combined_analyzer',
+    'batch': 'batch_analyzer',
+    'server': 'analyzer_server',
+    'cache': 'result_cache',
+    'scan': 'directory_scanner',
+    'store': 'metrics_store',
+    'clones': 'clone_detector',
+}
+
+# Third-party packages the analyzers import
+LIZARD_PACKAGES = ('lizard', 'lizard_ext', 'lizard_languages')
+
+# Analyzer-directory scripts that are build tooling, not part of the bundle
+EXCLUDED_SCRIPTS = ('build_bundle.py',)
+
+MAIN_SOURCE = '''"""CodeXR analyzer bundle: python codexr-analyzers.pyz <command> [args...]"""
+
+import sys
+
+ENTRY_POINTS = {entry_points!r}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ENTRY_POINTS:
+        commands = ', '.join(sorted(ENTRY_POINTS))
+        sys.stderr.write(f"usage: {{sys.argv[0]}} <command> [args...]  (commands: {{commands}})\\n")
+        sys.exit(2)
+
+    module_name = ENTRY_POINTS[sys.argv[1]]
+    sys.argv = [f"{{module_name}}.py"] + sys.argv[2:]
+    __import__(module_name).main()
+
+
+if __name__ == "__main__":
+    main()
+'''
+
+
+def analyzer_scripts():
+    """
+    Analyzer modules shipped in the bundle
+
+    Returns:
+        Sorted list of script file names in the analyzer directory
+    """
+    return sorted(name for name in os.listdir(ANALYZER_DIR)
+                  if name.endswith('.py') and name not in EXCLUDED_SCRIPTS)
+
+
+def locate_package(name):
+    """
+    Find an installed top-level module or package without importing it
+
+    Args:
+        name: Module or package name
+
+    Returns:
+        Path of the package directory or module file, or None if not installed
+    """
+    spec = PathFinder.find_spec(name)
+    if spec is None:
+        return None
+    if spec.submodule_search_locations:
+        return list(spec.submodule_search_locations)[0]
+    return spec.origin
+
+
+def compile_tree(root):
+    """
+    Write a bytecode file next to every source file under root
+
+    The .pyc files use the legacy location (module.pyc beside module.py),
+    which is where zipimport looks for them, and unchecked hash-based
+    invalidation, so archive timestamps never force a recompile.
+
+    Args:
+        root: Staging directory
+
+    Returns:
+        Number of files compiled
+    """
+    compiled = 0
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if not name.endswith('.py'):
+                continue
+            source = os.path.join(directory, name)
+            py_compile.compile(source, cfile=source + 'c', dfile=os.path.relpath(source, root),
+                               doraise=True,
+                               invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+            compiled += 1
+    return compiled
+
+
+def _copy_package(path, staging):
+    """Copy an installed module or package into the staging directory"""
+    target = os.path.join(staging, os.path.basename(path))
+    if os.path.isdir(path):
+        shutil.copytree(path, target, ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
+    else:
+        shutil.copy2(path, target)
+
+
+def build_bundle(output, packages=LIZARD_PACKAGES):
+    """
+    Build the analyzer zipapp
+
+    Args:
+        output: Path of the .pyz file to write
+        packages: Installed third-party packages to bundle
+
+    Returns:
+        Dictionary describing the bundle
+    """
+    missing = []
+    with tempfile.TemporaryDirectory(prefix='codexr-bundle-') as staging:
+        for name in analyzer_scripts():
+            shutil.copy2(os.path.join(ANALYZER_DIR, name), os.path.join(staging, name))
+
+        bundled = []
+        for name in packages:
+            path = locate_package(name)
+            if path is None:
+                missing.append(name)
+                continue
+            _copy_package(path, staging)
+            bundled.append(name)
+
+        with open(os.path.join(staging, '__main__.py'), 'w', encoding='utf-8') as file:
+            file.write(MAIN_SOURCE.format(entry_points=ENTRY_POINTS))
+
+        compiled = compile_tree(staging)
+
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        # Stored, not deflated: the archive is read on every start
+        zipapp.create_archive(staging, output, interpreter='/usr/bin/env python3')
+
+    return {
+        "output": output,
+        "bytes": os.path.getsize(output),
+        "python": f"{sys.version_info[0]}.{sys.version_info[1]}",
+        "compiledFiles": compiled,
+        "packages": bundled,
+        "missingPackages": missing,
+        "commands": sorted(ENTRY_POINTS),
+        "status": "success" if not missing else "partial"
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Build the CodeXR analyzers as a precompiled zipapp")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Bundle path (default: dist/codexr-analyzers.pyz)")
+    parser.add_argument('--include', action='append', default=[], metavar='PACKAGE',
+                        help="Also bundle an installed package (repeatable), e.g. pygments")
+    parser.add_argument('--no-lizard', action='store_true',
+                        help="Do not bundle lizard; it must then be importable at run time")
+    args = parser.parse_args()
+
+    packages = () if args.no_lizard else LIZARD_PACKAGES
+    packages = tuple(packages) + tuple(args.include)
+
+    try:
+        result = build_bundle(args.output, packages)
+    except Exception as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,431 +5,325 @@ Class Counter Analyzer
 This script analyzes a file and counts the number of class declarations.
 It supports multiple programming languages with comprehensive pattern matching.
 
-Usage: python class_counter_analyzer.py <file_path>
+The per-language declaration patterns are compiled once per process, the
+first time a file of that language is analyzed, into a single alternation
+per language, so each file is scanned in one pass.
+
+With --stdin the content is read from standard input (an unsaved editor
+buffer) and file_path only selects the language.
+
+Usage: python class_counter_analyzer.py <file_path> [--stdin] [--codec NAME] [--profile] [--profile-dir DIR]
 """
 
 import sys
 import json
 import os
 import re
+from bisect import bisect_right
+
+from source_reader import read_source, read_stdin_source
+from profiling import timed, timer_from_args
+from output_codecs import codec_from_args, emit_result
+
+
+# Bump whenever the shape or meaning of the output changes (invalidates cached results)
+ANALYZER_VERSION = '2'
+
+# Declaration patterns per language, as (pattern, declaration type).
+# Every pattern is anchored at the start of a line (after indentation) and
+# captures the declared name in the group "name". When two patterns can match
+# the same line the more specific one must come first: only the first
+# alternative that matches is reported, so a declaration is never counted twice.
+LANGUAGE_PATTERNS = {
+    'python': [
+        (r'@dataclass\s*\n\s*class\s+(?P<name>\w+)', 'dataclass'),
+        (r'@dataclasses\.dataclass\s*\n\s*class\s+(?P<name>\w+)', 'dataclass'),
+        (r'class\s+(?P<name>\w+)', 'class'),
+    ],
+    'javascript': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'export\s+class\s+(?P<name>\w+)', 'exported_class'),
+        (r'export\s+default\s+class\s+(?P<name>\w+)', 'default_class'),
+        (r'abstract\s+class\s+(?P<name>\w+)', 'abstract_class'),
+        (r'interface\s+(?P<name>\w+)', 'interface'),
+        (r'export\s+interface\s+(?P<name>\w+)', 'exported_interface'),
+        (r'type\s+(?P<name>\w+)\s*=', 'type_alias'),
+        (r'export\s+type\s+(?P<name>\w+)\s*=', 'exported_type'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+        (r'export\s+enum\s+(?P<name>\w+)', 'exported_enum'),
+        (r'const\s+enum\s+(?P<name>\w+)', 'const_enum'),
+        (r'declare\s+class\s+(?P<name>\w+)', 'declare_class'),
+        (r'declare\s+interface\s+(?P<name>\w+)', 'declare_interface'),
+    ],
+    'java': [
+        (r'public\s+class\s+(?P<name>\w+)', 'public_class'),
+        (r'private\s+class\s+(?P<name>\w+)', 'private_class'),
+        (r'protected\s+class\s+(?P<name>\w+)', 'protected_class'),
+        (r'package\s+class\s+(?P<name>\w+)', 'package_class'),
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'public\s+interface\s+(?P<name>\w+)', 'public_interface'),
+        (r'private\s+interface\s+(?P<name>\w+)', 'private_interface'),
+        (r'protected\s+interface\s+(?P<name>\w+)', 'protected_interface'),
+        (r'interface\s+(?P<name>\w+)', 'interface'),
+        (r'public\s+enum\s+(?P<name>\w+)', 'public_enum'),
+        (r'private\s+enum\s+(?P<name>\w+)', 'private_enum'),
+        (r'protected\s+enum\s+(?P<name>\w+)', 'protected_enum'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+        (r'@interface\s+(?P<name>\w+)', 'annotation'),
+        (r'public\s+@interface\s+(?P<name>\w+)', 'public_annotation'),
+        (r'abstract\s+class\s+(?P<name>\w+)', 'abstract_class'),
+        (r'public\s+abstract\s+class\s+(?P<name>\w+)', 'public_abstract_class'),
+        (r'final\s+class\s+(?P<name>\w+)', 'final_class'),
+        (r'public\s+final\s+class\s+(?P<name>\w+)', 'public_final_class'),
+        (r'public\s+record\s+(?P<name>\w+)', 'public_record'),
+        (r'record\s+(?P<name>\w+)', 'record'),
+    ],
+    'scala': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'abstract\s+class\s+(?P<name>\w+)', 'abstract_class'),
+        (r'case\s+class\s+(?P<name>\w+)', 'case_class'),
+        (r'sealed\s+class\s+(?P<name>\w+)', 'sealed_class'),
+        (r'final\s+class\s+(?P<name>\w+)', 'final_class'),
+        (r'object\s+(?P<name>\w+)', 'object'),
+        (r'case\s+object\s+(?P<name>\w+)', 'case_object'),
+        (r'trait\s+(?P<name>\w+)', 'trait'),
+        (r'sealed\s+trait\s+(?P<name>\w+)', 'sealed_trait'),
+        (r'type\s+(?P<name>\w+)\s*=', 'type_alias'),
+        (r'implicit\s+class\s+(?P<name>\w+)', 'implicit_class'),
+        (r'implicit\s+object\s+(?P<name>\w+)', 'implicit_object'),
+    ],
+    'cpp': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'struct\s+(?P<name>\w+)', 'struct'),
+        (r'union\s+(?P<name>\w+)', 'union'),
+        (r'template\s*<.*>\s*class\s+(?P<name>\w+)', 'template_class'),
+        (r'template\s*<.*>\s*struct\s+(?P<name>\w+)', 'template_struct'),
+        (r'namespace\s+(?P<name>\w+)', 'namespace'),
+        (r'enum\s+class\s+(?P<name>\w+)', 'enum_class'),
+        (r'enum\s+struct\s+(?P<name>\w+)', 'enum_struct'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+        (r'typedef\s+(?:class|struct)\s+(?P<name>\w+)', 'typedef_class'),
+    ],
+    'csharp': [
+        (r'public\s+class\s+(?P<name>\w+)', 'public_class'),
+        (r'private\s+class\s+(?P<name>\w+)', 'private_class'),
+        (r'protected\s+class\s+(?P<name>\w+)', 'protected_class'),
+        (r'internal\s+class\s+(?P<name>\w+)', 'internal_class'),
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'public\s+interface\s+(?P<name>\w+)', 'public_interface'),
+        (r'private\s+interface\s+(?P<name>\w+)', 'private_interface'),
+        (r'protected\s+interface\s+(?P<name>\w+)', 'protected_interface'),
+        (r'internal\s+interface\s+(?P<name>\w+)', 'internal_interface'),
+        (r'interface\s+(?P<name>\w+)', 'interface'),
+        (r'public\s+struct\s+(?P<name>\w+)', 'public_struct'),
+        (r'private\s+struct\s+(?P<name>\w+)', 'private_struct'),
+        (r'protected\s+struct\s+(?P<name>\w+)', 'protected_struct'),
+        (r'internal\s+struct\s+(?P<name>\w+)', 'internal_struct'),
+        (r'struct\s+(?P<name>\w+)', 'struct'),
+        (r'public\s+enum\s+(?P<name>\w+)', 'public_enum'),
+        (r'private\s+enum\s+(?P<name>\w+)', 'private_enum'),
+        (r'protected\s+enum\s+(?P<name>\w+)', 'protected_enum'),
+        (r'internal\s+enum\s+(?P<name>\w+)', 'internal_enum'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+        (r'public\s+delegate\s+\w+\s+(?P<name>\w+)', 'public_delegate'),
+        (r'delegate\s+\w+\s+(?P<name>\w+)', 'delegate'),
+        (r'public\s+record\s+(?P<name>\w+)', 'public_record'),
+        (r'record\s+(?P<name>\w+)', 'record'),
+        (r'abstract\s+class\s+(?P<name>\w+)', 'abstract_class'),
+        (r'sealed\s+class\s+(?P<name>\w+)', 'sealed_class'),
+        (r'static\s+class\s+(?P<name>\w+)', 'static_class'),
+    ],
+    'ruby': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'module\s+(?P<name>\w+)', 'module'),
+        (r'class\s+<<\s*(?P<name>\w+)', 'singleton_class'),
+    ],
+    'php': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'abstract\s+class\s+(?P<name>\w+)', 'abstract_class'),
+        (r'final\s+class\s+(?P<name>\w+)', 'final_class'),
+        (r'interface\s+(?P<name>\w+)', 'interface'),
+        (r'trait\s+(?P<name>\w+)', 'trait'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+    ],
+    'swift': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'struct\s+(?P<name>\w+)', 'struct'),
+        (r'protocol\s+(?P<name>\w+)', 'protocol'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+        (r'actor\s+(?P<name>\w+)', 'actor'),
+        (r'extension\s+(?P<name>\w+)', 'extension'),
+        (r'public\s+class\s+(?P<name>\w+)', 'public_class'),
+        (r'private\s+class\s+(?P<name>\w+)', 'private_class'),
+        (r'internal\s+class\s+(?P<name>\w+)', 'internal_class'),
+        (r'open\s+class\s+(?P<name>\w+)', 'open_class'),
+        (r'final\s+class\s+(?P<name>\w+)', 'final_class'),
+    ],
+    'go': [
+        (r'type\s+(?P<name>\w+)\s+struct', 'struct'),
+        (r'type\s+(?P<name>\w+)\s+interface', 'interface'),
+        (r'type\s+(?P<name>\w+)\s+\w+', 'type_alias'),
+    ],
+    'rust': [
+        (r'struct\s+(?P<name>\w+)', 'struct'),
+        (r'enum\s+(?P<name>\w+)', 'enum'),
+        (r'trait\s+(?P<name>\w+)', 'trait'),
+        (r'impl\s+\w+\s+for\s+(?P<name>\w+)', 'impl_for'),
+        (r'impl\s+(?P<name>\w+)', 'impl'),
+        (r'type\s+(?P<name>\w+)\s*=', 'type_alias'),
+        (r'union\s+(?P<name>\w+)', 'union'),
+        (r'pub\s+struct\s+(?P<name>\w+)', 'pub_struct'),
+        (r'pub\s+enum\s+(?P<name>\w+)', 'pub_enum'),
+        (r'pub\s+trait\s+(?P<name>\w+)', 'pub_trait'),
+    ],
+    'kotlin': [
+        (r'class\s+(?P<name>\w+)', 'class'),
+        (r'data\s+class\s+(?P<name>\w+)', 'data_class'),
+        (r'sealed\s+class\s+(?P<name>\w+)', 'sealed_class'),
+        (r'abstract\s+class\s+(?P<name>\w+)', 'abstract_class'),
+        (r'open\s+class\s+(?P<name>\w+)', 'open_class'),
+        (r'final\s+class\s+(?P<name>\w+)', 'final_class'),
+        (r'interface\s+(?P<name>\w+)', 'interface'),
+        (r'object\s+(?P<name>\w+)', 'object'),
+        (r'enum\s+class\s+(?P<name>\w+)', 'enum_class'),
+        (r'annotation\s+class\s+(?P<name>\w+)', 'annotation_class'),
+        (r'inline\s+class\s+(?P<name>\w+)', 'inline_class'),
+        (r'value\s+class\s+(?P<name>\w+)', 'value_class'),
+    ],
+    'objc': [
+        (r'@interface\s+(?P<name>\w+)\s*\(\w+\)', 'category'),
+        (r'@interface\s+(?P<name>\w+)', 'interface'),
+        (r'@implementation\s+(?P<name>\w+)', 'implementation'),
+        (r'@protocol\s+(?P<name>\w+)', 'protocol'),
+    ],
+    'lua': [
+        (r'local\s+(?P<name>\w+)\s*=\s*\{\}', 'table_class'),
+        (r'(?P<name>\w+)\s*=\s*\{\}', 'global_table'),
+        (r'function\s+(?P<name>\w+):new', 'class_constructor'),
+        (r'local\s+(?P<name>\w+)\s*=\s*class\(', 'class_declaration'),
+    ],
+    'erlang': [
+        (r'-module\s*\(\s*(?P<name>\w+)', 'module'),
+        (r'-record\s*\(\s*(?P<name>\w+)', 'record'),
+        (r'-behaviour\s*\(\s*(?P<name>\w+)', 'behaviour'),
+        (r'-behavior\s*\(\s*(?P<name>\w+)', 'behavior'),
+    ],
+    'perl': [
+        (r'package\s+(?P<name>\w+(?:::\w+)*)', 'package'),
+        (r'use\s+Moose;(?s:.*?)package\s+(?P<name>\w+)', 'moose_class'),
+        (r'use\s+Mouse;(?s:.*?)package\s+(?P<name>\w+)', 'mouse_class'),
+    ],
+}
+
+EXTENSION_LANGUAGES = {
+    '.py': 'python',
+    '.js': 'javascript', '.ts': 'javascript', '.jsx': 'javascript', '.tsx': 'javascript',
+    '.java': 'java',
+    '.scala': 'scala', '.sc': 'scala',
+    '.cpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp', '.h': 'cpp', '.hpp': 'cpp',
+    '.cs': 'csharp',
+    '.rb': 'ruby',
+    '.php': 'php', '.phtml': 'php', '.php3': 'php', '.php4': 'php', '.php5': 'php', '.phps': 'php',
+    '.swift': 'swift',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.kt': 'kotlin', '.kts': 'kotlin',
+    '.m': 'objc', '.mm': 'objc',
+    '.lua': 'lua',
+    '.erl': 'erlang', '.hrl': 'erlang',
+    '.pl': 'perl', '.pm': 'perl', '.pod': 'perl', '.t': 'perl',
+}
+
+# Indentation at the start of a line; unlike \s it never crosses a newline,
+# so a match always starts on the line that holds the declaration
+_LINE_START = r'^[^\S\n]*'
+
+_NEWLINE_PATTERN = re.compile(r'\n')
+
+
+def compile_language_patterns(patterns):
+    """
+    Combine a language's declaration patterns into one regex
+
+    Args:
+        patterns: List of (pattern, declaration type) tuples
+
+    Returns:
+        Tuple of (compiled regex, {alternative group: (name group, declaration type)})
+    """
+    alternatives = []
+    groups = {}
+    for index, (pattern, class_type) in enumerate(patterns):
+        name_group = f'n{index}'
+        body = pattern.replace('(?P<name>', f'(?P<{name_group}>')
+        alternatives.append(f'(?P<d{index}>{body})')
+        groups[f'd{index}'] = (name_group, class_type)
+    # The line anchor is factored out so non-line-start positions fail after a single check
+    combined = f"{_LINE_START}(?:{'|'.join(alternatives)})"
+    return re.compile(combined, re.MULTILINE), groups
+
+
+# Filled on first use so start-up does not pay for every language's regex
+_COMPILED_PATTERNS = {}
+
+
+def get_language_patterns(language):
+    """Compiled (regex, group info) for a language, compiling it on first use"""
+    compiled = _COMPILED_PATTERNS.get(language)
+    if compiled is None:
+        compiled = compile_language_patterns(LANGUAGE_PATTERNS[language])
+        _COMPILED_PATTERNS[language] = compiled
+    return compiled
 
 
-def analyze_classes(file_path):
-    """Analyze a file to count class declarations."""
+def find_declarations(language, content):
+    """
+    Find class-like declarations with a single scan of the content
+
+    Args:
+        language: Key of LANGUAGE_PATTERNS
+        content: Decoded file content
+
+    Returns:
+        List of {'name', 'type', 'line'} dictionaries in file order
+    """
+    regex, group_info = get_language_patterns(language)
+    newline_offsets = None
+    class_details = []
+
+    for match in regex.finditer(content):
+        if newline_offsets is None:
+            newline_offsets = [m.start() for m in _NEWLINE_PATTERN.finditer(content)]
+        name_group, class_type = group_info[match.lastgroup]
+        class_details.append({
+            'name': match.group(name_group) or 'Unknown',
+            'type': class_type,
+            'line': bisect_right(newline_offsets, match.start()) + 1
+        })
+
+    return class_details
+
+
+def analyze_classes(file_path, timer=None, stdin=False):
+    """
+    Analyze a file to count class declarations (timer: optional PhaseTimer;
+    stdin: read the content from standard input instead of the file).
+    """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+        content = read_stdin_source(timer) if stdin else read_source(file_path, timer)
     except Exception as e:
         return {"error": f"Error reading file: {str(e)}"}
 
+    with timed(timer, 'scan'):
+        return analyze_class_content(file_path, content)
+
+
+def analyze_class_content(file_path, content):
+    """Count class declarations in already-decoded source code."""
     _, ext = os.path.splitext(file_path.lower())
-    class_count = 0
-    class_details = []
+    language = EXTENSION_LANGUAGES.get(ext)
 
-    if ext == '.py':
-        # Python classes (handle dataclasses separately to avoid double counting)
-        
-        # First, find all dataclass decorators and the class names they apply to
-        dataclass_classes = set()
-        dataclass_patterns = [
-            r'^\s*@dataclass\s*\n\s*class\s+(\w+)',
-            r'^\s*@dataclasses\.dataclass\s*\n\s*class\s+(\w+)'
-        ]
-        
-        for pattern in dataclass_patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                dataclass_classes.add(class_name)
-                class_details.append({
-                    'name': class_name,
-                    'type': 'dataclass',
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        
-        # Then find regular classes, but exclude dataclasses
-        regular_class_pattern = r'^\s*class\s+(\w+)'
-        matches = re.finditer(regular_class_pattern, content, re.MULTILINE)
-        for match in matches:
-            class_name = match.group(1) if match.groups() else 'Unknown'
-            if class_name not in dataclass_classes:  # Don't double-count dataclasses
-                class_details.append({
-                    'name': class_name,
-                    'type': 'class',
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        
-        class_count = len(class_details)
-    
-    elif ext in ['.js', '.ts', '.jsx', '.tsx']:
-        # JavaScript/TypeScript classes, interfaces, types
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*export\s+class\s+(\w+)', 'exported_class'),
-            (r'^\s*export\s+default\s+class\s+(\w+)', 'default_class'),
-            (r'^\s*abstract\s+class\s+(\w+)', 'abstract_class'),
-            (r'^\s*interface\s+(\w+)', 'interface'),
-            (r'^\s*export\s+interface\s+(\w+)', 'exported_interface'),
-            (r'^\s*type\s+(\w+)\s*=', 'type_alias'),
-            (r'^\s*export\s+type\s+(\w+)\s*=', 'exported_type'),
-            (r'^\s*enum\s+(\w+)', 'enum'),
-            (r'^\s*export\s+enum\s+(\w+)', 'exported_enum'),
-            (r'^\s*const\s+enum\s+(\w+)', 'const_enum'),
-            (r'^\s*declare\s+class\s+(\w+)', 'declare_class'),
-            (r'^\s*declare\s+interface\s+(\w+)', 'declare_interface')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-    
-    elif ext in ['.java']:
-        # Java classes, interfaces, enums, annotations, records
-        patterns = [
-            (r'^\s*public\s+class\s+(\w+)', 'public_class'),
-            (r'^\s*private\s+class\s+(\w+)', 'private_class'),
-            (r'^\s*protected\s+class\s+(\w+)', 'protected_class'),
-            (r'^\s*package\s+class\s+(\w+)', 'package_class'),
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*public\s+interface\s+(\w+)', 'public_interface'),
-            (r'^\s*private\s+interface\s+(\w+)', 'private_interface'),
-            (r'^\s*protected\s+interface\s+(\w+)', 'protected_interface'),
-            (r'^\s*interface\s+(\w+)', 'interface'),
-            (r'^\s*public\s+enum\s+(\w+)', 'public_enum'),
-            (r'^\s*private\s+enum\s+(\w+)', 'private_enum'),
-            (r'^\s*protected\s+enum\s+(\w+)', 'protected_enum'),
-            (r'^\s*enum\s+(\w+)', 'enum'),
-            (r'^\s*@interface\s+(\w+)', 'annotation'),
-            (r'^\s*public\s+@interface\s+(\w+)', 'public_annotation'),
-            (r'^\s*abstract\s+class\s+(\w+)', 'abstract_class'),
-            (r'^\s*public\s+abstract\s+class\s+(\w+)', 'public_abstract_class'),
-            (r'^\s*final\s+class\s+(\w+)', 'final_class'),
-            (r'^\s*public\s+final\s+class\s+(\w+)', 'public_final_class'),
-            (r'^\s*public\s+record\s+(\w+)', 'public_record'),
-            (r'^\s*record\s+(\w+)', 'record')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-    
-    elif ext in ['.scala', '.sc']:
-        # Scala classes, objects, traits, case classes
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*abstract\s+class\s+(\w+)', 'abstract_class'),
-            (r'^\s*case\s+class\s+(\w+)', 'case_class'),
-            (r'^\s*sealed\s+class\s+(\w+)', 'sealed_class'),
-            (r'^\s*final\s+class\s+(\w+)', 'final_class'),
-            (r'^\s*object\s+(\w+)', 'object'),
-            (r'^\s*case\s+object\s+(\w+)', 'case_object'),
-            (r'^\s*trait\s+(\w+)', 'trait'),
-            (r'^\s*sealed\s+trait\s+(\w+)', 'sealed_trait'),
-            (r'^\s*type\s+(\w+)\s*=', 'type_alias'),
-            (r'^\s*implicit\s+class\s+(\w+)', 'implicit_class'),
-            (r'^\s*implicit\s+object\s+(\w+)', 'implicit_object')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-    
-    elif ext in ['.cpp', '.cc', '.cxx', '.h', '.hpp']:
-        # C++ classes, structs, unions, templates
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*struct\s+(\w+)', 'struct'),
-            (r'^\s*union\s+(\w+)', 'union'),
-            (r'^\s*template\s*<.*>\s*class\s+(\w+)', 'template_class'),
-            (r'^\s*template\s*<.*>\s*struct\s+(\w+)', 'template_struct'),
-            (r'^\s*namespace\s+(\w+)', 'namespace'),
-            (r'^\s*enum\s+class\s+(\w+)', 'enum_class'),
-            (r'^\s*enum\s+struct\s+(\w+)', 'enum_struct'),
-            (r'^\s*enum\s+(\w+)', 'enum'),
-            (r'^\s*typedef\s+(?:class|struct)\s+(\w+)', 'typedef_class')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-    
-    elif ext == '.cs':
-        # C# classes, interfaces, structs, enums, delegates, records
-        patterns = [
-            (r'^\s*public\s+class\s+(\w+)', 'public_class'),
-            (r'^\s*private\s+class\s+(\w+)', 'private_class'),
-            (r'^\s*protected\s+class\s+(\w+)', 'protected_class'),
-            (r'^\s*internal\s+class\s+(\w+)', 'internal_class'),
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*public\s+interface\s+(\w+)', 'public_interface'),
-            (r'^\s*private\s+interface\s+(\w+)', 'private_interface'),
-            (r'^\s*protected\s+interface\s+(\w+)', 'protected_interface'),
-            (r'^\s*internal\s+interface\s+(\w+)', 'internal_interface'),
-            (r'^\s*interface\s+(\w+)', 'interface'),
-            (r'^\s*public\s+struct\s+(\w+)', 'public_struct'),
-            (r'^\s*private\s+struct\s+(\w+)', 'private_struct'),
-            (r'^\s*protected\s+struct\s+(\w+)', 'protected_struct'),
-            (r'^\s*internal\s+struct\s+(\w+)', 'internal_struct'),
-            (r'^\s*struct\s+(\w+)', 'struct'),
-            (r'^\s*public\s+enum\s+(\w+)', 'public_enum'),
-            (r'^\s*private\s+enum\s+(\w+)', 'private_enum'),
-            (r'^\s*protected\s+enum\s+(\w+)', 'protected_enum'),
-            (r'^\s*internal\s+enum\s+(\w+)', 'internal_enum'),
-            (r'^\s*enum\s+(\w+)', 'enum'),
-            (r'^\s*public\s+delegate\s+\w+\s+(\w+)', 'public_delegate'),
-            (r'^\s*delegate\s+\w+\s+(\w+)', 'delegate'),
-            (r'^\s*public\s+record\s+(\w+)', 'public_record'),
-            (r'^\s*record\s+(\w+)', 'record'),
-            (r'^\s*abstract\s+class\s+(\w+)', 'abstract_class'),
-            (r'^\s*sealed\s+class\s+(\w+)', 'sealed_class'),
-            (r'^\s*static\s+class\s+(\w+)', 'static_class')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.rb']:
-        # Ruby classes, modules
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*module\s+(\w+)', 'module'),
-            (r'^\s*class\s+<<\s*(\w+)', 'singleton_class')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.php', '.phtml', '.php3', '.php4', '.php5', '.phps']:
-        # PHP classes, interfaces, traits
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*abstract\s+class\s+(\w+)', 'abstract_class'),
-            (r'^\s*final\s+class\s+(\w+)', 'final_class'),
-            (r'^\s*interface\s+(\w+)', 'interface'),
-            (r'^\s*trait\s+(\w+)', 'trait'),
-            (r'^\s*enum\s+(\w+)', 'enum')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.swift']:
-        # Swift classes, structs, protocols, enums
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*struct\s+(\w+)', 'struct'),
-            (r'^\s*protocol\s+(\w+)', 'protocol'),
-            (r'^\s*enum\s+(\w+)', 'enum'),
-            (r'^\s*actor\s+(\w+)', 'actor'),
-            (r'^\s*extension\s+(\w+)', 'extension'),
-            (r'^\s*public\s+class\s+(\w+)', 'public_class'),
-            (r'^\s*private\s+class\s+(\w+)', 'private_class'),
-            (r'^\s*internal\s+class\s+(\w+)', 'internal_class'),
-            (r'^\s*open\s+class\s+(\w+)', 'open_class'),
-            (r'^\s*final\s+class\s+(\w+)', 'final_class')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.go']:
-        # Go structs, interfaces, types
-        patterns = [
-            (r'^\s*type\s+(\w+)\s+struct', 'struct'),
-            (r'^\s*type\s+(\w+)\s+interface', 'interface'),
-            (r'^\s*type\s+(\w+)\s+\w+', 'type_alias')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.rs']:
-        # Rust structs, enums, traits, impl blocks
-        patterns = [
-            (r'^\s*struct\s+(\w+)', 'struct'),
-            (r'^\s*enum\s+(\w+)', 'enum'),
-            (r'^\s*trait\s+(\w+)', 'trait'),
-            (r'^\s*impl\s+(\w+)', 'impl'),
-            (r'^\s*impl\s+\w+\s+for\s+(\w+)', 'impl_for'),
-            (r'^\s*type\s+(\w+)\s*=', 'type_alias'),
-            (r'^\s*union\s+(\w+)', 'union'),
-            (r'^\s*pub\s+struct\s+(\w+)', 'pub_struct'),
-            (r'^\s*pub\s+enum\s+(\w+)', 'pub_enum'),
-            (r'^\s*pub\s+trait\s+(\w+)', 'pub_trait')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.kt', '.kts']:
-        # Kotlin classes, interfaces, objects, data classes
-        patterns = [
-            (r'^\s*class\s+(\w+)', 'class'),
-            (r'^\s*data\s+class\s+(\w+)', 'data_class'),
-            (r'^\s*sealed\s+class\s+(\w+)', 'sealed_class'),
-            (r'^\s*abstract\s+class\s+(\w+)', 'abstract_class'),
-            (r'^\s*open\s+class\s+(\w+)', 'open_class'),
-            (r'^\s*final\s+class\s+(\w+)', 'final_class'),
-            (r'^\s*interface\s+(\w+)', 'interface'),
-            (r'^\s*object\s+(\w+)', 'object'),
-            (r'^\s*enum\s+class\s+(\w+)', 'enum_class'),
-            (r'^\s*annotation\s+class\s+(\w+)', 'annotation_class'),
-            (r'^\s*inline\s+class\s+(\w+)', 'inline_class'),
-            (r'^\s*value\s+class\s+(\w+)', 'value_class')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.m', '.mm']:
-        # Objective-C classes, protocols, categories
-        patterns = [
-            (r'^\s*@interface\s+(\w+)', 'interface'),
-            (r'^\s*@implementation\s+(\w+)', 'implementation'),
-            (r'^\s*@protocol\s+(\w+)', 'protocol'),
-            (r'^\s*@interface\s+(\w+)\s*\((\w+)\)', 'category')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.lua']:
-        # Lua "classes" (tables with metatables, modules)
-        patterns = [
-            (r'^\s*local\s+(\w+)\s*=\s*\{\}', 'table_class'),
-            (r'^\s*(\w+)\s*=\s*\{\}', 'global_table'),
-            (r'^\s*function\s+(\w+):new', 'class_constructor'),
-            (r'^\s*local\s+(\w+)\s*=\s*class\(', 'class_declaration')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.erl', '.hrl']:
-        # Erlang modules, records
-        patterns = [
-            (r'^\s*-module\s*\(\s*(\w+)', 'module'),
-            (r'^\s*-record\s*\(\s*(\w+)', 'record'),
-            (r'^\s*-behaviour\s*\(\s*(\w+)', 'behaviour'),
-            (r'^\s*-behavior\s*\(\s*(\w+)', 'behavior')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    elif ext in ['.pl', '.pm', '.pod', '.t']:
-        # Perl packages, modules
-        patterns = [
-            (r'^\s*package\s+(\w+(?:::\w+)*)', 'package'),
-            (r'^\s*use\s+Moose;.*?package\s+(\w+)', 'moose_class'),
-            (r'^\s*use\s+Mouse;.*?package\s+(\w+)', 'mouse_class')
-        ]
-        for pattern, class_type in patterns:
-            matches = re.finditer(pattern, content, re.MULTILINE | re.DOTALL)
-            for match in matches:
-                class_name = match.group(1) if match.groups() else 'Unknown'
-                class_details.append({
-                    'name': class_name,
-                    'type': class_type,
-                    'line': content[:match.start()].count('\n') + 1
-                })
-        class_count = len(class_details)
-        
-    else:
+    if language is None:
         # Unsupported file type
         return {
             "file": file_path,
@@ -438,9 +332,11 @@ def analyze_classes(file_path):
             "warning": f"Unsupported file extension: {ext}"
         }
 
+    class_details = find_declarations(language, content)
+
     return {
         "file": file_path,
-        "classCount": class_count,
+        "classCount": len(class_details),
         "classes": class_details
     }
 
@@ -450,13 +346,25 @@ def main():
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No file path provided"}))
         sys.exit(1)
-    
+
     file_path = sys.argv[1]
-    result = analyze_classes(file_path)
-    
-    # Output as JSON
-    print(json.dumps(result))
+    stdin = '--stdin' in sys.argv[2:]
+    try:
+        codec = codec_from_args(sys.argv[2:])
+    except ValueError as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+    timer = timer_from_args(sys.argv[2:])
+    if timer is not None:
+        # --profile / --profile-dir: add per-phase timings to the output
+        emit_result(timer.run(file_path, analyze_classes, file_path, timer, stdin), codec, timer)
+        return
+
+    result = analyze_classes(file_path, stdin=stdin)
+
+    # Output as JSON (or one --codec frame, see output_codecs.py)
+    emit_result(result, codec)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
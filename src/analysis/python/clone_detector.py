@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Clone Detector
+
+Finds copy-pasted functions across a code base without comparing every
+pair of functions.
+
+Every function lizard finds (see lizard_analyzer.py) is reduced to a small
+set of fingerprints: its body is tokenized with lizard's reader for the
+language, comments and whitespace are dropped, identifiers, numbers and
+strings are normalized to one token each (so renamed copies still match),
+every K_GRAM consecutive tokens are hashed and the minimum hash of every
+WINDOW consecutive k-grams is kept (winnowing). Any run of at least
+K_GRAM + WINDOW - 1 tokens shared by two functions is guaranteed to yield
+a shared fingerprint.
+
+The fingerprints go into a persistent inverted index (CloneIndex, SQLite)
+mapping each fingerprint to the functions containing it. A file is only
+re-indexed when its contents change. Clone clusters are read back by
+grouping the index by fingerprint: only functions that share fingerprints
+are ever compared, and fingerprints shared by more than MAX_POSTINGS
+functions (boilerplate) are ignored.
+
+Usage: python clone_detector.py <file_path> [--stdin]
+       python clone_detector.py clusters <index_dir> [--min-similarity X] [--limit N]
+"""
+
+import sys
+import json
+import os
+import hashlib
+import argparse
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from zlib import crc32
+
+try:
+    import sqlite3
+except ImportError:  # Some embedded Python builds ship without sqlite3
+    sqlite3 = None
+
+from lizard_loader import load_lizard
+from source_reader import read_source, read_stdin_source
+from result_cache import BUSY_TIMEOUT_MS
+
+
+lizard = load_lizard()
+
+
+# Bump whenever the shape or meaning of the output changes (invalidates cached results)
+ANALYZER_VERSION = '1'
+
+INDEX_FILE_NAME = 'clone-index.sqlite3'
+
+# Tokens per hashed k-gram and k-grams per winnowing window: shared runs of
+# K_GRAM + WINDOW - 1 normalized tokens are always detected
+K_GRAM = 10
+WINDOW = 5
+
+# Functions with fewer normalized tokens are not indexed (getters, one-liners)
+MIN_TOKENS = 40
+
+# Fingerprints shared by more functions than this are boilerplate, not clones
+MAX_POSTINGS = 64
+
+# Jaccard similarity of two functions' fingerprint sets to count as clones
+MIN_SIMILARITY = 0.5
+
+# k-gram hashes are polynomial hashes modulo the largest prime below 2**53,
+# so fingerprints stay exact as JavaScript numbers
+HASH_MODULUS = (1 << 53) - 111
+HASH_BASE = 1000003
+
+# Words kept as themselves; every other identifier becomes IDENTIFIER
+KEYWORDS = frozenset({
+    'if', 'else', 'elif', 'for', 'foreach', 'while', 'do', 'switch', 'case', 'default', 'match',
+    'break', 'continue', 'return', 'yield', 'goto', 'try', 'catch', 'except', 'finally', 'throw',
+    'raise', 'with', 'new', 'delete', 'class', 'struct', 'enum', 'interface', 'def', 'fn', 'func',
+    'function', 'lambda', 'let', 'var', 'const', 'static', 'public', 'private', 'protected',
+    'async', 'await', 'in', 'not', 'and', 'or', 'is', 'this', 'self', 'super', 'null', 'nil',
+    'None', 'true', 'false', 'True', 'False', 'void', 'int', 'bool', 'float', 'double', 'char',
+    'string', 'import', 'from', 'as', 'assert', 'pass', 'end', 'then', 'begin',
+})
+IDENTIFIER = '\0identifier'
+NUMBER = '\0number'
+STRING = '\0string'
+
+
+@lru_cache(maxsize=4096)
+def _token_id(kind):
+    return crc32(kind.encode('utf-8'))
+
+
+def normalized_tokens(file_path, source):
+    """
+    Tokenize source with lizard's reader for the file's language
+
+    Args:
+        file_path: Path of the file (selects the reader)
+        source: Decoded file content
+
+    Returns:
+        Tuple of (token ids, line number of every token), comments and
+        whitespace dropped, identifiers, numbers and strings normalized
+    """
+    reader_class = lizard.get_reader_for(file_path) or lizard.CLikeReader
+    reader = reader_class(lizard.FileInfoBuilder(file_path))
+    comment_of = reader.get_comment_from_token
+    ids = []
+    lines = []
+    line = 1
+    for token in reader.generate_tokens(source):
+        if not token:
+            continue
+        first = token[0]
+        if not first.isspace() and comment_of(token) is None:
+            if first.isalpha() or first in '_$':
+                kind = token if token in KEYWORDS else IDENTIFIER
+            elif first.isdigit():
+                kind = NUMBER
+            elif first in '"\'`':
+                kind = STRING
+            else:
+                kind = token
+            ids.append(_token_id(kind))
+            lines.append(line)
+        line += token.count('\n')
+    return ids, lines
+
+
+def kgram_hashes(ids, k=K_GRAM):
+    """Rolling hash of every k consecutive token ids (position i covers ids[i:i + k])"""
+    if len(ids) < k:
+        return []
+    high = pow(HASH_BASE, k - 1, HASH_MODULUS)
+    value = 0
+    for token in ids[:k]:
+        value = (value * HASH_BASE + token) % HASH_MODULUS
+    hashes = [value]
+    for index in range(k, len(ids)):
+        value = ((value - ids[index - k] * high) * HASH_BASE + ids[index]) % HASH_MODULUS
+        hashes.append(value)
+    return hashes
+
+
+def winnow(hashes, window=WINDOW):
+    """
+    Select the fingerprints of a run of k-gram hashes
+
+    Returns:
+        Sorted list of the distinct minimum hashes of every window
+    """
+    if not hashes:
+        return []
+    if len(hashes) <= window:
+        return [min(hashes)]
+    return sorted({min(hashes[start:start + window]) for start in range(len(hashes) - window + 1)})
+
+
+def fingerprint_functions(file_path, source, functions):
+    """
+    Fingerprint the functions of a file
+
+    Args:
+        file_path: Path of the file (selects the tokenizer)
+        source: Decoded file content
+        functions: Function entries from lizard_analyzer (name, lineStart, lineEnd)
+
+    Returns:
+        List of {"name", "lineStart", "lineEnd", "tokenCount", "fingerprints"}
+        for every function with at least MIN_TOKENS tokens
+    """
+    if not functions:
+        return []
+    ids, lines = normalized_tokens(file_path, source)
+    hashes = kgram_hashes(ids)
+    entries = []
+    for func in functions:
+        first = bisect_left(lines, func["lineStart"])
+        last = bisect_right(lines, func["lineEnd"])
+        if last - first < MIN_TOKENS:
+            continue
+        entries.append({
+            "name": func["name"],
+            "lineStart": func["lineStart"],
+            "lineEnd": func["lineEnd"],
+            "tokenCount": last - first,
+            # k-grams starting in the function and ending before its last token
+            "fingerprints": winnow(hashes[first:last - K_GRAM + 1])
+        })
+    return entries
+
+
+def analyze_clone_content(file_path, text, functions=None):
+    """
+    Fingerprint already-decoded source
+
+    Args:
+        file_path: Path of the file (used for language detection)
+        text: Decoded file content
+        functions: lizard function entries for text, when lizard already ran;
+            otherwise lizard is run here
+
+    Returns:
+        Dictionary with "sourceHash" (SHA-256 of the text) and the
+        fingerprinted "functions"
+    """
+    if functions is None:
+        from lizard_analyzer import analyze_source
+        lizard_result = analyze_source(file_path, text)
+        if lizard_result.get("status") != "success":
+            return lizard_result
+        functions = lizard_result["functions"]
+
+    return {
+        "sourceHash": hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        "functions": fingerprint_functions(file_path, text, functions),
+        "status": "success"
+    }
+
+
+def analyze_file(file_path, timer=None, stdin=False):
+    """
+    Fingerprint the functions of one file
+
+    Args:
+        file_path: Path to the file to analyze
+        timer: Optional PhaseTimer recording read, decode and parse times
+        stdin: Read the content from standard input instead of the file
+
+    Returns:
+        Dictionary with analysis results
+    """
+    if not stdin and not os.path.exists(file_path):
+        return {"error": f"File not found: {file_path}", "status": "error"}
+    try:
+        text = read_stdin_source(timer) if stdin else read_source(file_path, timer)
+        return analyze_clone_content(file_path, text)
+    except Exception as e:
+        return {"error": str(e), "status": "error"}
+
+
+class CloneIndex:
+    """
+    Persistent inverted index fingerprint -> functions
+
+    Files are keyed by path and replaced as a whole when their source hash
+    changes. Each function keeps its own fingerprints (as a blob) so its
+    postings can be deleted through the primary key.
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.path = os.path.join(index_dir, INDEX_FILE_NAME)
+        self._connection = None
+
+    @property
+    def available(self):
+        """Whether the index can be used in this interpreter"""
+        return sqlite3 is not None
+
+    def _connect(self):
+        """Open (and initialise) the database on first use"""
+        if self._connection is None:
+            if not self.available:
+                raise RuntimeError("The clone index needs the sqlite3 module")
+            os.makedirs(self.index_dir, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            connection.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, source_hash TEXT NOT NULL)'
+            )
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS functions ('
+                ' id INTEGER PRIMARY KEY,'
+                ' path TEXT NOT NULL,'
+                ' name TEXT NOT NULL,'
+                ' line_start INTEGER NOT NULL,'
+                ' line_end INTEGER NOT NULL,'
+                ' token_count INTEGER NOT NULL,'
+                ' fingerprint_count INTEGER NOT NULL,'
+                ' fingerprints BLOB NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS functions_path ON functions (path)')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS fingerprints ('
+                ' hash INTEGER NOT NULL,'
+                ' function_id INTEGER NOT NULL,'
+                ' PRIMARY KEY (hash, function_id)) WITHOUT ROWID'
+            )
+            self._connection = connection
+        return self._connection
+
+    def source_hashes(self):
+        """
+        Indexed files
+
+        Returns:
+            Dictionary path -> source hash
+        """
+        return dict(self._connect().execute('SELECT path, source_hash FROM files'))
+
+    def _delete_file(self, connection, path):
+        for function_id, blob in connection.execute(
+                'SELECT id, fingerprints FROM functions WHERE path = ?', (path,)).fetchall():
+            connection.executemany('DELETE FROM fingerprints WHERE hash = ? AND function_id = ?',
+                                   ((value, function_id) for value in array('q', blob)))
+        connection.execute('DELETE FROM functions WHERE path = ?', (path,))
+        connection.execute('DELETE FROM files WHERE path = ?', (path,))
+
+    def update(self, files):
+        """
+        Replace the entries of changed files
+
+        Args:
+            files: Iterable of (path, source hash, fingerprinted functions as
+                returned by fingerprint_functions)
+
+        Returns:
+            Number of files (re-)indexed
+        """
+        connection = self._connect()
+        updated = 0
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for path, source_hash, functions in files:
+                row = connection.execute('SELECT source_hash FROM files WHERE path = ?', (path,)).fetchone()
+                if row is not None and row[0] == source_hash:
+                    continue
+                self._delete_file(connection, path)
+                for func in functions:
+                    fingerprints = array('q', func["fingerprints"])
+                    function_id = connection.execute(
+                        'INSERT INTO functions (path, name, line_start, line_end, token_count,'
+                        ' fingerprint_count, fingerprints) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (path, func["name"], func["lineStart"], func["lineEnd"], func["tokenCount"],
+                         len(fingerprints), fingerprints.tobytes())
+                    ).lastrowid
+                    connection.executemany('INSERT OR IGNORE INTO fingerprints VALUES (?, ?)',
+                                           ((value, function_id) for value in fingerprints))
+                connection.execute('INSERT INTO files VALUES (?, ?)', (path, source_hash))
+                updated += 1
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return updated
+
+    def prune(self, root):
+        """
+        Drop the files under root that no longer exist
+
+        Files that are merely missing from a batch (skipped, failed, or not
+        part of an incremental batch) keep their fingerprints.
+
+        Returns:
+            Number of files dropped
+        """
+        prefix = os.path.join(root, '')
+        connection = self._connect()
+        stale = [path for (path,) in connection.execute(
+            'SELECT path FROM files WHERE path >= ? AND path < ?',
+            (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        ) if not os.path.exists(path)]
+        if stale:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                for path in stale:
+                    self._delete_file(connection, path)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        return len(stale)
+
+    def function_count(self):
+        """Number of indexed functions"""
+        return self._connect().execute('SELECT count(*) FROM functions').fetchone()[0]
+
+    def clusters(self, min_similarity=MIN_SIMILARITY, max_postings=MAX_POSTINGS):
+        """
+        Group the indexed functions into clone clusters
+
+        Two functions are clones when the Jaccard similarity of their
+        fingerprint sets reaches min_similarity (functions nested in each
+        other are never clones of each other); clusters are the connected
+        components of that relation.
+
+        Args:
+            min_similarity: Similarity threshold between 0 and 1
+            max_postings: Ignore fingerprints shared by more functions than this
+
+        Returns:
+            List of clusters, largest first: {"size", "similarity" (lowest
+            linking similarity), "tokenCount" (largest member), "functions"}
+        """
+        connection = self._connect()
+        shared = {}
+        for (members,) in connection.execute(
+                'SELECT group_concat(function_id) FROM fingerprints GROUP BY hash HAVING count(*) BETWEEN 2 AND ?',
+                (max_postings,)):
+            members = sorted(map(int, members.split(',')))
+            for index, first in enumerate(members):
+                for second in members[index + 1:]:
+                    pair = (first, second)
+                    shared[pair] = shared.get(pair, 0) + 1
+        if not shared:
+            return []
+
+        candidates = {function_id for pair in shared for function_id in pair}
+        functions = {}
+        for row in connection.execute(
+                'SELECT id, path, name, line_start, line_end, token_count, fingerprint_count FROM functions'):
+            if row[0] in candidates:
+                functions[row[0]] = row[1:]
+
+        parent = {}
+
+        def find(node):
+            parent.setdefault(node, node)
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        link_similarity = {}
+        for (first, second), count in shared.items():
+            a, b = functions[first], functions[second]
+            if a[0] == b[0] and a[2] <= b[3] and b[2] <= a[3]:
+                continue  # Nested functions of the same file
+            similarity = count / (a[5] + b[5] - count)
+            if similarity < min_similarity:
+                continue
+            root_first, root_second = find(first), find(second)
+            lowest = min(similarity, link_similarity.get(root_first, 1.0), link_similarity.get(root_second, 1.0))
+            if root_first != root_second:
+                parent[root_second] = root_first
+            link_similarity[root_first] = lowest
+
+        members = {}
+        for function_id in list(parent):
+            members.setdefault(find(function_id), []).append(function_id)
+
+        clusters = []
+        for root, ids in members.items():
+            ids.sort(key=lambda function_id: functions[function_id][:3])
+            clusters.append({
+                "size": len(ids),
+                "similarity": round(link_similarity.get(root, 1.0), 3),
+                "tokenCount": max(functions[function_id][4] for function_id in ids),
+                "functions": [
+                    {
+                        "filePath": functions[function_id][0],
+                        "name": functions[function_id][1],
+                        "lineStart": functions[function_id][2],
+                        "lineEnd": functions[function_id][3],
+                        "tokenCount": functions[function_id][4]
+                    }
+                    for function_id in ids
+                ]
+            })
+        clusters.sort(key=lambda cluster: (-cluster["size"], -cluster["tokenCount"],
+                                           cluster["functions"][0]["filePath"]))
+        return clusters
+
+    def close(self):
+        """Close the database connection"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) >= 2 and sys.argv[1] == 'clusters':
+        parser = argparse.ArgumentParser(description="List the clone clusters of a clone index")
+        parser.add_argument('index', help="Index directory (as passed to batch_analyzer --clones)")
+        parser.add_argument('--min-similarity', type=float, default=MIN_SIMILARITY)
+        parser.add_argument('--limit', type=int, default=0, help="List only the N largest clusters")
+        args = parser.parse_args(sys.argv[2:])
+        index = CloneIndex(args.index)
+        try:
+            clusters = index.clusters(args.min_similarity)
+            result = {
+                "indexedFunctions": index.function_count(),
+                "clusterCount": len(clusters),
+                "clusters": clusters[:args.limit] if args.limit else clusters,
+                "status": "success"
+            }
+        except Exception as e:
+            print(json.dumps({"error": str(e), "status": "error"}))
+            sys.exit(1)
+        finally:
+            index.close()
+        print(json.dumps(result))
+        return
+
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "No file path provided", "status": "error"}))
+        sys.exit(1)
+    print(json.dumps(analyze_file(sys.argv[1], stdin='--stdin' in sys.argv[2:])))
+
+
+if __name__ == "__main__":
+    main()
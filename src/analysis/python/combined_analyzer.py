@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Combined Analyzer
+
+Runs the lizard, comment and class analyzers (and optionally the DOM parser
+and the clone fingerprinter) over a single read of a file. The bytes are
+read and decoded once and the same text buffer is passed to every analyzer,
+instead of each analyzer opening the file on its own. Analyzer modules are
+imported on first use, so a run that only needs the comment analyzer never
+loads lizard or the HTML parser.
+
+Usage: python combined_analyzer.py <file_path> [--ops lizard,comments,classes,dom,clones] [--cache]
+                                  [--codec NAME]
+                                  [--profile] [--profile-dir DIR]
+"""
+
+import sys
+import json
+import os
+from importlib import import_module
+
+from source_reader import read_source_bytes, decode_source, count_lines
+from profiling import ANALYZER_PHASES, timed, timer_from_args
+from output_codecs import codec_from_args, emit_result
+from file_budget import BUDGET_STATUSES, BudgetExceeded, as_budget_error
+
+
+DEFAULT_OPS = ('lizard', 'comments', 'classes')
+
+# op -> (analyzer module, function analyzing decoded content)
+_CONTENT_ANALYZERS = {
+    'lizard': ('lizard_analyzer', 'analyze_source'),
+    'comments': ('python_comment_analyzer', 'analyze_comment_content'),
+    'classes': ('class_counter_analyzer', 'analyze_class_content'),
+    'dom': ('html_dom_parser', 'analyze_html_content'),
+    'clones': ('clone_detector', 'analyze_clone_content'),
+}
+LINES_VERSION = '1'
+
+
+def content_analyzer(op):
+    """
+    Look up (importing its module on first use) the content analyzer for an op
+
+    Args:
+        op: Analyzer name
+
+    Returns:
+        Function taking (file_path, text), or None for an unknown op
+    """
+    entry = _CONTENT_ANALYZERS.get(op)
+    if entry is None:
+        return None
+    module_name, function_name = entry
+    return getattr(import_module(module_name), function_name)
+
+
+def analyzer_version(op):
+    """Cache version of an op; lizard and clone results also depend on the installed lizard"""
+    entry = _CONTENT_ANALYZERS.get(op)
+    if entry is None:
+        return ''
+    module = import_module(entry[0])
+    if op in ('lizard', 'clones'):
+        return f"{module.ANALYZER_VERSION}+lizard-{module.lizard.version}"
+    return module.ANALYZER_VERSION
+
+
+def analyze_all(file_path, ops=DEFAULT_OPS, cache=None, timer=None):
+    """
+    Analyze a file with several analyzers from a single read
+
+    Args:
+        file_path: Path to the file to analyze
+        ops: Analyzers to run (any of lizard, comments, classes, dom, clones)
+        cache: Optional ResultCache; results are looked up by content hash first
+        timer: Optional PhaseTimer recording per-phase durations
+
+    Returns:
+        Merged dictionary with line counts and one entry per analyzer
+    """
+    if not os.path.exists(file_path):
+        return {"error": f"File not found: {file_path}", "status": "error"}
+
+    try:
+        with timed(timer, 'read'):
+            data = read_source_bytes(file_path)
+    except Exception as e:
+        return {"error": f"Error reading file: {str(e)}", "status": "error"}
+
+    if cache is not None:
+        return _analyze_cached(file_path, data, ops, cache, timer)
+
+    with timed(timer, 'decode'):
+        text = decode_source(data)
+    return analyze_all_content(file_path, text, ops, size=len(data), timer=timer)
+
+
+def analyze_all_content(file_path, text, ops=DEFAULT_OPS, size=None, timer=None):
+    """
+    Analyze already-decoded source with several analyzers
+
+    Args:
+        file_path: Path of the file (used for language detection and reporting)
+        text: Decoded file content
+        ops: Analyzers to run (any of lizard, comments, classes, dom, clones)
+        size: Size of the file in bytes, if known
+        timer: Optional PhaseTimer recording per-phase durations
+
+    Returns:
+        Merged dictionary with line counts and one entry per analyzer
+    """
+    result = _new_result(file_path, size if size is not None else len(text.encode('utf-8')))
+
+    for op in ops:
+        result[op] = _run_analyzer(op, file_path, text, timer, result)
+        if _over_budget(result, result[op]):
+            break
+
+    with timed(timer, 'scan'):
+        line_counts = count_lines(text)
+    result["lines"] = summarize_lines(line_counts, result)
+    return result
+
+
+def _new_result(file_path, size):
+    """Create the top-level combined result"""
+    return {
+        "filePath": file_path,
+        "fileName": os.path.basename(file_path),
+        "size": size,
+        "status": "success"
+    }
+
+
+def _run_analyzer(op, file_path, text, timer=None, result=None):
+    """
+    Run one content analyzer, turning exceptions into an error entry
+
+    The clone fingerprinter reuses the function ranges of a lizard entry
+    already in result instead of running lizard again.
+    """
+    analyzer = content_analyzer(op)
+    if analyzer is None:
+        return {"error": f"Unknown analyzer: {op}", "status": "error"}
+    args = (file_path, text)
+    if op == 'clones' and result is not None:
+        lizard_result = result.get("lizard")
+        if isinstance(lizard_result, dict) and lizard_result.get("status") == "success":
+            args += (lizard_result.get("functions", []),)
+    try:
+        with timed(timer, ANALYZER_PHASES.get(op, 'scan')):
+            return analyzer(*args)
+    except (BudgetExceeded, MemoryError) as error:
+        return as_budget_error(error).record()
+    except Exception as e:
+        return {"error": str(e), "status": "error"}
+
+
+def _over_budget(result, entry):
+    """
+    Mark the combined result when an analyzer ran out of its budget (see
+    file_budget.py); the remaining analyzers are then skipped
+
+    Returns:
+        True if entry is a "timeout" or "oom" entry
+    """
+    if entry.get("status") not in BUDGET_STATUSES:
+        return False
+    result["status"] = entry["status"]
+    result["error"] = entry["error"]
+    return True
+
+
+def _analyze_cached(file_path, data, ops, cache, timer=None):
+    """
+    Answer as many ops as possible from the result cache and only decode and
+    analyze the file for the ones that miss
+
+    Args:
+        file_path: Path of the file
+        data: Raw file bytes
+        ops: Analyzers to run
+        cache: ResultCache instance
+        timer: Optional PhaseTimer; hashing and cache I/O are reported as "cache"
+
+    Returns:
+        Merged dictionary, including a "cache" block with this file's hits and misses
+    """
+    from result_cache import content_hash
+
+    with timed(timer, 'cache'):
+        digest = content_hash(data)
+    _, ext = os.path.splitext(file_path.lower())
+    hits, misses = cache.hits, cache.misses
+
+    result = _new_result(file_path, len(data))
+    text = None
+
+    for op in ops:
+        # Results depend on the extension (language), not just the bytes
+        key = f"{op}{ext}"
+        version = analyzer_version(op)
+        with timed(timer, 'cache'):
+            entry = cache.get(digest, key, version)
+        if entry is not None:
+            result[op] = _bind_path(op, entry, file_path)
+            continue
+
+        if text is None:
+            with timed(timer, 'decode'):
+                text = decode_source(data)
+        entry = _run_analyzer(op, file_path, text, timer, result)
+        result[op] = entry
+        if _over_budget(result, entry):
+            break
+        if "error" not in entry:
+            with timed(timer, 'cache'):
+                cache.put(digest, key, version, entry)
+
+    with timed(timer, 'cache'):
+        line_counts = cache.get(digest, 'lines', LINES_VERSION)
+    if line_counts is None:
+        if text is None:
+            with timed(timer, 'decode'):
+                text = decode_source(data)
+        with timed(timer, 'scan'):
+            line_counts = count_lines(text)
+        with timed(timer, 'cache'):
+            cache.put(digest, 'lines', LINES_VERSION, line_counts)
+
+    result["lines"] = summarize_lines(dict(line_counts), result)
+    result["contentHash"] = digest
+    result["cache"] = {"hits": cache.hits - hits, "misses": cache.misses - misses}
+    return result
+
+
+def _bind_path(op, entry, file_path):
+    """Point a cached result (possibly stored for another copy of the file) at file_path"""
+    file_name = os.path.basename(file_path)
+    if op == 'lizard' and isinstance(entry.get("file"), dict):
+        entry["file"]["filePath"] = file_path
+        entry["file"]["fileName"] = file_name
+    elif op in ('comments', 'classes'):
+        entry["file"] = file_path
+    elif op == 'dom':
+        entry["filePath"] = file_path
+        entry["fileName"] = file_name
+    return entry
+
+
+def summarize_lines(line_counts, result):
+    """
+    Build total/blank/comment/code line counts
+
+    Code lines come from lizard's nloc when lizard ran; otherwise they are
+    estimated as the non-blank lines that are not comment lines.
+
+    Args:
+        line_counts: Total and blank line counts from count_lines
+        result: Partially built combined result
+
+    Returns:
+        Dictionary with total, blank, comment and code line counts
+    """
+    lines = line_counts
+    comment_lines = result.get("comments", {}).get("commentLines", 0)
+    lizard_file = result.get("lizard", {}).get("file")
+
+    if lizard_file is not None:
+        code_lines = lizard_file["nloc"]
+    else:
+        code_lines = max(0, lines["total"] - lines["blank"] - comment_lines)
+
+    lines["comment"] = comment_lines
+    lines["code"] = code_lines
+    return lines
+
+
+def main():
+    """Main entry point"""
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "No file path provided", "status": "error"}))
+        sys.exit(1)
+
+    file_path = sys.argv[1]
+    ops = DEFAULT_OPS
+    if '--ops' in sys.argv[2:-1]:
+        ops_arg = sys.argv[sys.argv.index('--ops') + 1]
+        ops = tuple(op.strip() for op in ops_arg.split(',') if op.strip())
+
+    try:
+        codec = codec_from_args(sys.argv[2:])
+    except ValueError as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+    cache = None
+    if '--cache' in sys.argv[2:]:
+        from result_cache import ResultCache
+        cache = ResultCache()
+    timer = timer_from_args(sys.argv[2:])
+    try:
+        if timer is not None:
+            result = timer.run(file_path, analyze_all, file_path, ops, cache, timer)
+        else:
+            result = analyze_all(file_path, ops, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    # Output as JSON or one --codec frame (with a timings block under --profile / --profile-dir)
+    emit_result(result, codec, timer)
+
+
+if __name__ == "__main__":
+    main()
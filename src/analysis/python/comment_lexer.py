@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+"""
+Comment Lexer
+
+Table-driven lexer that finds comment lines in source code. Each language is
+described by a CommentSpec (line-comment markers, block delimiters, nesting,
+string / raw-string / heredoc rules) and a single state machine walks the
+file once, line by line, emitting run-length comment line ranges.
+
+Because the lexer is fed one line at a time and carries its state between
+lines, it can read straight from an open file and never needs more than the
+current line in memory.
+
+Specs cover every language lizard reads, including fixed-form Fortran
+(comment lines marked in column 1), Structured Text and PL/SQL.
+"""
+
+import re
+
+
+# Lexer states
+CODE = 0
+BLOCK = 1          # inside a block comment
+STRING = 2         # inside a string literal that may continue on the next line
+LINE_BLOCK = 3     # inside a line-anchored block such as Ruby =begin/=end or Perl POD
+HEREDOC = 4        # inside a heredoc body
+
+# Body and closing slash of a JavaScript regex literal (a '/' inside a class does not close it)
+_REGEX_BODY = re.compile(r'(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\[\n])+/')
+
+# Last character of code after which a '/' starts a regex literal rather than a division
+_REGEX_PRECEDERS = frozenset('(,=:[!&|?{};+-*%<>~^/')
+
+# Keywords after which a '/' starts a regex literal
+_REGEX_KEYWORDS = frozenset({
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw',
+    'case', 'do', 'else', 'yield', 'await',
+})
+
+
+class CommentSpec:
+    """
+    Comment and string syntax of one language
+
+    Args:
+        line: Line-comment markers, e.g. ('//',)
+        block: Block comment delimiters as (open, close) pairs
+        nested: Whether block comments nest (Rust, Swift, Kotlin, Scala)
+        strings: Single-line string delimiters with backslash escapes
+        multiline_strings: String delimiters with escapes that may span lines
+        raw_strings: (open, close) string delimiters without escapes that may span lines
+        doc_strings: String delimiters whose contents count as comment lines
+        line_blocks: (open regex, close regex) blocks that start at column 0
+        heredoc: Regex for a heredoc opener; group "term" captures the terminator
+        skip: Regexes for code that would otherwise look like a comment or string
+            (e.g. Perl's $#array or Erlang's $" character literal)
+        char_literal: Regex for character literals that must not open a string
+        rust_raw: Recognise Rust raw strings r"..." / r#"..."#
+        cpp_raw: Recognise C++ raw strings R"delim(...)delim"
+        lua_long: Recognise Lua long brackets --[[ ]] and [[ ]]
+        interpolation: Maps a string delimiter to the opener of embedded code,
+            e.g. {'`': '${'} for JavaScript template literals
+        regex_literals: Recognise JavaScript regex literals /.../ where a '/'
+            cannot be a division (so quotes and backticks in them open nothing)
+        comment_column: Regex matched at column 0 that makes the whole line a
+            comment (fixed-form Fortran's C, * and ! in column 1)
+    """
+
+    def __init__(self, line=(), block=(), nested=False, strings=('"', "'"),
+                 multiline_strings=(), raw_strings=(), doc_strings=(), line_blocks=(),
+                 heredoc=None, skip=(), char_literal=None, rust_raw=False,
+                 cpp_raw=False, lua_long=False, interpolation=None, regex_literals=False,
+                 comment_column=None):
+        self.line = tuple(line)
+        self.block = tuple(block)
+        self.nested = nested
+        self.strings = tuple(strings)
+        self.multiline_strings = tuple(multiline_strings)
+        self.raw_strings = tuple(raw_strings)
+        self.doc_strings = tuple(doc_strings)
+        self.line_blocks = tuple((re.compile(open_rx), re.compile(close_rx)) for open_rx, close_rx in line_blocks)
+        self.heredoc = heredoc
+        self.skip = tuple(skip)
+        self.char_literal = char_literal
+        self.rust_raw = rust_raw
+        self.cpp_raw = cpp_raw
+        self.lua_long = lua_long
+        self.interpolation = dict(interpolation or {})
+        self.regex_literals = regex_literals
+        self.comment_column = re.compile(comment_column) if comment_column else None
+        self._compiled = None
+
+    def compiled(self):
+        """Build (once) the regex that finds the next interesting token in code"""
+        if self._compiled is None:
+            self._compiled = _compile_spec(self)
+        return self._compiled
+
+
+def _literal_group(name, tokens):
+    """Alternation of literal tokens, longest first so '\"\"\"' wins over '\"'"""
+    if not tokens:
+        return None
+    ordered = sorted(set(tokens), key=len, reverse=True)
+    return f"(?P<{name}>{'|'.join(re.escape(token) for token in ordered)})"
+
+
+def _compile_spec(spec):
+    """
+    Compile a CommentSpec into a master token regex and lookup tables
+
+    Returns:
+        Dictionary with the regex and per-token close delimiters
+    """
+    parts = []
+    for index, pattern in enumerate(spec.skip):
+        parts.append(f"(?P<skip{index}>{pattern})")
+    if spec.char_literal:
+        parts.append(f"(?P<char>{spec.char_literal})")
+    if spec.lua_long:
+        parts.append(r"(?P<lua_comment>--\[(?P<lua_comment_level>=*)\[)")
+    if spec.cpp_raw:
+        parts.append(r'(?P<cpp_raw>\bu?8?[LUu]?R"(?P<cpp_delim>[^()\\\s"]{0,16})\()')
+    if spec.rust_raw:
+        parts.append(r'(?P<rust_raw>\bb?r(?P<rust_hashes>#*)")')
+    if spec.heredoc:
+        parts.append(f"(?P<heredoc>{spec.heredoc})")
+    if spec.lua_long:
+        parts.append(r"(?P<lua_string>\[(?P<lua_string_level>=*)\[)")
+
+    groups = [
+        _literal_group('block', [open_token for open_token, _ in spec.block]),
+        _literal_group('doc', spec.doc_strings),
+        _literal_group('raw', [open_token for open_token, _ in spec.raw_strings]),
+        _literal_group('multi', spec.multiline_strings),
+        _literal_group('line', spec.line),
+        _literal_group('string', spec.strings),
+    ]
+    parts.extend(group for group in groups if group)
+    if spec.regex_literals:
+        # After the '//' and '/*' alternatives, so only a lone '/' gets here
+        parts.append(r"(?P<slash>/)")
+
+    interpolation_parts = parts + [r"(?P<brace_open>\{)", r"(?P<brace_close>\})"]
+
+    return {
+        "token": re.compile('|'.join(parts)) if parts else None,
+        "interpolation_token": re.compile('|'.join(interpolation_parts)),
+        "skip_groups": tuple(f"skip{index}" for index in range(len(spec.skip))),
+        "block_close": dict(spec.block),
+        "raw_close": dict(spec.raw_strings),
+        "string_end": {},
+    }
+
+
+def _regex_allowed(line, slash):
+    """
+    Whether the '/' at index slash of a JavaScript line starts a regex literal
+
+    Decided from the code before it: an operator, an opening bracket, a comma,
+    a keyword or nothing at all (start of a statement) means regex; an
+    identifier, a number or a closing bracket means division. A wrong guess
+    only affects the rest of that line, since regex literals cannot span lines.
+    """
+    index = slash - 1
+    while index >= 0 and line[index] in ' \t':
+        index -= 1
+    if index < 0:
+        return True
+    char = line[index]
+    if char in _REGEX_PRECEDERS:
+        return True
+    if not (char.isalnum() or char in '_$'):
+        return False
+    start = index
+    while start > 0 and (line[start - 1].isalnum() or line[start - 1] in '_$'):
+        start -= 1
+    return line[start:index + 1] in _REGEX_KEYWORDS
+
+
+def _string_end_pattern(compiled, delimiter, interpolation=None):
+    """Regex matching an escape sequence, an interpolation opener or the closing delimiter"""
+    pattern = compiled["string_end"].get(delimiter)
+    if pattern is None:
+        alternatives = [r'\\.', re.escape(delimiter)]
+        if interpolation:
+            alternatives.append(f"(?P<interpolation>{re.escape(interpolation)})")
+        pattern = re.compile('|'.join(alternatives))
+        compiled["string_end"][delimiter] = pattern
+    return pattern
+
+
+class CommentRanges:
+    """
+    Run-length record of comment lines
+
+    Lines must be added in non-decreasing order; only the ranges and a counter
+    are kept, never a per-line set.
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self.count = 0
+
+    def add(self, line_number):
+        """Record one comment line, extending the last range when adjacent"""
+        self.add_span(line_number, line_number)
+
+    def add_span(self, start, end):
+        """Record the comment lines start..end (inclusive)"""
+        ranges = self.ranges
+        if ranges and ranges[-1][1] >= start - 1:
+            last = ranges[-1]
+            if last[1] < end:
+                self.count += end - max(last[1], start - 1)
+                last[1] = end
+        else:
+            ranges.append([start, end])
+            self.count += end - start + 1
+
+
+class CommentLexer:
+    """
+    Incremental comment scanner
+
+    Feed it the lines of a file in order (with or without their newline);
+    it keeps its state between lines and records comment lines as ranges.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.compiled = spec.compiled()
+        self.state = CODE
+        self.line_number = 0
+        self.comments = CommentRanges()
+        self._mark = self.comments.add
+
+        # State details for BLOCK / STRING / LINE_BLOCK / HEREDOC
+        self._close = None
+        self._open = None
+        self._depth = 0
+        self._escapes = False
+        self._multiline = False
+        self._doc = False
+        self._line_block_close = None
+        self._heredoc_term = None
+        self._pending_heredocs = []
+
+        # Strings suspended by an interpolation, with the brace depth of the embedded code
+        self._interpolations = []
+        self._brace_depth = 0
+
+    def feed(self, line):
+        """Process the next line of the file"""
+        self.line_number += 1
+        line_number = self.line_number
+        state = self.state
+
+        if state == LINE_BLOCK:
+            self._mark(line_number)
+            if self._line_block_close.match(line):
+                self.state = CODE
+            return
+
+        if state == HEREDOC:
+            if _ends_heredoc(line, self._heredoc_term):
+                self._next_heredoc()
+            return
+
+        if state == CODE:
+            if self.spec.comment_column is not None and self.spec.comment_column.match(line):
+                self._mark(line_number)
+                return
+            for open_rx, close_rx in self.spec.line_blocks:
+                if open_rx.match(line):
+                    self._mark(line_number)
+                    self.state = LINE_BLOCK
+                    self._line_block_close = close_rx
+                    return
+
+        self._scan(line, line_number)
+
+        if self._pending_heredocs and self.state == CODE:
+            self._next_heredoc()
+
+    def _next_heredoc(self):
+        """Enter the next heredoc body opened on a previous line, if any"""
+        if self._pending_heredocs:
+            self._heredoc_term = self._pending_heredocs.pop(0)
+            self.state = HEREDOC
+        else:
+            self._heredoc_term = None
+            self.state = CODE
+
+    def _scan(self, line, line_number):
+        """Walk one line, switching states as tokens are found"""
+        compiled = self.compiled
+        length = len(line)
+        pos = 0
+
+        while pos < length:
+            state = self.state
+
+            if state == BLOCK:
+                self._mark(line_number)
+                pos = self._scan_block(line, pos)
+                if pos < 0:
+                    return
+                continue
+
+            if state == STRING:
+                if self._doc:
+                    self._mark(line_number)
+                pos = self._scan_string(line, pos)
+                if pos < 0:
+                    return
+                continue
+
+            # CODE (possibly embedded in an interpolated string)
+            token_rx = compiled["interpolation_token"] if self._interpolations else compiled["token"]
+            if token_rx is None:
+                return
+            match = token_rx.search(line, pos)
+            if match is None:
+                return
+            kind = match.lastgroup
+            token = match.group(kind)
+            pos = match.end()
+
+            if kind == 'line':
+                self._mark(line_number)
+                return
+            if kind == 'block':
+                self._enter_block(token, compiled["block_close"][token])
+            elif kind == 'lua_comment':
+                self._enter_block(None, ']' + match.group('lua_comment_level') + ']')
+            elif kind == 'string':
+                self._enter_string(token, escapes=True, multiline=False)
+            elif kind == 'multi':
+                self._enter_string(token, escapes=True, multiline=True)
+            elif kind == 'doc':
+                self._enter_string(token, escapes=True, multiline=True, doc=True)
+                self._mark(line_number)
+            elif kind == 'raw':
+                self._enter_string(compiled["raw_close"][token], escapes=False, multiline=True)
+            elif kind == 'rust_raw':
+                self._enter_string('"' + match.group('rust_hashes'), escapes=False, multiline=True)
+            elif kind == 'cpp_raw':
+                self._enter_string(')' + match.group('cpp_delim') + '"', escapes=False, multiline=True)
+            elif kind == 'lua_string':
+                self._enter_string(']' + match.group('lua_string_level') + ']', escapes=False, multiline=True)
+            elif kind == 'slash':
+                if _regex_allowed(line, match.start()):
+                    body = _REGEX_BODY.match(line, pos)
+                    if body is not None:
+                        pos = body.end()
+            elif kind == 'heredoc':
+                self._pending_heredocs.append(match.group('term'))
+            elif kind == 'brace_open':
+                self._brace_depth += 1
+            elif kind == 'brace_close':
+                if self._brace_depth:
+                    self._brace_depth -= 1
+                else:
+                    self._resume_string()
+            # 'char' and skip groups are consumed without changing state
+
+    def _enter_block(self, open_token, close_token):
+        self.state = BLOCK
+        self._open = open_token if self.spec.nested else None
+        self._close = close_token
+        self._depth = 1
+
+    def _enter_string(self, close_token, escapes, multiline, doc=False):
+        self.state = STRING
+        self._close = close_token
+        self._escapes = escapes
+        self._multiline = multiline
+        self._doc = doc
+
+    def _suspend_string(self):
+        """Enter the code embedded in a string, remembering the string to return to"""
+        self._interpolations.append((self._close, self._multiline, self._doc, self._brace_depth))
+        self._brace_depth = 0
+        self.state = CODE
+
+    def _resume_string(self):
+        """Return to the string once the embedded code's closing brace is reached"""
+        close_token, multiline, doc, self._brace_depth = self._interpolations.pop()
+        self._enter_string(close_token, escapes=True, multiline=multiline, doc=doc)
+
+    def _scan_block(self, line, pos):
+        """
+        Advance through a block comment
+
+        Returns:
+            Position after the closing delimiter, or -1 if the line ends inside the block
+        """
+        close_token = self._close
+        open_token = self._open
+
+        while True:
+            close_at = line.find(close_token, pos)
+            if open_token is not None:
+                open_at = line.find(open_token, pos)
+                if open_at != -1 and (close_at == -1 or open_at < close_at):
+                    self._depth += 1
+                    pos = open_at + len(open_token)
+                    continue
+            if close_at == -1:
+                return -1
+            pos = close_at + len(close_token)
+            self._depth -= 1
+            if self._depth == 0:
+                self.state = CODE
+                return pos
+
+    def _scan_string(self, line, pos):
+        """
+        Advance through a string literal
+
+        Returns:
+            Position after the closing delimiter, or -1 if the line ends inside the string
+        """
+        close_token = self._close
+        if self._escapes:
+            end_rx = _string_end_pattern(self.compiled, close_token,
+                                         self.spec.interpolation.get(close_token))
+            for match in end_rx.finditer(line, pos):
+                if match.lastgroup == 'interpolation':
+                    self._suspend_string()
+                    return match.end()
+                if match.group() == close_token:
+                    self.state = CODE
+                    return match.end()
+        else:
+            close_at = line.find(close_token, pos)
+            if close_at != -1:
+                self.state = CODE
+                return close_at + len(close_token)
+
+        if not self._multiline:
+            # Unterminated single-line string: it ends with the line
+            self.state = CODE
+        return -1
+
+    def feed_lines(self, lines):
+        """Process an iterable of lines (e.g. an open file) in order"""
+        feed = self.feed
+        for line in lines:
+            feed(line)
+        return self
+
+    def feed_text(self, text):
+        """Process a whole text buffer"""
+        return self.feed_lines(iter_lines(text))
+
+    @property
+    def comment_lines(self):
+        """Number of comment lines seen so far"""
+        return self.comments.count
+
+    @property
+    def ranges(self):
+        """Inclusive [start, end] comment line ranges seen so far"""
+        return self.comments.ranges
+
+
+def _ends_heredoc(line, terminator):
+    """Whether a line closes a heredoc (the terminator may be indented and followed by ; or ,)"""
+    stripped = line.strip()
+    if not stripped.startswith(terminator):
+        return False
+    rest = stripped[len(terminator):]
+    return not rest or not (rest[0].isalnum() or rest[0] == '_')
+
+
+_C_BLOCK = (('/*', '*/'),)
+_HASH_HEREDOC_NAME = r"(?P<quote>['\"`]?)(?P<term>[A-Za-z_]\w*)(?P=quote)"
+
+C_STYLE = CommentSpec(line=('//',), block=_C_BLOCK)
+
+LANGUAGE_SPECS = {
+    'c': CommentSpec(line=('//',), block=_C_BLOCK, cpp_raw=True),
+    'csharp': CommentSpec(line=('//',), block=_C_BLOCK, raw_strings=(('@"', '"'), ('"""', '"""'))),
+    'java': CommentSpec(line=('//',), block=_C_BLOCK, multiline_strings=('"""',)),
+    'javascript': CommentSpec(line=('//',), block=_C_BLOCK, multiline_strings=('`',),
+                              interpolation={'`': '${'}, regex_literals=True),
+    'go': CommentSpec(line=('//',), block=_C_BLOCK, raw_strings=(('`', '`'),),
+                      char_literal=r"'(?:\\.|[^\\'\n])+'", strings=('"',)),
+    'rust': CommentSpec(line=('//',), block=_C_BLOCK, nested=True, strings=('"',),
+                        char_literal=r"b?'(?:\\.[^']*|[^\\'\n])'", rust_raw=True),
+    'kotlin': CommentSpec(line=('//',), block=_C_BLOCK, nested=True,
+                          raw_strings=(('"""', '"""'),)),
+    'swift': CommentSpec(line=('//',), block=_C_BLOCK, nested=True, strings=('"',),
+                         multiline_strings=('"""',)),
+    'scala': CommentSpec(line=('//',), block=_C_BLOCK, nested=True,
+                         raw_strings=(('"""', '"""'),)),
+    'php': CommentSpec(line=('//', '#'), block=_C_BLOCK, multiline_strings=('"', "'"), strings=(),
+                       skip=(r'#\[',), heredoc=r"<<<[ \t]*" + _HASH_HEREDOC_NAME),
+    'python': CommentSpec(line=('#',), doc_strings=('"""', "'''")),
+    'gdscript': CommentSpec(line=('#',), multiline_strings=('"""', "'''")),
+    'ruby': CommentSpec(line=('#',), line_blocks=((r'=begin\b', r'=end\b'),),
+                        heredoc=r"<<[~-]?" + _HASH_HEREDOC_NAME),
+    'perl': CommentSpec(line=('#',), line_blocks=((r'=[A-Za-z]', r'=cut\b'),),
+                        multiline_strings=('"', "'"), strings=(),
+                        skip=(r'\$#',), heredoc=r"<<~?" + _HASH_HEREDOC_NAME),
+    'lua': CommentSpec(line=('--',), lua_long=True),
+    'erlang': CommentSpec(line=('%',), strings=('"',), skip=(r'\$\\?.',)),
+    'fortran': CommentSpec(line=('!',)),
+    'fortran_fixed': CommentSpec(line=('!',), comment_column=r'[Cc*!]'),
+    'st': CommentSpec(line=('//',), block=(('(*', '*)'), ('/*', '*/'))),
+    # '' inside a quoted string is two adjacent strings, so quotes need no escapes
+    'plsql': CommentSpec(line=('--',), block=_C_BLOCK, strings=(), raw_strings=(("'", "'"), ('"', '"'))),
+    'r': CommentSpec(line=('#',)),
+    'vue': CommentSpec(block=(('<!--', '-->'),), strings=('"', "'")),
+}
+
+EXTENSION_SPECS = {
+    '.c': 'c', '.h': 'c', '.cpp': 'c', '.cc': 'c', '.cxx': 'c', '.hpp': 'c', '.hh': 'c',
+    '.m': 'c', '.mm': 'c', '.sol': 'c', '.zig': 'c', '.ttcn': 'c', '.ttcn3': 'c', '.ttcnpp': 'c',
+    '.cs': 'csharp',
+    '.java': 'java',
+    '.js': 'javascript', '.jsx': 'javascript', '.ts': 'javascript', '.tsx': 'javascript',
+    '.mjs': 'javascript', '.cjs': 'javascript',
+    '.go': 'go',
+    '.rs': 'rust',
+    '.kt': 'kotlin', '.kts': 'kotlin',
+    '.swift': 'swift',
+    '.scala': 'scala', '.sc': 'scala',
+    '.php': 'php', '.phtml': 'php', '.php3': 'php', '.php4': 'php', '.php5': 'php', '.phps': 'php',
+    '.py': 'python',
+    '.gd': 'gdscript',
+    '.rb': 'ruby',
+    '.pl': 'perl', '.pm': 'perl', '.t': 'perl',
+    '.lua': 'lua',
+    '.erl': 'erlang', '.hrl': 'erlang', '.es': 'erlang', '.escript': 'erlang',
+    '.f90': 'fortran', '.f95': 'fortran', '.f03': 'fortran', '.f08': 'fortran',
+    '.f': 'fortran_fixed', '.for': 'fortran_fixed', '.ftn': 'fortran_fixed', '.fpp': 'fortran_fixed',
+    '.f77': 'fortran_fixed',
+    '.st': 'st',
+    '.sql': 'plsql', '.pks': 'plsql', '.pkb': 'plsql', '.pls': 'plsql', '.plb': 'plsql', '.pck': 'plsql',
+    '.r': 'r',
+    '.vue': 'vue',
+}
+
+
+def iter_lines(text):
+    """
+    Yield the lines of a text buffer without copying it into a list
+
+    Only '\\n' separates lines, matching how the extension counts them.
+    """
+    start = 0
+    find = text.find
+    while True:
+        end = find('\n', start)
+        if end == -1:
+            if start < len(text):
+                yield text[start:]
+            return
+        yield text[start:end + 1]
+        start = end + 1
+
+
+def get_spec(ext):
+    """
+    Look up the comment syntax for a file extension
+
+    Args:
+        ext: Lower-case extension including the dot
+
+    Returns:
+        CommentSpec, or None when the language is not supported
+    """
+    language = EXTENSION_SPECS.get(ext)
+    return LANGUAGE_SPECS[language] if language else None
+
+
+def scan_text(text, spec):
+    """
+    Find the comment lines of a text buffer
+
+    Args:
+        text: Decoded file content
+        spec: CommentSpec of the file's language
+
+    Returns:
+        CommentLexer holding the comment line count and ranges
+    """
+    return CommentLexer(spec).feed_text(text)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Complexity Statistics
+
+Distribution metrics over lizard function entries: the mean and maximum,
+p50/p90/p99 and fixed-bucket histograms of complexity, nesting depth,
+parameter count and cyclomatic density.
+
+Function entries are turned into one numeric column per metric in a single
+pass; everything else is computed on the columns. For large roll-ups with
+NumPy installed the columns become one float matrix and every statistic is
+a vectorized call; otherwise the array('d') columns give the same results
+by sorting and bisecting them. NumPy is imported on first use only, so a
+single-file analysis does not pay for the import.
+"""
+
+from array import array
+from bisect import bisect_right
+
+
+# Function entry fields summarized, in column order
+METRICS = ('complexity', 'maxNestingDepth', 'parameters', 'cyclomaticDensity')
+
+PERCENTILES = (50, 90, 99)
+
+# Histogram bucket i counts values <= bounds[i] (and above the previous
+# bound); one extra bucket counts values above the last bound. The complexity
+# bounds line up with the "high" (> 10) and "critical" (> 25) thresholds.
+HISTOGRAM_BOUNDS = {
+    'complexity': (5, 10, 25, 50),
+    'maxNestingDepth': (1, 2, 3, 5),
+    'parameters': (1, 3, 5, 8),
+    'cyclomaticDensity': (0.1, 0.25, 0.5, 1.0),
+}
+
+HIGH_COMPLEXITY = 10
+CRITICAL_COMPLEXITY = 25
+
+# Below this many functions sorting the columns is faster than importing NumPy
+NUMPY_MIN_FUNCTIONS = 10000
+
+_numpy = None
+
+
+def load_numpy():
+    """The numpy module, or None when it is not installed (imported once)"""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # NumPy is optional; columns fall back to array('d')
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+class FunctionColumns:
+    """
+    Metric columns for a set of functions
+
+    Columns can be extended file by file, so a directory or repository
+    roll-up only keeps four numbers per function.
+    """
+
+    def __init__(self):
+        self._columns = tuple(array('d') for _ in METRICS)
+
+    @classmethod
+    def from_functions(cls, functions):
+        """Columns for a list of function entries"""
+        columns = cls()
+        columns.extend(functions)
+        return columns
+
+    def extend(self, functions):
+        """
+        Append function entries (dictionaries as produced by lizard_analyzer)
+
+        Args:
+            functions: Function entries; missing metrics count as 0
+        """
+        complexity, nesting, parameters, density = self._columns
+        for func in functions:
+            complexity.append(func.get('complexity') or 0)
+            nesting.append(func.get('maxNestingDepth') or 0)
+            parameters.append(func.get('parameters') or 0)
+            density.append(func.get('cyclomaticDensity') or 0)
+
+    def merge(self, other):
+        """Append another FunctionColumns"""
+        for column, values in zip(self._columns, other._columns):
+            column.extend(values)
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def column(self, metric):
+        """The array('d') column of a metric"""
+        return self._columns[METRICS.index(metric)]
+
+    def summarize(self):
+        """
+        Distribution of every metric
+
+        Returns:
+            Dictionary metric -> {"mean", "max", "p50", "p90", "p99",
+            "histogram": {"upperBounds", "counts"}}
+        """
+        numpy = load_numpy() if len(self) >= NUMPY_MIN_FUNCTIONS else None
+        if numpy is not None:
+            return _summarize_numpy(numpy, self._columns)
+        return {metric: _summarize_column(metric, column) for metric, column in zip(METRICS, self._columns)}
+
+
+def _round(value):
+    """Plain float rounded for output; whole numbers become ints"""
+    value = round(float(value), 3)
+    return int(value) if value.is_integer() else value
+
+
+def _summarize_numpy(numpy, columns):
+    """Vectorized summary of non-empty columns: one matrix, one call per statistic"""
+    matrix = numpy.column_stack([numpy.frombuffer(column, dtype=numpy.float64) for column in columns])
+    means = matrix.mean(axis=0)
+    maxima = matrix.max(axis=0)
+    quantiles = numpy.percentile(matrix, PERCENTILES, axis=0)
+
+    summary = {}
+    for index, metric in enumerate(METRICS):
+        bounds = HISTOGRAM_BOUNDS[metric]
+        buckets = numpy.searchsorted(numpy.asarray(bounds, dtype=numpy.float64), matrix[:, index], side='left')
+        counts = numpy.bincount(buckets, minlength=len(bounds) + 1).tolist()
+        summary[metric] = _metric_summary(metric, means[index], maxima[index], quantiles[:, index], counts)
+    return summary
+
+
+def _summarize_column(metric, column):
+    """Summary of one array('d') column without NumPy"""
+    bounds = HISTOGRAM_BOUNDS[metric]
+    counts = [0] * (len(bounds) + 1)
+    if not column:
+        return _metric_summary(metric, 0, 0, [0] * len(PERCENTILES), counts)
+
+    ordered = sorted(column)
+    # Bucket boundaries in the sorted column, instead of bisecting every value
+    previous = 0
+    for index, bound in enumerate(bounds):
+        position = bisect_right(ordered, bound)
+        counts[index] = position - previous
+        previous = position
+    counts[-1] = len(ordered) - previous
+
+    quantiles = [_percentile(ordered, percentile) for percentile in PERCENTILES]
+    return _metric_summary(metric, sum(ordered) / len(ordered), ordered[-1], quantiles, counts)
+
+
+def _percentile(ordered, percentile):
+    """Linearly interpolated percentile of sorted values (NumPy's default method)"""
+    rank = (len(ordered) - 1) * percentile / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _metric_summary(metric, mean, maximum, quantiles, counts):
+    summary = {"mean": _round(mean), "max": _round(maximum)}
+    for percentile, value in zip(PERCENTILES, quantiles):
+        summary[f"p{percentile}"] = _round(value)
+    summary["histogram"] = {"upperBounds": list(HISTOGRAM_BOUNDS[metric]), "counts": [int(c) for c in counts]}
+    return summary
+
+
+def complexity_metrics(columns):
+    """
+    The per-file "metrics" block of lizard_analyzer
+
+    Args:
+        columns: FunctionColumns of the file's functions
+
+    Returns:
+        Dictionary with the averages, threshold counts and distributions
+    """
+    distribution = columns.summarize()
+    complexity = distribution['complexity']
+    count = len(columns)
+    # From the unrounded mean, as before the distribution was added
+    average = sum(columns.column('complexity')) / count if count else 0
+    counts = complexity['histogram']['counts']
+    bounds = HISTOGRAM_BOUNDS['complexity']
+    # Threshold counts come straight from the histogram buckets above them
+    high = sum(counts[bounds.index(HIGH_COMPLEXITY) + 1:])
+    critical = sum(counts[bounds.index(CRITICAL_COMPLEXITY) + 1:])
+    return {
+        "averageComplexity": round(average * 10) / 10 if count else 0,
+        "maxComplexity": complexity['max'],
+        "functionCount": count,
+        "highComplexityFunctions": high,
+        "criticalComplexityFunctions": critical,
+        "distribution": distribution
+    }
@@ -0,0 +1,871 @@
+#!/usr/bin/env python3
+"""
+Directory Scanner
+
+Finds the analyzable files under a directory and streams them as
+newline-delimited JSON, each with the SHA-256 of its contents (the same
+hash as the extension's calculateFileHash).
+
+The tree is walked with os.scandir. Directories in IGNORED_DIRS and hidden
+directories are skipped, like in the extension's DirectoryScanner; the
+--exclude patterns and every .gitignore on the way are compiled into one
+regular expression per directory level (see IgnoreRules).
+
+Hashes are kept in a stat cache keyed by path: a file whose (inode, size,
+mtime_ns) is unchanged since the last scan is not read again. Only the
+files that did change are hashed, on a thread pool.
+
+Directories are hashed as a Merkle tree: a directory's hash combines the
+hashes of its files and subdirectories, and is stored in the stat cache
+with the directory's stat signature (the stat tuples of everything below
+it, the .gitignore files that apply and the scan options, combined bottom
+up) and a roll-up summary of its files. The tree is first walked with stat
+calls only; a directory whose signature matches the stored one is not
+descended into at all. It produces a single "directory" record with the
+stored hash and summary in place of its file records. Directories that did
+change get a "directory" record too, once their hash is known.
+
+Every file is also classified by the prefilter in file_classifier.py
+("analysis": skip, light or full, with a "reason" and "detail" unless full)
+from its path, size and first few KB; the content part of the verdict is
+kept in the stat cache next to the hash. --force PATH always classifies the
+files under PATH as full, --no-classify leaves the classification out.
+
+Records written to stdout:
+  {"type": "file", "filePath": "...", "relativePath": "...", "fileName": "...", "extension": ".py",
+   "language": "Python", "sizeBytes": 1234, "hash": "...", "cached": true,
+   "analysis": "skip", "reason": "minified", "detail": "mean line length 2048"}
+  {"type": "directory", "directoryPath": "...", "relativePath": "src/app", "hash": "...", "unchanged": true,
+   "summary": {"totalFiles": 40, "analyzableFiles": 31, "sizeBytes": 81234, "languages": {...},
+               "analysis": {...}, "skipReasons": {...}}}
+  {"type": "error", "path": "...", "error": "..."}
+  {"type": "summary", "totalFiles": 120, "analyzableFiles": 80, "hashed": 3, "reused": 77,
+   "analysis": {"full": 70, "light": 4, "skip": 6}, "skipReasons": {"minified": 5, ...},
+   "hash": "...", "directories": {"changed": 2, "unchanged": 9, "filesSkipped": 64}, ...}
+
+Usage: python directory_scanner.py <directory> [--max-depth N] [--max-file-size BYTES]
+                                   [--exclude PATTERN ...] [--no-gitignore] [--workers N]
+                                   [--cache-dir DIR | --no-cache] [--force PATH ...] [--no-classify]
+"""
+
+import sys
+import json
+import os
+import re
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+try:
+    import sqlite3
+except ImportError:  # Some embedded Python builds ship without sqlite3
+    sqlite3 = None
+
+from result_cache import default_cache_dir, BUSY_TIMEOUT_MS
+from file_classifier import (ANALYSIS_LEVELS, CLASSIFIER_VERSION, SAMPLE_BYTES, FileClassifier, read_sample,
+                             sample_verdict)
+
+
+STAT_CACHE_FILE_NAME = 'scan-cache.sqlite3'
+
+# Directories never descended into (hidden directories are skipped as well)
+IGNORED_DIRS = frozenset({
+    '.git', '.svn', '.hg',
+    'node_modules', '__pycache__', '.venv', 'venv',
+    '.idea', '.vscode',
+    'build', 'dist', 'target', 'bin', 'obj',
+    'coverage', '.coverage', '.next', '.nuxt',
+    'vendor', 'Pods'
+})
+
+# Same defaults as DEFAULT_DEEP_FILTERS in directoryAnalysisConfig.ts
+DEFAULT_EXCLUDE_PATTERNS = (
+    '**/node_modules/**', '**/dist/**', '**/build/**', '**/out/**', '**/.git/**',
+    '**/coverage/**', '**/*.min.js', '**/*.bundle.js', '**/vendor/**', '**/third_party/**',
+    '**/.vscode/**', '**/.idea/**', '**/target/**', '**/bin/**', '**/obj/**'
+)
+DEFAULT_MAX_DEPTH = 50
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Supported extensions, as in languageUtils.ts
+LANGUAGES = {
+    '.js': 'JavaScript', '.jsx': 'JavaScript', '.ts': 'TypeScript', '.tsx': 'TypeScript',
+    '.py': 'Python', '.java': 'Java', '.c': 'C', '.h': 'C',
+    '.cpp': 'C++', '.cc': 'C++', '.cxx': 'C++', '.hpp': 'C++', '.cs': 'C#', '.rb': 'Ruby',
+    '.php': 'PHP', '.phtml': 'PHP', '.php3': 'PHP', '.php4': 'PHP', '.php5': 'PHP', '.phps': 'PHP',
+    '.go': 'Go', '.rs': 'Rust', '.swift': 'Swift', '.kt': 'Kotlin', '.kts': 'Kotlin',
+    '.html': 'HTML', '.htm': 'HTML', '.vue': 'Vue', '.scala': 'Scala', '.sc': 'Scala',
+    '.lua': 'Lua', '.erl': 'Erlang', '.hrl': 'Erlang', '.zig': 'Zig',
+    '.pl': 'Perl', '.pm': 'Perl', '.pod': 'Perl', '.t': 'Perl', '.sol': 'Solidity',
+    '.ttcn3': 'TTCN-3', '.ttcn': 'TTCN-3', '.3mp': 'TTCN-3', '.m': 'Objective-C', '.mm': 'Objective-C++',
+    '.f': 'Fortran', '.f77': 'Fortran', '.f90': 'Fortran', '.f95': 'Fortran', '.f03': 'Fortran',
+    '.f08': 'Fortran', '.for': 'Fortran', '.ftn': 'Fortran', '.gd': 'GDScript',
+}
+
+# Files hashed concurrently per worker thread; bounds memory for huge trees
+QUEUE_DEPTH_PER_WORKER = 8
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# A file modified this close to the moment its hash was recorded may have
+# changed again within the same mtime tick, so its cache entry is not trusted
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+
+# Bump whenever what a directory signature covers or what its summary holds
+# changes (invalidates the stored directory entries)
+DIRECTORY_FORMAT_VERSION = '2'
+
+
+def glob_to_regex(pattern):
+    """
+    Translate one .gitignore-style pattern body into a regular expression
+    matching paths relative to the pattern's base directory
+
+    A pattern containing a slash (other than a trailing one) is anchored to
+    the base directory; otherwise it matches at any depth.
+
+    Args:
+        pattern: Pattern without negation marker or trailing slash
+
+    Returns:
+        Regular expression source
+    """
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    parts = []
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if pattern.startswith('**/', index):
+            parts.append('(?:.*/)?')
+            index += 3
+            continue
+        if pattern.startswith('**', index):
+            parts.append('.*')
+            index += 2
+            continue
+        if char == '*':
+            parts.append('[^/]*')
+        elif char == '?':
+            parts.append('[^/]')
+        elif char == '[':
+            close = pattern.find(']', index + 2)
+            if close == -1:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[index + 1:close]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                index = close
+        elif char == '\\' and index + 1 < len(pattern):
+            index += 1
+            parts.append(re.escape(pattern[index]))
+        else:
+            parts.append(re.escape(char))
+        index += 1
+
+    regex = ''.join(parts)
+    return regex if anchored else '(?:.*/)?' + regex
+
+
+class IgnoreRules:
+    """
+    Compiled ignore patterns of one base directory
+
+    All patterns are joined into a single alternation in reverse order, so
+    the alternative that matches is the last matching pattern, which decides
+    (as in git) whether a later "!pattern" re-includes the path.
+
+    A directory matched by a "name/**" pattern is skipped as a whole, since
+    git ignores everything in it, unless a later "!pattern" could re-include
+    something below it.
+    """
+
+    def __init__(self, patterns, base=''):
+        self.base = base
+        self._negated = set()
+        self._last_negated = -1
+        file_alternatives = []
+        dir_alternatives = []
+        contents_alternatives = []
+        for index, line in reversed(list(enumerate(patterns))):
+            line = line.rstrip('\n')
+            if not line.endswith('\\ '):
+                line = line.rstrip()
+            if not line or line.startswith('#'):
+                continue
+            name = f'p{index}'
+            if line.startswith('!'):
+                self._negated.add(name)
+                self._last_negated = max(self._last_negated, index)
+                line = line[1:]
+            elif line.startswith('\\'):
+                line = line[1:]
+            directory_only = line.endswith('/')
+            alternative = f'(?P<{name}>{glob_to_regex(line.rstrip("/"))})'
+            dir_alternatives.append(alternative)
+            if not directory_only:
+                file_alternatives.append(alternative)
+            if line.endswith('/**') and name not in self._negated:
+                contents_alternatives.append(alternative)
+        self._files = re.compile('|'.join(file_alternatives)) if file_alternatives else None
+        self._dirs = re.compile('|'.join(dir_alternatives)) if dir_alternatives else None
+        self._contents = re.compile('|'.join(contents_alternatives)) if contents_alternatives else None
+
+    @classmethod
+    def from_file(cls, path, base=''):
+        """Rules of a .gitignore file, or None when it cannot be read"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as file:
+                return cls(file.readlines(), base)
+        except OSError:
+            return None
+
+    def match(self, rel_path, is_dir):
+        """
+        Whether a path is ignored by these rules
+
+        Args:
+            rel_path: '/'-separated path relative to the scan root
+            is_dir: Whether the path is a directory
+
+        Returns:
+            True (ignored), False (re-included by a negated pattern) or
+            None (no pattern matches)
+        """
+        regex = self._dirs if is_dir else self._files
+        if regex is None:
+            return None
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        found = regex.fullmatch(rel_path)
+        if found is not None:
+            return found.lastgroup not in self._negated
+        if is_dir and self._contents is not None:
+            # "name/**" excludes a directory's contents: skip the directory itself
+            # unless a later negation may re-include part of it
+            found = self._contents.fullmatch(rel_path + '/')
+            if found is not None and int(found.lastgroup[1:]) > self._last_negated:
+                return True
+        return None
+
+
+def is_ignored(rules, rel_path, is_dir):
+    """Apply a stack of IgnoreRules; rules further down the tree take precedence"""
+    for ruleset in reversed(rules):
+        verdict = ruleset.match(rel_path, is_dir)
+        if verdict is not None:
+            return verdict
+    return False
+
+
+def hash_file(path):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_and_sample(path):
+    """
+    Hash a file and classify its contents from the same read
+
+    Returns:
+        Tuple of (SHA-256 hex digest, sample_verdict of the first SAMPLE_BYTES)
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        chunk = file.read(HASH_CHUNK_SIZE)
+        content = sample_verdict(chunk[:SAMPLE_BYTES])
+        while chunk:
+            digest.update(chunk)
+            chunk = file.read(HASH_CHUNK_SIZE)
+    return digest.hexdigest(), content
+
+
+def encode_content(content):
+    """Stored form of a sample_verdict: the classifier version, then JSON or '' for ordinary contents"""
+    return f"{CLASSIFIER_VERSION}:{json.dumps(content) if content else ''}"
+
+
+def decode_content(stored):
+    """Inverse of encode_content; None (not classified yet, or by another classifier version) stays None"""
+    prefix = f"{CLASSIFIER_VERSION}:"
+    if stored is None or not stored.startswith(prefix):
+        return None
+    stored = stored[len(prefix):]
+    return json.loads(stored) if stored else ''
+
+
+def _within(path, directories):
+    """Whether path is one of directories or lies below one of them"""
+    while path not in directories:
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return True
+
+
+class StatCache:
+    """
+    Persisted path -> (inode, size, mtime_ns, hash, content classification) table,
+    plus path -> (signature, Merkle hash, summary) for directories
+
+    The entries under a scan root are loaded with one query before the scan
+    and written back in one transaction afterwards; entries of files and
+    directories that disappeared from the root are dropped.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.path = os.path.join(self.cache_dir, STAT_CACHE_FILE_NAME)
+        self._connection = None
+
+    @property
+    def available(self):
+        """Whether the cache can be used in this interpreter"""
+        return sqlite3 is not None
+
+    def _connect(self):
+        """Open (and initialise) the database on first use"""
+        if self._connection is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            connection.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                ' path TEXT PRIMARY KEY,'
+                ' inode INTEGER NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' mtime_ns INTEGER NOT NULL,'
+                ' hash TEXT NOT NULL,'
+                ' recorded_ns INTEGER NOT NULL,'
+                ' classification TEXT)'
+            )
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(files)')}
+            if 'classification' not in columns:
+                try:
+                    # Caches written before files were classified
+                    connection.execute('ALTER TABLE files ADD COLUMN classification TEXT')
+                except sqlite3.OperationalError:
+                    pass  # Another scan added it first
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS directories ('
+                ' path TEXT PRIMARY KEY,'
+                ' signature TEXT NOT NULL,'
+                ' hash TEXT NOT NULL,'
+                ' recorded_ns INTEGER NOT NULL,'
+                ' summary TEXT NOT NULL)'
+            )
+            self._connection = connection
+        return self._connection
+
+    @staticmethod
+    def _prefix_bounds(root):
+        prefix = os.path.join(root, '')
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    def load(self, root):
+        """
+        Entries for the files under root
+
+        Returns:
+            Dictionary path -> (inode, size, mtime_ns, hash, recorded_ns, classification);
+            classification is the stored encode_content text, or None
+        """
+        if not self.available:
+            return {}
+        try:
+            rows = self._connect().execute(
+                'SELECT path, inode, size, mtime_ns, hash, recorded_ns, classification'
+                ' FROM files WHERE path >= ? AND path < ?',
+                self._prefix_bounds(root)
+            ).fetchall()
+        except (sqlite3.Error, OSError):
+            # A busy or damaged cache only costs re-hashing
+            return {}
+        return {row[0]: row[1:] for row in rows}
+
+    def load_directories(self, root):
+        """
+        Directory entries for root and the directories under it
+
+        Returns:
+            Dictionary path -> (signature, hash, recorded_ns, summary JSON)
+        """
+        if not self.available:
+            return {}
+        try:
+            rows = self._connect().execute(
+                'SELECT path, signature, hash, recorded_ns, summary FROM directories'
+                ' WHERE path = ? OR (path >= ? AND path < ?)',
+                (root,) + self._prefix_bounds(root)
+            ).fetchall()
+        except (sqlite3.Error, OSError):
+            return {}
+        return {row[0]: row[1:] for row in rows}
+
+    def store(self, root, updates, seen, kept=frozenset(), directories=()):
+        """
+        Write the scan's new hashes back
+
+        Args:
+            root: Scanned directory
+            updates: (path, inode, size, mtime_ns, hash, recorded_ns, classification) rows to insert
+            seen: Set of every file path the scan hashed or reused
+            kept: Set of directories the scan found unchanged and did not descend
+                into; the entries below them are kept as they are
+            directories: (path, signature, hash, recorded_ns, summary) rows of
+                the directories the scan did descend into
+        """
+        if not self.available:
+            return False
+        try:
+            connection = self._connect()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                bounds = self._prefix_bounds(root)
+                stale = [(path,) for (path,) in connection.execute(
+                    'SELECT path FROM files WHERE path >= ? AND path < ?', bounds
+                ) if path not in seen and not _within(os.path.dirname(path), kept)]
+                connection.executemany('DELETE FROM files WHERE path = ?', stale)
+                connection.executemany(
+                    'INSERT OR REPLACE INTO files'
+                    ' (path, inode, size, mtime_ns, hash, recorded_ns, classification) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    updates
+                )
+                written = {row[0] for row in directories}
+                stale = [(path,) for (path,) in connection.execute(
+                    'SELECT path FROM directories WHERE path = ? OR (path >= ? AND path < ?)', (root,) + bounds
+                ) if path not in written and not _within(path, kept)]
+                connection.executemany('DELETE FROM directories WHERE path = ?', stale)
+                connection.executemany(
+                    'INSERT OR REPLACE INTO directories (path, signature, hash, recorded_ns, summary)'
+                    ' VALUES (?, ?, ?, ?, ?)',
+                    directories
+                )
+                connection.execute('COMMIT')
+            except sqlite3.Error:
+                connection.execute('ROLLBACK')
+                raise
+        except (sqlite3.Error, OSError):
+            return False
+        return True
+
+    def close(self):
+        """Close the database connection"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class DirectoryNode:
+    """One directory of the scanned tree, as found by the stat-only walk"""
+
+    __slots__ = ('path', 'rel_path', 'name', 'files', 'children', 'total_files', 'signature',
+                 'max_mtime_ns', 'error', 'digests', 'hash', 'summary')
+
+    def __init__(self, path, rel_path):
+        self.path = path
+        self.rel_path = rel_path
+        self.name = os.path.basename(path)
+        self.files = []  # (path, relative path, stat) of the analyzable files directly inside
+        self.children = []  # Subdirectories, in name order
+        self.total_files = 0  # Files directly inside that are not ignored
+        self.signature = None
+        self.max_mtime_ns = 0  # Newest file below, for the racy check
+        self.error = False  # Listing failed: never reused, never stored
+        self.digests = {}  # File name -> hash, filled while hashing
+        self.hash = None
+        self.summary = None
+
+
+def _merge_counts(into, other):
+    """Add the counters of one directory summary to another"""
+    for key, value in other.items():
+        if isinstance(value, dict):
+            target = into.setdefault(key, {})
+            for name, count in value.items():
+                target[name] = target.get(name, 0) + count
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+class DirectoryScanner:
+    """Walks a directory tree and streams one record per analyzable file or unchanged directory"""
+
+    def __init__(self, root, max_depth=DEFAULT_MAX_DEPTH, max_file_size=DEFAULT_MAX_FILE_SIZE,
+                 exclude_patterns=DEFAULT_EXCLUDE_PATTERNS, use_gitignore=True, workers=None,
+                 cache=None, output=None, classifier=None):
+        self.root = os.path.abspath(root)
+        self.max_depth = max_depth
+        self.max_file_size = max_file_size
+        self.exclude = IgnoreRules(exclude_patterns)
+        self.use_gitignore = use_gitignore
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.cache = cache
+        self.output = output or sys.stdout
+        self.classifier = classifier
+        # Everything besides the tree itself that decides what a directory contributes
+        self.options_digest = hashlib.sha256(json.dumps([
+            DIRECTORY_FORMAT_VERSION, list(exclude_patterns), max_depth, max_file_size, use_gitignore,
+            sorted(LANGUAGES), sorted(IGNORED_DIRS),
+            [CLASSIFIER_VERSION, list(classifier.force_paths)] if classifier is not None else None
+        ]).encode('utf-8')).hexdigest()
+        self.levels = dict.fromkeys(ANALYSIS_LEVELS, 0)
+        self.skip_reasons = {}
+        self.total_files = 0
+        self.analyzable = 0
+        self.hashed = 0
+        self.reused = 0
+        self.errors = 0
+        self.changed_directories = 0
+        self.unchanged_directories = 0
+        self.files_skipped = 0
+
+    def emit(self, record):
+        """Write one NDJSON record"""
+        self.output.write(json.dumps(record) + '\n')
+        self.output.flush()
+
+    def _file_record(self, path, size, digest, cached, verdict=None):
+        extension = os.path.splitext(path)[1]
+        record = {
+            "type": "file",
+            "filePath": path,
+            "relativePath": os.path.relpath(path, self.root),
+            "fileName": os.path.basename(path),
+            "extension": extension,
+            "language": LANGUAGES[extension.lower()],
+            "sizeBytes": size,
+            "hash": digest,
+            "cached": cached
+        }
+        if verdict is not None:
+            record.update(verdict)
+        return record
+
+    def _directory_record(self, node, unchanged):
+        return {
+            "type": "directory",
+            "directoryPath": node.path,
+            "relativePath": node.rel_path or '.',
+            "hash": node.hash,
+            "unchanged": unchanged,
+            "summary": node.summary
+        }
+
+    def _classify(self, path, rel_path, size, content):
+        """Prefilter verdict for a file whose content classification is known, or None"""
+        if self.classifier is None:
+            return None
+        verdict = self.classifier.classify(path, rel_path, size, content=content)
+        self.levels[verdict["analysis"]] += 1
+        if verdict["analysis"] == 'skip':
+            self.skip_reasons[verdict["reason"]] = self.skip_reasons.get(verdict["reason"], 0) + 1
+        return verdict
+
+    def _add_file(self, node, path, digest, size, verdict, record):
+        """Count a file into its directory's summary and emit its record"""
+        node.digests[os.path.basename(path)] = digest
+        summary = node.summary
+        summary["analyzableFiles"] += 1
+        summary["sizeBytes"] += size
+        language = record["language"]
+        summary["languages"][language] = summary["languages"].get(language, 0) + 1
+        if verdict is not None:
+            summary["analysis"][verdict["analysis"]] += 1
+            if verdict["analysis"] == 'skip':
+                summary["skipReasons"][verdict["reason"]] = summary["skipReasons"].get(verdict["reason"], 0) + 1
+        self.emit(record)
+
+    def _gitignore_signature(self, directory):
+        """Stat tuple of a directory's .gitignore, or '' when there is none"""
+        try:
+            stat = os.stat(os.path.join(directory, '.gitignore'))
+        except OSError:
+            return ''
+        return f'{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}'
+
+    def walk(self):
+        """
+        Walk the tree with stat calls only
+
+        Unreadable directories produce an error record and are skipped.
+        Directory signatures are computed bottom up once the walk is done.
+
+        Returns:
+            Root DirectoryNode
+        """
+        rules = [self.exclude]
+        root = DirectoryNode(self.root, '')
+        # (node, depth, ignore rules in effect, digest of the .gitignore files above)
+        stack = [(root, 0, len(rules), self.options_digest)]
+        order = []
+        while stack:
+            node, depth, rule_count, rules_digest = stack.pop()
+            order.append(node)
+            directory, rel_dir = node.path, node.rel_path
+            del rules[rule_count:]
+            if self.use_gitignore:
+                local = IgnoreRules.from_file(os.path.join(directory, '.gitignore'), rel_dir)
+                if local is not None:
+                    rules.append(local)
+                    rules_digest = hashlib.sha256(
+                        f'{rules_digest}\0{self._gitignore_signature(directory)}'.encode('utf-8')).hexdigest()
+            signature = hashlib.sha256(rules_digest.encode('utf-8'))
+
+            try:
+                with os.scandir(directory) as entries:
+                    entries = sorted(entries, key=lambda entry: entry.name)
+            except OSError as e:
+                self.errors += 1
+                node.error = True
+                self.emit({"type": "error", "path": directory, "error": str(e)})
+                entries = []
+
+            subdirectories = []
+            for entry in entries:
+                rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name in IGNORED_DIRS or entry.name.startswith('.'):
+                            continue
+                        if (self.max_depth <= 0 or depth + 1 < self.max_depth) and \
+                                not is_ignored(rules, rel_path, True):
+                            child = DirectoryNode(entry.path, rel_path)
+                            node.children.append(child)
+                            subdirectories.append((child, depth + 1, len(rules), rules_digest))
+                        continue
+                    if not entry.is_file() or is_ignored(rules, rel_path, False):
+                        continue
+                    self.total_files += 1
+                    node.total_files += 1
+                    if os.path.splitext(entry.name)[1].lower() not in LANGUAGES:
+                        signature.update(f'{entry.name}\n'.encode('utf-8', 'surrogateescape'))
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if self.max_file_size and stat.st_size > self.max_file_size:
+                    signature.update(f'{entry.name}\0{stat.st_size}\n'.encode('utf-8', 'surrogateescape'))
+                    continue
+                signature.update(f'{entry.name}\0{stat.st_ino}\0{stat.st_size}\0{stat.st_mtime_ns}\n'
+                                 .encode('utf-8', 'surrogateescape'))
+                node.max_mtime_ns = max(node.max_mtime_ns, stat.st_mtime_ns)
+                node.files.append((entry.path, rel_path, stat))
+            node.signature = signature.hexdigest()
+
+            # Reversed so the stack pops them in name order
+            stack.extend(reversed(subdirectories))
+
+        # Children come after their parent in walk order: fold them in bottom up
+        for node in reversed(order):
+            if node.children:
+                signature = hashlib.sha256(node.signature.encode('ascii'))
+                for child in node.children:
+                    signature.update(f'{child.name}\0{child.signature}\n'.encode('utf-8', 'surrogateescape'))
+                    node.max_mtime_ns = max(node.max_mtime_ns, child.max_mtime_ns)
+                    node.error = node.error or child.error
+                node.signature = signature.hexdigest()
+        return root
+
+    def _new_summary(self, node):
+        summary = {"totalFiles": node.total_files, "analyzableFiles": 0, "sizeBytes": 0, "languages": {}}
+        if self.classifier is not None:
+            summary["analysis"] = dict.fromkeys(ANALYSIS_LEVELS, 0)
+            summary["skipReasons"] = {}
+        return summary
+
+    def _split(self, root, stored):
+        """
+        Compare the walked tree with the stored directory entries
+
+        Returns:
+            Tuple of (directories to descend into, in walk order; unchanged
+            directories, whose records are emitted here)
+        """
+        changed = []
+        kept = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            entry = stored.get(node.path)
+            if entry is not None and not node.error and entry[0] == node.signature \
+                    and node.max_mtime_ns < entry[2] - RACY_WINDOW_NS:
+                node.hash = entry[1]
+                node.summary = json.loads(entry[3])
+                kept.append(node)
+                self.unchanged_directories += 1
+                self.files_skipped += node.summary["analyzableFiles"]
+                self.analyzable += node.summary["analyzableFiles"]
+                if self.classifier is not None:
+                    _merge_counts(self.levels, node.summary["analysis"])
+                    _merge_counts(self.skip_reasons, node.summary["skipReasons"])
+                self.emit(self._directory_record(node, True))
+                continue
+            node.summary = self._new_summary(node)
+            changed.append(node)
+            stack.extend(reversed(node.children))
+        return changed, kept
+
+    def _finish_directories(self, changed):
+        """Combine hashes and summaries bottom up and emit the changed directories' records"""
+        for node in reversed(changed):
+            digest = hashlib.sha256()
+            complete = not node.error and len(node.digests) == len(node.files)
+            for name in sorted(node.digests):
+                digest.update(f'f\0{name}\0{node.digests[name]}\n'.encode('utf-8', 'surrogateescape'))
+            for child in node.children:
+                complete = complete and child.hash is not None
+                digest.update(f'd\0{child.name}\0{child.hash}\n'.encode('utf-8', 'surrogateescape'))
+                _merge_counts(node.summary, child.summary)
+            node.hash = digest.hexdigest() if complete else None
+            self.changed_directories += 1
+            self.emit(self._directory_record(node, False))
+
+    def run(self):
+        """
+        Scan the tree, streaming file records as their hash becomes known
+
+        Returns:
+            Summary dictionary (also emitted as the final record)
+        """
+        started = time.perf_counter()
+        walked_ns = time.time_ns()
+        root = self.walk()
+        stored = self.cache.load_directories(self.root) if self.cache is not None else {}
+        changed, kept = self._split(root, stored)
+        cached = self.cache.load(self.root) if self.cache is not None and changed else {}
+        updates = []
+        seen = set()
+        max_pending = self.workers * QUEUE_DEPTH_PER_WORKER
+
+        def finish(future, node, path, rel_path, stat):
+            try:
+                digest, content = future.result()
+            except OSError as e:
+                self.errors += 1
+                self.emit({"type": "error", "path": path, "error": str(e)})
+                return
+            self.hashed += 1
+            seen.add(path)
+            updates.append((path, stat.st_ino, stat.st_size, stat.st_mtime_ns, digest, time.time_ns(),
+                            encode_content(content)))
+            verdict = self._classify(path, rel_path, stat.st_size, content)
+            self._add_file(node, path, digest, stat.st_size, verdict,
+                           self._file_record(path, stat.st_size, digest, False, verdict))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            in_flight = {}
+            for node in changed:
+                for path, rel_path, stat in node.files:
+                    self.analyzable += 1
+                    entry = cached.get(path)
+                    if entry is not None and entry[:3] == (stat.st_ino, stat.st_size, stat.st_mtime_ns) \
+                            and stat.st_mtime_ns < entry[4] - RACY_WINDOW_NS:
+                        content = decode_content(entry[5])
+                        if content is None and self.classifier is not None:
+                            # Hashed by a scan that did not classify; only the sample is read
+                            try:
+                                content = sample_verdict(read_sample(path))
+                            except OSError as e:
+                                self.errors += 1
+                                self.emit({"type": "error", "path": path, "error": str(e)})
+                                continue
+                            updates.append((path,) + tuple(entry[:5]) + (encode_content(content),))
+                        self.reused += 1
+                        seen.add(path)
+                        verdict = self._classify(path, rel_path, stat.st_size, content)
+                        self._add_file(node, path, entry[3], stat.st_size, verdict,
+                                       self._file_record(path, stat.st_size, entry[3], True, verdict))
+                        continue
+
+                    if len(in_flight) >= max_pending:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            finish(future, *in_flight.pop(future))
+                    in_flight[executor.submit(hash_and_sample, path)] = (node, path, rel_path, stat)
+
+            for future in list(in_flight):
+                finish(future, *in_flight.pop(future))
+
+        self._finish_directories(changed)
+        if self.cache is not None and changed:
+            self.cache.store(self.root, updates, seen, {node.path for node in kept}, [
+                (node.path, node.signature, node.hash, walked_ns, json.dumps(node.summary))
+                for node in changed if node.hash is not None
+            ])
+
+        summary = {
+            "type": "summary",
+            "directory": self.root,
+            "totalFiles": self.total_files,
+            "analyzableFiles": self.analyzable,
+            "nonAnalyzableFiles": self.total_files - self.analyzable,
+            "hashed": self.hashed,
+            "reused": self.reused,
+            "errors": self.errors,
+            "hash": root.hash,
+            "directories": {
+                "changed": self.changed_directories,
+                "unchanged": self.unchanged_directories,
+                "filesSkipped": self.files_skipped
+            },
+            "workers": self.workers,
+            "elapsedSeconds": round(time.perf_counter() - started, 3)
+        }
+        if self.classifier is not None:
+            summary["analysis"] = dict(self.levels)
+            summary["skipReasons"] = dict(sorted(self.skip_reasons.items()))
+        self.emit(summary)
+        return summary
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="List analyzable files with content hashes, streaming NDJSON")
+    parser.add_argument('directory', help="Directory to scan")
+    parser.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH,
+                        help="Directory levels to scan; 1 = direct children only, 0 = unlimited")
+    parser.add_argument('--max-file-size', type=int, default=DEFAULT_MAX_FILE_SIZE,
+                        help="Skip files larger than this many bytes (0 = no limit)")
+    parser.add_argument('--exclude', action='append', default=None,
+                        help="Glob to exclude (repeatable; replaces the default exclude list)")
+    parser.add_argument('--no-gitignore', action='store_true', help="Do not apply .gitignore files")
+    parser.add_argument('--workers', type=int, default=None, help="Hashing threads")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Stat cache directory (default: CODEXR_CACHE_DIR or ~/.cache/codexr)")
+    parser.add_argument('--no-cache', action='store_true', help="Hash every file, without the stat cache")
+    parser.add_argument('--force', action='append', default=[],
+                        help="Always classify this file, or everything under this directory, as full (repeatable)")
+    parser.add_argument('--no-classify', action='store_true',
+                        help="Do not classify files as skip/light/full")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(json.dumps({"type": "error", "error": f"Directory not found: {args.directory}"}))
+        sys.exit(1)
+
+    cache = None if args.no_cache else StatCache(args.cache_dir)
+    try:
+        DirectoryScanner(args.directory, max_depth=args.max_depth, max_file_size=args.max_file_size,
+                         exclude_patterns=args.exclude if args.exclude is not None else DEFAULT_EXCLUDE_PATTERNS,
+                         use_gitignore=not args.no_gitignore, workers=args.workers, cache=cache,
+                         classifier=None if args.no_classify else FileClassifier(args.force)).run()
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+if __name__ == "__main__":
+    main()
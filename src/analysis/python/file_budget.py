@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+File Budgets
+
+Per-file CPU time, memory and wall-clock limits, so one pathological file
+(a multi-megabyte minified bundle, deeply nested generated C) cannot stall a
+whole directory scan.
+
+run_with_budget runs an analysis in a forked child process. Inside the
+child, resource.setrlimit caps CPU time (RLIMIT_CPU) and memory
+(RLIMIT_AS: Linux does not enforce RLIMIT_RSS, so the child's address space
+may grow by at most the memory budget). The parent is the wall-clock
+watchdog: once the deadline passes it asks the child to stop and kills it
+after a short grace period.
+
+Running out of CPU or wall-clock time raises BudgetExceeded inside the
+child; running out of memory raises MemoryError. Analyzers turn either into
+a "timeout" or "oom" entry carrying the metrics gathered so far (lizard
+keeps the functions it finished), so the caller gets a structured record
+instead of a stuck or dead worker. The memory limit is lifted before that
+record is built (see release_memory_budget), so building it cannot run out
+of memory again. A child that dies without answering (hard CPU limit, kernel
+OOM killer, a native library aborting on a failed allocation) still yields
+a record, without partial metrics.
+
+Where fork or the resource module is unavailable (Windows) only the
+wall-clock watchdog applies.
+"""
+
+import os
+import signal
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Result statuses of a file that ran out of budget
+BUDGET_STATUSES = ('timeout', 'oom')
+
+# Extra CPU seconds between the soft limit (BudgetExceeded) and the hard limit
+# (SIGKILL) in which the child can still report its partial metrics
+CPU_GRACE_SECONDS = 2
+
+# How long the watchdog waits for partial metrics after stopping a child (seconds)
+WALL_GRACE_SECONDS = 2
+
+# Memory budget installed on this (child) process, for the "oom" message
+_memory_mb = None
+
+# Soft RLIMIT_AS of this (child) process before its memory budget was installed
+_memory_soft_limit = None
+
+
+class BudgetExceeded(BaseException):
+    """
+    Raised inside a budgeted child when a budget runs out
+
+    Derives from BaseException so the analyzers' `except Exception` handlers
+    do not turn it into an ordinary error entry.
+    """
+
+    def __init__(self, kind, message, partial=None):
+        super().__init__(message)
+        self.kind = kind
+        self.partial = partial
+
+    def record(self):
+        """Result entry for the interrupted analysis: the partial metrics plus status and error"""
+        entry = dict(self.partial) if self.partial else {}
+        entry["status"] = self.kind
+        entry["error"] = str(self)
+        return entry
+
+
+def release_memory_budget():
+    """
+    Lift this (child) process's memory budget again
+
+    Called first thing on a MemoryError, so the partial metrics and the
+    "oom" record can be built and sent. Does nothing when no memory budget
+    is in place or it was already lifted.
+    """
+    global _memory_soft_limit
+    if _memory_soft_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (_memory_soft_limit, resource.getrlimit(resource.RLIMIT_AS)[1]))
+        _memory_soft_limit = None
+
+
+def as_budget_error(error):
+    """
+    Normalize a budget failure; a MemoryError first lifts the memory budget
+
+    Args:
+        error: BudgetExceeded or MemoryError
+
+    Returns:
+        BudgetExceeded (a MemoryError becomes an "oom" one)
+    """
+    if isinstance(error, BudgetExceeded):
+        return error
+    release_memory_budget()
+    if _memory_mb is None:
+        return BudgetExceeded('oom', "Out of memory")
+    return BudgetExceeded('oom', f"Memory budget of {_memory_mb} MB exceeded")
+
+
+class FileBudget:
+    """Limits for analyzing one file; None disables a limit"""
+
+    def __init__(self, cpu_seconds=None, memory_mb=None, wall_seconds=None):
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_seconds = wall_seconds
+
+    @property
+    def enabled(self):
+        return any(limit is not None for limit in (self.cpu_seconds, self.memory_mb, self.wall_seconds))
+
+    def as_dict(self):
+        return {"cpuSeconds": self.cpu_seconds, "memoryMb": self.memory_mb, "wallSeconds": self.wall_seconds}
+
+
+def _address_space_bytes():
+    """Current virtual memory size of this process, or None where /proc is unavailable"""
+    try:
+        with open('/proc/self/statm', 'r') as statm:
+            return int(statm.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _raise_once(kind, message):
+    """Signal handler raising BudgetExceeded the first time it fires only, so reporting is not interrupted again"""
+    fired = []
+
+    def handler(signum, frame):
+        if not fired:
+            fired.append(signum)
+            raise BudgetExceeded(kind, message)
+    return handler
+
+
+def _apply_limits(budget):
+    """Install the budget on the current (child) process"""
+    global _memory_mb, _memory_soft_limit
+    if budget.wall_seconds is not None:
+        signal.signal(signal.SIGTERM, _raise_once(
+            'timeout', f"Wall-clock budget of {budget.wall_seconds}s exceeded"))
+    if resource is None:
+        return
+
+    if budget.cpu_seconds is not None:
+        # A forked child starts with no CPU time used
+        seconds = max(1, int(round(budget.cpu_seconds)))
+        signal.signal(signal.SIGXCPU, _raise_once('timeout', f"CPU time budget of {budget.cpu_seconds}s exceeded"))
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        limit = seconds + CPU_GRACE_SECONDS
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (min(seconds, limit), limit))
+
+    if budget.memory_mb is not None:
+        current = _address_space_bytes()
+        if current is not None:
+            soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+            limit = current + int(budget.memory_mb * 1024 * 1024)
+            if hard != resource.RLIM_INFINITY:
+                limit = min(limit, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+            _memory_mb = budget.memory_mb
+            _memory_soft_limit = soft
+
+
+def _budget_child(connection, budget, function, args):
+    """Child side: run function(*args) under the budget and send back its result"""
+    _apply_limits(budget)
+    try:
+        result = function(*args)
+    except (BudgetExceeded, MemoryError) as error:
+        result = as_budget_error(error).record()
+    except Exception as e:
+        result = {"error": str(e), "status": "error"}
+
+    # Pickling a large result needs memory of its own
+    release_memory_budget()
+    try:
+        connection.send(result)
+    except BudgetExceeded:
+        pass  # The parent sees the pipe close and reports the file without partial metrics
+    finally:
+        connection.close()
+
+
+def _children_cpu_seconds():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _stop(process, connection):
+    """Ask a child to stop (it reports its partial metrics), then kill it"""
+    process.terminate()
+    if connection.poll(WALL_GRACE_SECONDS):
+        try:
+            return connection.recv()
+        except EOFError:
+            pass
+    process.kill()
+    return None
+
+
+def _lost_result(budget, process, cpu_seconds):
+    """Record for a child that died without sending a result"""
+    if budget.cpu_seconds is not None and cpu_seconds >= budget.cpu_seconds:
+        return {"status": "timeout", "error": f"CPU time budget of {budget.cpu_seconds}s exceeded"}
+    if process.exitcode and budget.memory_mb is not None:
+        # Died without using up its CPU time: killed by the kernel's OOM killer, or
+        # a native library (e.g. OpenBLAS) gave up on an allocation and exited
+        return {"status": "oom", "error": f"Memory budget of {budget.memory_mb} MB exceeded"}
+    return {"error": f"Analysis process exited with code {process.exitcode}", "status": "error"}
+
+
+def run_with_budget(budget, function, *args):
+    """
+    Call function(*args) in a child process under budget
+
+    The function and its result must be picklable where fork is unavailable.
+    Not thread-safe: the CPU time of a child that dies is measured from this
+    process's reaped children.
+
+    Args:
+        budget: FileBudget
+        function: Analysis to run, returning a result dictionary
+        *args: Arguments for function
+
+    Returns:
+        The function's result, or a result with status "timeout" / "oom"
+        (and the partial metrics gathered so far) when the budget ran out;
+        budget failures carry a "budget" block with the limits
+    """
+    import multiprocessing
+
+    start_method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+    context = multiprocessing.get_context(start_method)
+    receiver, sender = context.Pipe(duplex=False)
+    cpu_before = _children_cpu_seconds()
+    process = context.Process(target=_budget_child, args=(sender, budget, function, args), daemon=True)
+    process.start()
+    sender.close()
+
+    result = None
+    try:
+        if receiver.poll(budget.wall_seconds):
+            result = receiver.recv()
+        else:
+            result = _stop(process, receiver) or {
+                "status": "timeout", "error": f"Wall-clock budget of {budget.wall_seconds}s exceeded"
+            }
+    except EOFError:
+        result = None
+    finally:
+        receiver.close()
+        process.join()
+
+    if result is None:
+        result = _lost_result(budget, process, _children_cpu_seconds() - cpu_before)
+    if isinstance(result, dict) and result.get("status") in BUDGET_STATUSES:
+        result["budget"] = budget.as_dict()
+    return result
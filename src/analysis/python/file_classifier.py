@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+File Classifier
+
+Cheap prefilter deciding how much analysis a file deserves before any
+analyzer runs. Minified bundles, generated sources and vendored libraries
+dominate analysis time and distort the metrics, so they are recognized from
+their path, their size and the first SAMPLE_BYTES of their contents only:
+
+  skip   not analyzed at all (vendored path, generated or minified file,
+         binary or encoded data)
+  light  only the linear-time analyzers run (LIGHT_FILE_OPS in
+         analyzer_ops.py); lizard is skipped (very large files, data-heavy
+         sources)
+  full   every analyzer runs
+
+Every verdict other than full carries a "reason" code and a human-readable
+"detail". Paths passed as forced (files, or directories covering everything
+under them) are always analyzed in full.
+
+Usage: python file_classifier.py <file_path> [<file_path> ...] [--force PATH ...]
+"""
+
+import sys
+import json
+import os
+import re
+import math
+from collections import Counter
+
+# Bump whenever the content heuristics (sample_verdict) change; invalidates
+# the verdicts kept in the directory scanner's stat cache
+CLASSIFIER_VERSION = '2'
+
+# Bytes read from the start of a file to classify it
+SAMPLE_BYTES = 8192
+
+ANALYSIS_LEVELS = ('skip', 'light', 'full')
+
+# Path components of third-party code checked into a tree
+VENDORED_DIRS = frozenset({
+    'node_modules', 'bower_components', 'jspm_packages', 'vendor', 'vendors',
+    'third_party', 'third-party', 'thirdparty', 'Pods', 'Carthage', 'site-packages'
+})
+
+# File names of minified bundles and of compiler / code generator output
+MINIFIED_NAME = re.compile(r'[.-]min\.(?:js|mjs|cjs|css)$|[.-]bundle\.js$', re.IGNORECASE)
+GENERATED_NAME = re.compile(
+    r'_pb2(?:_grpc)?\.py$|\.pb\.(?:go|cc|h|swift)$|_pb\.(?:js|ts)$|\.pb\.ts$|_grpc\.pb\.go$'
+    r'|\.g\.dart$|\.freezed\.dart$|\.designer\.cs$|\.g\.cs$|\.generated\.\w+$',
+    re.IGNORECASE
+)
+
+# Markers code generators put at the top of their output
+GENERATED_BANNER = re.compile(
+    rb'@generated\b|\bDO NOT EDIT\b|<auto-generated'
+    rb'|\bcode generated by\b|\bautogenerated by\b'
+    rb'|\bthis (?:file|code) (?:is|was|has been) (?:auto(?:matically)?[- ]?)?generated\b'
+    rb'|\bgenerated by the protocol buffer compiler\b'
+    rb'|\bgenerated by (?:protoc|flatc|thrift|swagger|openapi|antlr|bison|cython|sqlc)\b',
+    re.IGNORECASE
+)
+# The banner has to appear in the comments at the top of the file, within its first bytes
+BANNER_BYTES = 2048
+# Line prefixes of the comments a banner is written in (a mention in a string or in code does not count)
+BANNER_COMMENT_PREFIXES = (b'#', b'//', b'/*', b'*', b'<!--', b'--')
+# Block comment openers and their closers; the lines until the closer are comment lines too
+BANNER_BLOCK_COMMENTS = ((b'/*', b'*/'), (b'<!--', b'-->'))
+# Substrings every banner contains (lower case); the regex only runs when one is present
+BANNER_HINTS = (b'generat', b'do not edit')
+
+# Mean line length (bytes) of the sample above which a file is minified
+MINIFIED_MEAN_LINE = 300
+# ... and above which it is data-heavy (long table rows, embedded strings)
+LIGHT_MEAN_LINE = 120
+
+# Byte entropy of the start of the sample (bits per byte). Source code stays
+# below ~5.5, base64 is 6, compressed or binary data approaches 8.
+ENTROPY_BYTES = 4096
+DATA_ENTROPY = 5.95
+LIGHT_ENTROPY = 5.75
+
+# Files larger than this only get the light analyzers
+LIGHT_SIZE_BYTES = 512 * 1024
+
+
+def read_sample(file_path, size=SAMPLE_BYTES):
+    """
+    Read the start of a file
+
+    Args:
+        file_path: Path of the file
+        size: Number of bytes to read
+
+    Returns:
+        Up to size bytes
+    """
+    with open(file_path, 'rb') as file:
+        return file.read(size)
+
+
+def byte_entropy(data):
+    """Shannon entropy of a byte string in bits per byte"""
+    if not data:
+        return 0.0
+    total = len(data)
+    return -sum(count * math.log2(count / total) for count in Counter(data).values()) / total
+
+
+def leading_comments(head):
+    """
+    The comment lines at the top of a file, up to its first line of code
+
+    Args:
+        head: Bytes from the start of the file
+
+    Returns:
+        The comment lines joined by newlines (blank lines are skipped)
+    """
+    comments = []
+    closer = None
+    for line in head.split(b'\n'):
+        stripped = line.strip()
+        if closer is not None:
+            comments.append(stripped)
+            if closer in stripped:
+                closer = None
+            continue
+        if not stripped:
+            continue
+        if not stripped.startswith(BANNER_COMMENT_PREFIXES):
+            break
+        comments.append(stripped)
+        for opener, block_closer in BANNER_BLOCK_COMMENTS:
+            if stripped.startswith(opener) and block_closer not in stripped[len(opener):]:
+                closer = block_closer
+    return b'\n'.join(comments)
+
+
+def _verdict(analysis, reason, detail):
+    return {"analysis": analysis, "reason": reason, "detail": detail}
+
+
+def path_verdict(rel_path):
+    """
+    Classify a file by its path alone
+
+    Args:
+        rel_path: Path relative to the scanned root ('/' or os.sep separated)
+
+    Returns:
+        Verdict dictionary, or None when the path says nothing
+    """
+    parts = rel_path.replace(os.sep, '/').split('/')
+    for directory in parts[:-1]:
+        if directory in VENDORED_DIRS:
+            return _verdict('skip', 'vendored', f"inside {directory}/")
+    name = parts[-1]
+    if MINIFIED_NAME.search(name):
+        return _verdict('skip', 'minified', "minified file name")
+    if GENERATED_NAME.search(name):
+        return _verdict('skip', 'generated', "generated file name")
+    return None
+
+
+def sample_verdict(sample):
+    """
+    Classify a file by the first SAMPLE_BYTES of its contents
+
+    Args:
+        sample: Bytes from the start of the file
+
+    Returns:
+        Verdict dictionary, or None when the contents look like ordinary source
+    """
+    if not sample:
+        return None
+    if b'\0' in sample:
+        return _verdict('skip', 'binary', "contains NUL bytes")
+
+    head = sample[:BANNER_BYTES]
+    if any(hint in head.lower() for hint in BANNER_HINTS):
+        banner = GENERATED_BANNER.search(leading_comments(head))
+        if banner is not None:
+            return _verdict('skip', 'generated', f"banner \"{banner.group(0).decode('ascii', 'replace')}\"")
+
+    # A cut-off last line still counts: a sample without newlines is one huge line
+    mean_line = len(sample) / (sample.count(b'\n') + 1)
+    if mean_line >= MINIFIED_MEAN_LINE:
+        return _verdict('skip', 'minified', f"mean line length {mean_line:.0f}")
+
+    entropy = byte_entropy(sample[:ENTROPY_BYTES])
+    if entropy >= DATA_ENTROPY:
+        return _verdict('skip', 'data', f"byte entropy {entropy:.2f}")
+    if entropy >= LIGHT_ENTROPY:
+        return _verdict('light', 'dense', f"byte entropy {entropy:.2f}")
+    if mean_line >= LIGHT_MEAN_LINE:
+        return _verdict('light', 'long-lines', f"mean line length {mean_line:.0f}")
+    return None
+
+
+def size_verdict(size):
+    """Classify a file by its size in bytes; None below LIGHT_SIZE_BYTES"""
+    if size is not None and size > LIGHT_SIZE_BYTES:
+        return _verdict('light', 'large', f"{size} bytes")
+    return None
+
+
+class FileClassifier:
+    """Combines the path, content and size heuristics, honouring forced paths"""
+
+    def __init__(self, force_paths=()):
+        self.force_paths = tuple(os.path.abspath(path) for path in force_paths)
+
+    def is_forced(self, file_path):
+        """Whether file_path is, or lies under, a forced path"""
+        path = os.path.abspath(file_path)
+        return any(path == forced or path.startswith(os.path.join(forced, '')) for forced in self.force_paths)
+
+    def classify(self, file_path, rel_path=None, size=None, sample=None, content=None):
+        """
+        Decide how much analysis a file gets
+
+        Args:
+            file_path: Path of the file
+            rel_path: Path relative to the scanned root, for the vendored check
+                (default: file_path as given)
+            size: File size in bytes (default: stat the file)
+            sample: First SAMPLE_BYTES of the file (default: read them)
+            content: Stored result of sample_verdict, so the file is not read
+                again; "" (or False) for a file with ordinary contents
+
+        Returns:
+            Verdict dictionary: {"analysis": "full"} or with "reason" and "detail"
+        """
+        if self.is_forced(file_path):
+            return {"analysis": "full", "reason": "forced"}
+
+        verdict = path_verdict(rel_path if rel_path is not None else file_path)
+        if verdict is not None:
+            return verdict
+
+        if content is None:
+            if sample is None:
+                sample = read_sample(file_path)
+            content = sample_verdict(sample)
+        if content and content["analysis"] == 'skip':
+            return content
+
+        if size is None:
+            size = os.path.getsize(file_path)
+        return size_verdict(size) or content or {"analysis": "full"}
+
+
+def main():
+    """Main entry point"""
+    args = sys.argv[1:]
+    force_paths = []
+    while '--force' in args[:-1]:
+        index = args.index('--force')
+        force_paths.append(args[index + 1])
+        del args[index:index + 2]
+    if not args:
+        print(json.dumps({"error": "No file path provided", "status": "error"}))
+        sys.exit(1)
+
+    classifier = FileClassifier(force_paths)
+    for file_path in args:
+        try:
+            record = classifier.classify(file_path)
+        except OSError as e:
+            record = {"error": str(e), "status": "error"}
+        record["filePath"] = file_path
+        print(json.dumps(record))
+
+
+if __name__ == "__main__":
+    main()
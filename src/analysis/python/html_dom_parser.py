@@ -5,19 +5,97 @@ HTML DOM Parser
 This script parses HTML files and extracts DOM structure information.
 It's designed to be called from the TypeScript code in the CodeXR extension.
 
-Usage: python html_dom_parser.py <file_path>
+With --flat the tree is emitted as parallel arrays instead of nested
+objects (see encode_flat_dom); the raw HTML is only echoed back with
+--include-content. With --stdin the HTML is read from standard input (an
+unsaved editor buffer) and file_path is only used for reporting. With
+--codec the result is written as one binary frame (see output_codecs.py);
+trees deeper than CODEC_MAX_TREE_DEPTH are then always written flat.
+
+With --lod the domTree is a level-of-detail tree (see lod_tree) that stays
+small however big the page is: it is filled breadth-first and elements
+beyond --lod-depth levels or past the --lod-nodes budget are collapsed
+into aggregate nodes with descendant counts, a tag histogram and the
+deepest level below them; children that do not all fit are cut off by
+one "#more" aggregate node. Every node carries its "path"; --expand PATH
+returns the level-of-detail tree of the element at that path instead, with
+the same budgets, and --from N starts it at the element's child N (the
+"childStart" of a "#more" node).
+
+Usage: python html_dom_parser.py <file_path> [--stdin] [--flat] [--include-content] [--codec NAME]
+                                 [--lod] [--lod-depth N] [--lod-nodes N] [--expand PATH [--from N]]
+                                 [--profile] [--profile-dir DIR]
+       python html_dom_parser.py <file_path> --prepare-template [--stdin]
 """
 
 import sys
 import json
 import os
+import re
+import time
 from html.parser import HTMLParser
-from typing import Dict, List, Any, Optional
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from source_reader import read_source, read_stdin_source
+from profiling import add_serialize_time, timed, timer_from_args
+from output_codecs import codec_from_args, emit_result, write_result
+from file_budget import as_budget_error
+
+
+# Bump whenever the shape or meaning of the output changes (invalidates cached results)
+ANALYZER_VERSION = '3'
+
+# Deepest nested domTree written with --codec; orjson and msgpack refuse
+# documents nested more than a few hundred levels (two per element), so
+# deeper trees are written as domFlat instead
+CODEC_MAX_TREE_DEPTH = 100
+
+# Default budgets of a level-of-detail tree: levels below the requested
+# element and nodes in the whole tree
+LOD_MAX_DEPTH = 6
+LOD_MAX_NODES = 1000
+# Children shown per element before the rest become a "#more" node, so one
+# long list or table cannot use up the whole node budget
+LOD_MAX_CHILDREN = 50
+
+
+# Elements that never have content or an end tag
+VOID_ELEMENTS = frozenset({
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+    'meta', 'param', 'source', 'track', 'wbr'
+})
+
+_P_CLOSERS = frozenset({
+    'address', 'article', 'aside', 'blockquote', 'details', 'dialog', 'div', 'dl',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4',
+    'h5', 'h6', 'header', 'hgroup', 'hr', 'main', 'menu', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'ul'
+})
+
+# Open elements that a start tag closes implicitly (checked from the top of the stack)
+IMPLICIT_CLOSE: Dict[str, frozenset] = {tag: frozenset({'p'}) for tag in _P_CLOSERS}
+IMPLICIT_CLOSE.update({
+    'li': frozenset({'li', 'p'}),
+    'dt': frozenset({'dt', 'dd', 'p'}),
+    'dd': frozenset({'dt', 'dd', 'p'}),
+    'tr': frozenset({'tr', 'td', 'th'}),
+    'td': frozenset({'td', 'th'}),
+    'th': frozenset({'td', 'th'}),
+    'thead': frozenset({'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}),
+    'tbody': frozenset({'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}),
+    'tfoot': frozenset({'thead', 'tbody', 'tfoot', 'tr', 'td', 'th'}),
+    'option': frozenset({'option'}),
+    'optgroup': frozenset({'option', 'optgroup'}),
+    'rt': frozenset({'rt', 'rp'}),
+    'rp': frozenset({'rt', 'rp'}),
+})
 
 
 class DOMElement:
     """Represents a DOM element with its properties"""
     
+    __slots__ = ('tag_name', 'attributes', 'children', 'text_content', 'depth', 'id', 'classes')
+    
     def __init__(self, tag_name: str, attributes: Dict[str, str], depth: int = 0):
         self.tag_name = tag_name.lower()
         self.attributes = attributes
@@ -27,17 +105,60 @@ class DOMElement:
         self.id = attributes.get('id')
         self.classes = attributes.get('class', '').split() if attributes.get('class') else []
     
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for JSON serialization"""
+    def _fields(self, children: List[Any]) -> Dict[str, Any]:
+        """Dictionary form of this element with the given children list"""
         return {
             'tagName': self.tag_name,
             'attributes': self.attributes,
-            'children': [child.to_dict() for child in self.children],
+            'children': children,
             'textContent': self.text_content,
             'depth': self.depth,
             'id': self.id,
             'classes': self.classes
         }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization (iterative, any depth)"""
+        root = self._fields([])
+        stack = [(child, root['children']) for child in reversed(self.children)]
+        while stack:
+            element, siblings = stack.pop()
+            node = element._fields([])
+            siblings.append(node)
+            stack.extend((child, node['children']) for child in reversed(element.children))
+        return root
+
+
+def iter_dom_json(root: Optional[DOMElement]) -> Iterator[str]:
+    """
+    Serialize a DOM tree to JSON in chunks, with an explicit stack
+
+    Produces the same document as json.dumps(root.to_dict()) without
+    building the dictionaries or recursing, so arbitrarily deep trees work.
+    """
+    if root is None:
+        yield 'null'
+        return
+
+    dumps = json.dumps
+    # Each entry is an element to open, or the closing text of an element
+    stack: List[Any] = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+
+        yield f'{{"tagName": {dumps(item.tag_name)}, "attributes": {dumps(item.attributes)}, "children": ['
+        stack.append(
+            f'], "textContent": {dumps(item.text_content)}, "depth": {item.depth}, '
+            f'"id": {dumps(item.id)}, "classes": {dumps(item.classes)}}}'
+        )
+        children = item.children
+        for index in range(len(children) - 1, -1, -1):
+            stack.append(children[index])
+            if index:
+                stack.append(', ')
 
 
 class HTMLDOMParser(HTMLParser):
@@ -51,153 +172,638 @@ class HTMLDOMParser(HTMLParser):
         self.element_counts: Dict[str, int] = {}
         self.total_elements = 0
         self.max_depth = 0
-        self.current_text = ""
+        # Open elements per tag name, so stray end tags are rejected without a scan
+        self.open_counts: Dict[str, int] = {}
+        # Text seen since the last tag, joined once when the element closes
+        self.text_parts: List[str] = []
     
-    def handle_starttag(self, tag: str, attrs: List[tuple]):
-        """Handle opening tags"""
-        # Convert attributes to dictionary
-        attributes = dict(attrs)
+    def _add_element(self, tag: str, attrs: List[tuple]) -> DOMElement:
+        """Create an element under the current parent and update statistics"""
+        tag = tag.lower()
+        
+        # Close elements this tag ends implicitly (e.g. <li> closes an open <li>)
+        closes = IMPLICIT_CLOSE.get(tag)
+        while closes and self.element_stack and self.element_stack[-1].tag_name in closes:
+            self._pop_element()
         
         # Create new element
-        element = DOMElement(tag, attributes, self.current_depth)
+        element = DOMElement(tag, dict(attrs), self.current_depth)
         
         # Update statistics
         self.total_elements += 1
         self.max_depth = max(self.max_depth, self.current_depth)
-        self.element_counts[tag.lower()] = self.element_counts.get(tag.lower(), 0) + 1
+        self.element_counts[tag] = self.element_counts.get(tag, 0) + 1
         
-        # Add to parent or set as root
+        # Add to parent or set as root (later top-level elements, e.g. a stray
+        # tag after </html>, must not replace the tree)
         if self.element_stack:
             self.element_stack[-1].children.append(element)
-        else:
+        elif self.root is None:
             self.root = element
         
-        # Push to stack and increase depth
-        self.element_stack.append(element)
-        self.current_depth += 1
-        
         # Clear any accumulated text
-        self.current_text = ""
+        self.text_parts = []
+        return element
+    
+    def _pop_element(self):
+        """Close the innermost open element, keeping its accumulated text"""
+        element = self.element_stack.pop()
+        self.current_depth -= 1
+        self.open_counts[element.tag_name] -= 1
+        if self.text_parts:
+            text = ''.join(self.text_parts).strip()
+            if text:
+                element.text_content = text
+            self.text_parts = []
+    
+    def handle_starttag(self, tag: str, attrs: List[tuple]):
+        """Handle opening tags"""
+        element = self._add_element(tag, attrs)
+        
+        # Void elements have no content, so they never become a parent
+        if element.tag_name not in VOID_ELEMENTS:
+            self.element_stack.append(element)
+            self.current_depth += 1
+            self.open_counts[element.tag_name] = self.open_counts.get(element.tag_name, 0) + 1
+    
+    def handle_startendtag(self, tag: str, attrs: List[tuple]):
+        """Handle self-closing tags such as <br/> or <path ... />"""
+        self._add_element(tag, attrs)
     
     def handle_endtag(self, tag: str):
-        """Handle closing tags"""
-        if self.element_stack and self.element_stack[-1].tag_name == tag.lower():
-            # Add accumulated text content
-            if self.current_text.strip():
-                self.element_stack[-1].text_content = self.current_text.strip()
-            
-            # Pop from stack and decrease depth
-            self.element_stack.pop()
-            self.current_depth -= 1
-            self.current_text = ""
+        """Handle closing tags, closing any unclosed elements nested inside"""
+        tag = tag.lower()
+        stack = self.element_stack
+        
+        # Ignore stray end tags (including </br> and other void elements)
+        if not self.open_counts.get(tag):
+            return
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index].tag_name == tag:
+                break
+        else:
+            return
+        
+        while len(stack) > index:
+            self._pop_element()
     
     def handle_data(self, data: str):
         """Handle text content"""
-        self.current_text += data
+        self.text_parts.append(data)
     
-    def get_analysis_result(self, file_path: str) -> Dict[str, Any]:
-        """Get the complete analysis result"""
+    def get_analysis_result(self, file_path: str, flat: bool = False, include_tree: bool = True,
+                            detail: Optional['DetailBudget'] = None) -> Dict[str, Any]:
+        """
+        Get the complete analysis result (include_tree=False leaves domTree as None)
+
+        With a DetailBudget the domTree is the level-of-detail tree of the
+        element at detail.path (flat is then ignored) and a "lod" block
+        describes it.
+        """
+        if detail is not None:
+            element = find_element(self.root, detail.path)
+            if element is None:
+                raise ValueError(f"No element at path {detail.path!r}")
+            tree = lod_tree(element, detail.path, detail.max_depth, detail.max_nodes, detail.start)
+            result = self.get_analysis_result(file_path, include_tree=False)
+            result['domTree'] = tree
+            result['lod'] = dict(detail.as_dict(), **tree.pop('lodCounts'))
+            return result
+        if flat:
+            tree_key, tree = 'domFlat', encode_flat_dom(self.root)
+        else:
+            tree_key, tree = 'domTree', self.root.to_dict() if self.root and include_tree else None
         return {
             'fileName': os.path.basename(file_path),
             'filePath': file_path,
             'totalElements': self.total_elements,
             'maxDepth': self.max_depth,
-            'domTree': self.root.to_dict() if self.root else None,
+            tree_key: tree,
             'elementCounts': self.element_counts,
             'timestamp': '',  # Will be set by TypeScript
         }
 
 
-def analyze_html_file(file_path: str) -> Dict[str, Any]:
-    """Analyze an HTML file and return DOM structure"""
+def encode_flat_dom(root: Optional[DOMElement]) -> Dict[str, Any]:
+    """
+    Encode a DOM tree as parallel arrays (nodes in document order)
+
+    parent[i] is the index of node i's parent (-1 for the root), tag[i]
+    indexes the interned tag table and text[i] the shared string table
+    (-1 for no text). The attributes of node i are the (name, value) string
+    index pairs attrs[2*k], attrs[2*k+1] for attrStart[i] <= k < attrStart[i+1];
+    a value of -1 means the attribute had no value. id and classes are not
+    repeated since they can be read from the attributes.
+    """
+    tags: List[str] = []
+    tag_ids: Dict[str, int] = {}
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+    parents: List[int] = []
+    tag_column: List[int] = []
+    depths: List[int] = []
+    texts: List[int] = []
+    attr_start: List[int] = []
+    attrs: List[int] = []
+
+    def intern(value: Optional[str]) -> int:
+        if value is None:
+            return -1
+        index = string_ids.get(value)
+        if index is None:
+            index = string_ids[value] = len(strings)
+            strings.append(value)
+        return index
+
+    stack = [(root, -1)] if root is not None else []
+    while stack:
+        element, parent = stack.pop()
+        index = len(parents)
+
+        tag_id = tag_ids.get(element.tag_name)
+        if tag_id is None:
+            tag_id = tag_ids[element.tag_name] = len(tags)
+            tags.append(element.tag_name)
+
+        parents.append(parent)
+        tag_column.append(tag_id)
+        depths.append(element.depth)
+        texts.append(intern(element.text_content) if element.text_content else -1)
+        attr_start.append(len(attrs) // 2)
+        for name, value in element.attributes.items():
+            attrs.append(intern(name))
+            attrs.append(intern(value))
+
+        # Reversed so children are visited (and numbered) in document order
+        for child in reversed(element.children):
+            stack.append((child, index))
+
+    attr_start.append(len(attrs) // 2)
+
+    return {
+        'nodeCount': len(parents),
+        'tags': tags,
+        'strings': strings,
+        'parent': parents,
+        'tag': tag_column,
+        'depth': depths,
+        'text': texts,
+        'attrStart': attr_start,
+        'attrs': attrs,
+    }
+
+
+def decode_flat_dom(flat: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Rebuild the nested domTree dictionary from encode_flat_dom output"""
+    strings = flat['strings']
+    attrs = flat['attrs']
+    nodes: List[Dict[str, Any]] = []
+
+    for index in range(flat['nodeCount']):
+        attributes = {}
+        for k in range(flat['attrStart'][index], flat['attrStart'][index + 1]):
+            value = attrs[2 * k + 1]
+            attributes[strings[attrs[2 * k]]] = strings[value] if value >= 0 else None
+        text = flat['text'][index]
+        node = {
+            'tagName': flat['tags'][flat['tag'][index]],
+            'attributes': attributes,
+            'children': [],
+            'textContent': strings[text] if text >= 0 else "",
+            'depth': flat['depth'][index],
+            'id': attributes.get('id'),
+            'classes': attributes.get('class', '').split() if attributes.get('class') else []
+        }
+        nodes.append(node)
+        parent = flat['parent'][index]
+        if parent >= 0:
+            nodes[parent]['children'].append(node)
+
+    return nodes[0] if nodes else None
+
+
+class DetailBudget:
+    """Budgets of a level-of-detail tree and the element (and first child) it starts at"""
+
+    def __init__(self, max_depth: int = LOD_MAX_DEPTH, max_nodes: int = LOD_MAX_NODES, path: str = '',
+                 start: int = 0):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.path = path
+        self.start = start
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'path': self.path, 'childStart': self.start, 'maxDepth': self.max_depth, 'maxNodes': self.max_nodes}
+
+
+def find_element(root: Optional[DOMElement], path: str) -> Optional[DOMElement]:
+    """
+    Look up an element by path: dot-separated child indices from the root
+    ("" is the root, "2.0" the first child of its third child)
+
+    Returns:
+        The element, or None when the path does not exist
+    """
+    element = root
+    for part in path.split('.') if path else []:
+        if element is None or not part.isdigit() or int(part) >= len(element.children):
+            return None
+        element = element.children[int(part)]
+    return element
+
+
+def summarize_elements(elements: List[DOMElement], max_depth: int = 0) -> Dict[str, Any]:
+    """
+    Aggregate of some elements and everything below them
+
+    Returns:
+        Dictionary with the element count ("descendantCount"), the tag
+        histogram (most frequent first) and the deepest level (absolute depth,
+        at least max_depth)
+    """
+    counts: Dict[str, int] = {}
+    total = 0
+    stack = list(elements)
+    while stack:
+        node = stack.pop()
+        total += 1
+        counts[node.tag_name] = counts.get(node.tag_name, 0) + 1
+        if node.depth > max_depth:
+            max_depth = node.depth
+        stack.extend(node.children)
+    return {
+        'descendantCount': total,
+        'tagCounts': dict(sorted(counts.items(), key=lambda item: (-item[1], item[0]))),
+        'maxDepth': max_depth
+    }
+
+
+def _more_node(parent: DOMElement, path: str, start: int) -> Dict[str, Any]:
+    """Aggregate node standing for the children of parent from index start on"""
+    summary = summarize_elements(parent.children[start:], parent.depth + 1)
+    summary['siblingCount'] = len(parent.children) - start
+    return {
+        'tagName': '#more',
+        'attributes': {},
+        'children': [],
+        'textContent': '',
+        'depth': parent.depth + 1,
+        'id': None,
+        'classes': [],
+        'path': path,
+        'childStart': start,
+        'collapsed': summary
+    }
+
+
+def lod_tree(element: DOMElement, path: str = '', max_depth: int = LOD_MAX_DEPTH,
+             max_nodes: int = LOD_MAX_NODES, start: int = 0,
+             max_children: int = LOD_MAX_CHILDREN) -> Dict[str, Any]:
+    """
+    Level-of-detail tree of the subtree rooted at element
+
+    The tree is filled breadth-first, so the upper levels are always shown.
+    An element max_depth levels below the start element, or reached once
+    the max_nodes budget is used up, keeps empty "children" and gets a
+    "collapsed" block (see summarize_elements) with its descendants. When
+    only some of an element's children fit (or it has more than
+    max_children), the rest are replaced by one "#more" node whose "path"
+    (the parent's) and "childStart" expand them.
+    Collapsed subtrees never overlap, so building the tree is linear in the
+    size of the subtree.
+
+    Args:
+        element: Element the tree starts at
+        path: Path of element (see find_element); nodes carry their own "path"
+        max_depth: Levels below element that can be shown
+        max_nodes: Most nodes in the tree, aggregate nodes included
+        start: Index of the first child of element to show
+        max_children: Most children shown per element
+
+    Returns:
+        Nested domTree dictionary; its "lodCounts" member holds the node and
+        collapsed node counts
+    """
+    root = element._fields([])
+    root['path'] = path
+    queue = [(element, root, path, 0, start)]
+    node_count = 1
+    collapsed = 0
+
+    # The queue only grows at its end: iterate by index instead of popping
+    for parent, node, parent_path, level, first in queue:
+        children = parent.children
+        if len(children) <= first:
+            continue
+        room = min(max_nodes - node_count, max_children + 1)
+        shown = len(children) - first
+        if level < max_depth and shown > room:
+            shown = room - 1  # One node left for the #more aggregate
+        if level >= max_depth or shown <= 0:
+            node['collapsed'] = summarize_elements(children[first:], parent.depth)
+            collapsed += 1
+            continue
+
+        prefix = f"{parent_path}." if parent_path else ''
+        for index in range(first, first + shown):
+            child = children[index]
+            child_node = child._fields([])
+            child_node['path'] = f"{prefix}{index}"
+            node['children'].append(child_node)
+            queue.append((child, child_node, child_node['path'], level + 1, 0))
+        node_count += shown
+        if first + shown < len(children):
+            node['children'].append(_more_node(parent, parent_path, first + shown))
+            node_count += 1
+            collapsed += 1
+
+    root['lodCounts'] = {'nodeCount': node_count, 'collapsedCount': collapsed}
+    return root
+
+
+def parse_html(html_content: str) -> HTMLDOMParser:
+    """Parse HTML into a DOM tree held by the returned parser"""
+    parser = HTMLDOMParser()
+    parser.feed(html_content)
+    parser.close()
+    return parser
+
+
+def write_analysis_json(parser: HTMLDOMParser, file_path: str, stream: TextIO, flat: bool = False,
+                        html_content: Optional[str] = None, timer: Optional[Any] = None):
+    """
+    Write the analysis result as one JSON line, streaming the nested domTree
+    in chunks instead of building it as dictionaries first
+
+    With a PhaseTimer, a timings block (including the time spent writing)
+    is appended as the last member.
+    """
+    started = time.perf_counter()
+    result = parser.get_analysis_result(file_path, flat, include_tree=False)
+    if html_content is not None:
+        result['htmlContent'] = html_content
+
+    buffer: List[str] = ['{']
+    for index, (key, value) in enumerate(result.items()):
+        buffer.append(f"{', ' if index else ''}{json.dumps(key)}: ")
+        if key == 'domTree':
+            for chunk in iter_dom_json(parser.root):
+                buffer.append(chunk)
+                if len(buffer) >= 4096:
+                    stream.write(''.join(buffer))
+                    buffer.clear()
+        else:
+            buffer.append(json.dumps(value))
+    if timer is not None:
+        timings = add_serialize_time(timer.as_dict(), time.perf_counter() - started)
+        buffer.append(f', "timings": {json.dumps(timings)}')
+    buffer.append('}\n')
+    stream.write(''.join(buffer))
+    stream.flush()
+
+
+def analyze_html_file(file_path: str, flat: bool = False, include_content: bool = False,
+                      timer: Optional[Any] = None, detail: Optional[DetailBudget] = None) -> Dict[str, Any]:
+    """Analyze an HTML file and return DOM structure (timer: optional PhaseTimer, detail: see lod_tree)"""
     try:
         # Check if file exists
         if not os.path.exists(file_path):
             return {"error": f"File not found: {file_path}"}
         
         # Read the HTML file
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-            html_content = file.read()
+        html_content = read_source(file_path, timer)
+        
+        with timed(timer, 'parse'):
+            return analyze_html_content(file_path, html_content, flat, include_content, detail)
         
+    except Exception as e:
+        return {"error": f"Error parsing HTML file: {str(e)}"}
+
+
+def analyze_html_content(file_path: str, html_content: str, flat: bool = False,
+                         include_content: bool = False, detail: Optional[DetailBudget] = None) -> Dict[str, Any]:
+    """
+    Analyze already-decoded HTML and return DOM structure
+
+    flat selects the array encoding (domFlat) instead of the nested domTree;
+    include_content echoes the raw HTML back as htmlContent; detail returns
+    a level-of-detail domTree instead (see lod_tree).
+    """
+    try:
         # Parse the HTML
-        parser = HTMLDOMParser()
-        parser.feed(html_content)
+        parser = parse_html(html_content)
         
         # Get analysis result
-        result = parser.get_analysis_result(file_path)
-        result['htmlContent'] = html_content
+        result = parser.get_analysis_result(file_path, flat, detail=detail)
+        if include_content:
+            result['htmlContent'] = html_content
         
         return result
         
+    except MemoryError as error:
+        # Out of the file's memory budget (see file_budget.py), not a parse error
+        raise as_budget_error(error) from None
     except Exception as e:
         return {"error": f"Error parsing HTML file: {str(e)}"}
 
 
-def prepare_html_for_template(html_content: str, file_name: str) -> str:
-    """Prepare HTML content for babia-html template injection"""
-    try:
-        # Extract body content
-        body_start = html_content.lower().find('<body')
-        body_end = html_content.lower().find('</body>')
-        
-        if body_start != -1 and body_end != -1:
-            # Find the end of the opening body tag
-            body_tag_end = html_content.find('>', body_start)
-            if body_tag_end != -1:
-                html_content = html_content[body_tag_end + 1:body_end].strip()
-        else:
-            # Try to extract content between <html> tags and remove head
-            html_start = html_content.lower().find('<html')
-            html_end = html_content.lower().find('</html>')
-            
-            if html_start != -1 and html_end != -1:
-                html_tag_end = html_content.find('>', html_start)
-                if html_tag_end != -1:
-                    content = html_content[html_tag_end + 1:html_end]
-                    
-                    # Remove head section
-                    head_start = content.lower().find('<head')
-                    head_end = content.lower().find('</head>')
-                    
-                    if head_start != -1 and head_end != -1:
-                        head_end_tag = content.find('>', head_end)
-                        if head_end_tag != -1:
-                            content = content[:head_start] + content[head_end_tag + 1:]
-                    
-                    html_content = content.strip()
-        
-        # Clean up the HTML content
-        import re
-        
-        # Remove comments, scripts, and styles
-        html_content = re.sub(r'<!--[\s\S]*?-->', '', html_content)
-        html_content = re.sub(r'<script[\s\S]*?</script>', '', html_content, flags=re.IGNORECASE)
-        html_content = re.sub(r'<style[\s\S]*?</style>', '', html_content, flags=re.IGNORECASE)
-        
-        # Normalize whitespace
-        html_content = re.sub(r'\r\n|\n|\r|\t', ' ', html_content)
-        html_content = re.sub(r'\s+', ' ', html_content)
-        html_content = html_content.strip()
-        
-        # Truncate if too long
-        if len(html_content) > 3000:
+# Size budget of the HTML injected into the babia-html template
+TEMPLATE_CHAR_LIMIT = 3000
+# Cut at the last tag end when it is at least this far into the budget
+TEMPLATE_MIN_CUT = 2500
+# Characters read per chunk when extracting from a file
+TEMPLATE_READ_CHUNK = 64 * 1024
+
+_TEMPLATE_TOKEN = re.compile(r'<(?:!--|(/?)(script|style|head|body|html)(?=[\s>/]))', re.IGNORECASE)
+_TEMPLATE_SKIP_END = {
+    '!--': re.compile(r'-->'),
+    'script': re.compile(r'</script\s*>', re.IGNORECASE),
+    'style': re.compile(r'</style\s*>', re.IGNORECASE),
+    'head': re.compile(r'</head\s*>', re.IGNORECASE),
+}
+_WHITESPACE = re.compile(r'\s+')
+# Longest text a split token or terminator can need from the previous chunk
+_TEMPLATE_TAIL = 16
+
+
+class TemplateExtractor:
+    """
+    Single forward pass that extracts the visible body markup of a document
+
+    Text is taken from inside <body> (or <html> without its <head> when
+    there is no body), comments, scripts and styles are dropped and
+    whitespace is collapsed as the text is emitted. Feeding stops as soon
+    as the character budget is exceeded, so only the start of a large
+    document is ever read.
+    """
+
+    def __init__(self, limit: int = TEMPLATE_CHAR_LIMIT):
+        self.limit = limit
+        self.done = False
+        self._parts: List[str] = []
+        self._length = 0
+        self._last_space = True  # drops leading whitespace
+        self._pending = ''
+        self._skip_until: Optional[Any] = None
+        self._in_html = False
+        self._in_body = False
+
+    def _clear(self):
+        """Discard what was emitted before the <html>/<body> start tag"""
+        self._parts = []
+        self._length = 0
+        self._last_space = True
+
+    def _emit(self, text: str):
+        """Append text with whitespace runs collapsed to single spaces"""
+        if not text or self.done:
+            return
+        text = _WHITESPACE.sub(' ', text)
+        if self._last_space and text.startswith(' '):
+            text = text[1:]
+        if not text:
+            return
+        # One character past the budget (plus a separating space) is enough
+        # to know the output must be truncated
+        room = self.limit + 2 - self._length
+        if len(text) >= room:
+            text = text[:room]
+            self.done = True
+        self._parts.append(text)
+        self._length += len(text)
+        self._last_space = text.endswith(' ')
+
+    def feed(self, chunk: str):
+        """Process the next piece of the document"""
+        buffer = self._pending + chunk
+        self._pending = ''
+        pos = 0
+
+        while not self.done:
+            if self._skip_until is not None:
+                match = self._skip_until.search(buffer, pos)
+                if match is None:
+                    self._pending = buffer[-_TEMPLATE_TAIL:]
+                    return
+                self._skip_until = None
+                pos = match.end()
+                continue
+
+            match = _TEMPLATE_TOKEN.search(buffer, pos)
+            if match is None:
+                # A '<' near the end may be the start of a token split across chunks
+                safe = buffer.rfind('<', pos)
+                if safe == -1 or len(buffer) - safe > _TEMPLATE_TAIL:
+                    safe = len(buffer)
+                self._emit(buffer[pos:safe])
+                self._pending = buffer[safe:]
+                return
+
+            self._emit(buffer[pos:match.start()])
+            closing = bool(match.group(1))
+            name = (match.group(2) or '!--').lower()
+            pos = match.end()
+
+            if name in ('!--', 'script', 'style') and not closing:
+                self._skip_until = _TEMPLATE_SKIP_END[name]
+            elif name == 'head' and not closing and self._in_html and not self._in_body:
+                self._skip_until = _TEMPLATE_SKIP_END['head']
+            elif name in ('html', 'body') and not closing and not self._in_body:
+                tag_end = buffer.find('>', pos)
+                if tag_end == -1:
+                    self._pending = buffer[match.start():]
+                    return
+                pos = tag_end + 1
+                self._clear()
+                if name == 'body':
+                    self._in_body = True
+                self._in_html = True
+            elif closing and ((name == 'body' and self._in_body) or (name == 'html' and self._in_html)):
+                self.done = True
+            else:
+                self._emit(match.group())
+
+    def result(self) -> str:
+        """The extracted markup, cut to the budget at a tag boundary when possible"""
+        if not self.done and self._pending and self._skip_until is None:
+            self._emit(self._pending)
+        html_content = ''.join(self._parts).strip()
+
+        if len(html_content) > self.limit:
             # Try to find a good cutting point
-            cut_point = html_content.rfind('>', 0, 3000)
-            if cut_point > 2500:
+            cut_point = html_content.rfind('>', 0, self.limit)
+            if cut_point > TEMPLATE_MIN_CUT:
                 html_content = html_content[:cut_point + 1]
             else:
-                html_content = html_content[:3000]
-        
-        # Ensure we have some content
-        if not html_content or len(html_content) < 10:
-            html_content = f'<div><h1>Sample Content</h1><p>HTML content extracted from {file_name}</p></div>'
-        
+                html_content = html_content[:self.limit]
         return html_content
+
+
+def _finish_template(html_content: str, file_name: str) -> str:
+    """Ensure we have some content"""
+    if not html_content or len(html_content) < 10:
+        html_content = f'<div><h1>Sample Content</h1><p>HTML content extracted from {file_name}</p></div>'
+    return html_content
+
+
+def prepare_html_for_template(html_content: str, file_name: str) -> str:
+    """Prepare HTML content for babia-html template injection"""
+    try:
+        extractor = TemplateExtractor()
+        extractor.feed(html_content)
+        return _finish_template(extractor.result(), file_name)
+        
+    except Exception as e:
+        return f'<div><h1>Error</h1><p>Failed to process HTML: {str(e)}</p></div>'
+
+
+def prepare_html_file_for_template(file_path: str) -> str:
+    """
+    Prepare an HTML file for babia-html template injection, reading it in
+    chunks and stopping as soon as the template budget is filled
+    """
+    file_name = os.path.basename(file_path)
+    try:
+        extractor = TemplateExtractor()
+        with open(file_path, 'r', encoding='utf-8-sig', errors='ignore') as file:
+            while not extractor.done:
+                chunk = file.read(TEMPLATE_READ_CHUNK)
+                if not chunk:
+                    break
+                extractor.feed(chunk)
+        return _finish_template(extractor.result(), file_name)
         
     except Exception as e:
         return f'<div><h1>Error</h1><p>Failed to process HTML: {str(e)}</p></div>'
 
 
+def detail_from_args(options: List[str]) -> Optional[DetailBudget]:
+    """
+    DetailBudget selected by --lod, --lod-depth, --lod-nodes, --expand and --from
+
+    Returns:
+        DetailBudget, or None without any of these options
+
+    Raises:
+        ValueError: For a budget or child index that is not a valid integer
+    """
+    values = {}
+    for name in ('--lod-depth', '--lod-nodes', '--expand', '--from'):
+        if name in options[:-1]:
+            values[name] = options[options.index(name) + 1]
+    if '--lod' not in options and not values:
+        return None
+
+    numbers = []
+    for name, default, minimum in (('--lod-depth', LOD_MAX_DEPTH, 1), ('--lod-nodes', LOD_MAX_NODES, 2),
+                                   ('--from', 0, 0)):
+        value = values.get(name, str(default))
+        if not value.isdigit() or int(value) < minimum:
+            raise ValueError(f"{name} must be an integer of at least {minimum}, got {value!r}")
+        numbers.append(int(value))
+    return DetailBudget(numbers[0], numbers[1], values.get('--expand', ''), numbers[2])
+
+
 def main():
     """Main entry point"""
     if len(sys.argv) < 2:
@@ -206,14 +812,18 @@ def main():
         sys.exit(1)
 
     file_path = sys.argv[1]
+    options = sys.argv[2:]
+    stdin = '--stdin' in options
     
     # Check if this is a template preparation request
     if len(sys.argv) > 2 and sys.argv[2] == '--prepare-template':
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
-                html_content = file.read()
-            
-            prepared_html = prepare_html_for_template(html_content, os.path.basename(file_path))
+            if stdin:
+                prepared_html = prepare_html_for_template(read_stdin_source(), os.path.basename(file_path))
+            elif not os.path.exists(file_path):
+                raise FileNotFoundError(f"File not found: {file_path}")
+            else:
+                prepared_html = prepare_html_file_for_template(file_path)
             result = {"preparedHTML": prepared_html}
             print(json.dumps(result))
         except Exception as e:
@@ -222,10 +832,58 @@ def main():
         return
     
     # Regular DOM analysis
-    result = analyze_html_file(file_path)
+    if not stdin and not os.path.exists(file_path):
+        print(json.dumps({"error": f"File not found: {file_path}"}))
+        return
+    
+    try:
+        codec = codec_from_args(options)
+        detail = detail_from_args(options)
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
+    timer = timer_from_args(options)
+    
+    def analyze_and_write():
+        try:
+            html_content = read_stdin_source(timer) if stdin else read_source(file_path, timer)
+            with timed(timer, 'parse'):
+                parser = parse_html(html_content)
+        except Exception as e:
+            print(json.dumps({"error": f"Error parsing HTML file: {str(e)}"}))
+            return
+        
+        if detail is not None:
+            # Level-of-detail tree: small by construction, built as dictionaries
+            try:
+                result = parser.get_analysis_result(file_path, detail=detail)
+            except ValueError as e:
+                print(json.dumps({"error": str(e)}))
+                return
+            if '--include-content' in options:
+                result['htmlContent'] = html_content
+            emit_result(result, codec, timer)
+            return
+        
+        if codec is not None:
+            # One --codec frame (see output_codecs.py) built from the result dictionary
+            flat = '--flat' in options or parser.max_depth > CODEC_MAX_TREE_DEPTH
+            result = parser.get_analysis_result(file_path, flat)
+            if '--include-content' in options:
+                result['htmlContent'] = html_content
+            write_result(result, codec, timer)
+            return
+        
+        # Output as JSON, streamed so deep or large trees are never held twice
+        write_analysis_json(parser, file_path, sys.stdout, flat='--flat' in options,
+                            html_content=html_content if '--include-content' in options else None,
+                            timer=timer)
     
-    # Output as JSON
-    print(json.dumps(result))
+    if timer is not None:
+        # --profile / --profile-dir: add per-phase timings to the output
+        timer.run(file_path, analyze_and_write)
+    else:
+        analyze_and_write()
 
 
 if __name__ == "__main__":
@@ -5,75 +5,659 @@ Lizard Code Analyzer Wrapper
 This script runs the Lizard code analysis tool and outputs the results in JSON format.
 It's designed to be called from the TypeScript code in the CodeXR extension.
 
-Usage: python lizard_analyzer.py <file_path>
+Every result lists the file's top-level blocks (outermost functions, with the
+functions nested in them) together with a hash of their text. Passing that
+result back with --previous and the edited line ranges with --changed
+re-analyzes only the blocks an edit touched: untouched blocks are blanked out
+before lizard runs and their cached metrics are shifted to their new lines.
+
+With --stdin the source is read from standard input (an unsaved editor
+buffer); file_path is then only used to pick the language and for reporting.
+
+Usage: python lizard_analyzer.py <file_path> [--stdin] [--codec NAME] [--profile] [--profile-dir DIR]
+       python lizard_analyzer.py <file_path> [--stdin] --previous RESULT.json --changed START-END:LINES[,...]
+
+--changed lists edits against the previous version of the file: old lines
+START..END (1-based, inclusive) were replaced by LINES lines. A pure insertion
+before old line N is N-(N-1):LINES.
 """
 
 import sys
 import json
 import os
-import lizard
+import re
+import hashlib
+
+from lizard_loader import load_lizard
+from source_reader import read_source, read_stdin_source
+from profiling import timed, timer_from_args
+from complexity_stats import FunctionColumns, complexity_metrics
+from output_codecs import codec_from_args, emit_result
+from file_budget import BudgetExceeded, as_budget_error
+
+# Only the language reader needed for the analyzed file gets imported
+lizard = load_lizard()
+
+
+# Bump whenever the shape or meaning of the output changes (invalidates cached results)
+ANALYZER_VERSION = '3'
+
+# Brackets that must nest properly inside text that is blanked out or re-parsed
+# on its own; an unbalanced edit can change how the rest of the file parses.
+# Block comments and single-line string literals are skipped whole.
+_CLOSING_BRACKETS = {'(': ')', '[': ']', '{': '}'}
+_BRACKET_PATTERN = re.compile(r'/\*.*?\*/|/\*|\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|[(){}\[\]]',
+                              re.DOTALL)
 
+# Delimiters that open and close with the same token (must occur an even number of times)
+_SYMMETRIC_DELIMITERS = ('"""', "'''", '`')
 
-def analyze_file(file_path):
+# Languages where indentation ends a function, with the line that starts one
+_INDENTED_FUNCTION = {
+    '.py': re.compile(r'[ \t]*(?:async[ \t]+)?def\b'),
+    '.gd': re.compile(r'[ \t]*(?:static[ \t]+)?func\b'),
+}
+
+
+def analyze_file(file_path, timer=None, stdin=False):
     """
     Analyze a single file using lizard and return structured metrics
-    
+
     Args:
         file_path: Path to the file to analyze
-        
+        timer: Optional PhaseTimer recording read, decode and parse times
+        stdin: Read the content from standard input instead of the file
+
     Returns:
         Dictionary with analysis results
     """
     # Make sure the file exists
-    if not os.path.exists(file_path):
+    if not stdin and not os.path.exists(file_path):
         return {
             "error": f"File not found: {file_path}"
         }
-    
+
     try:
-        # Analyze the file with lizard
-        analysis = lizard.analyze_file(file_path)
-        
-        # Extract file-level metrics
-        file_info = {
-            "filePath": file_path,
-            "fileName": os.path.basename(file_path),
-            "nloc": analysis.nloc,
-            "functionCount": len(analysis.function_list)
+        source = read_stdin_source(timer) if stdin else read_source(file_path, timer)
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
         }
-        
-        # Extract function-level metrics
-        functions = []
-        for func in analysis.function_list:
-            # Calculate cyclomatic density safely (avoid division by zero)
-            lines_count = func.nloc if func.nloc > 0 else 1  # Ensure we never divide by zero
-            cyclomatic_density = round(func.cyclomatic_complexity / lines_count, 3)  # Round to 3 decimal places
-            
-            function_info = {
-                "name": func.name,
-                "lineStart": func.start_line,
-                "lineEnd": func.end_line,
-                "lineCount": func.nloc,
-                "complexity": func.cyclomatic_complexity,
-                "parameters": len(func.parameters),
-                "maxNestingDepth": func.max_nesting_depth if hasattr(func, 'max_nesting_depth') else 0,
-                "cyclomaticDensity": cyclomatic_density
-            }
-            functions.append(function_info)
-        
-        # Calculate additional metrics
-        complexity_metrics = calculate_complexity_metrics(functions)
-        
-        # Build the complete result
-        result = {
-            "file": file_info,
-            "functions": functions,
-            "metrics": complexity_metrics,
-            "status": "success"
+
+    with timed(timer, 'parse'):
+        return analyze_source(file_path, source)
+
+
+def analyze_source(file_path, source):
+    """
+    Analyze already-decoded source code using lizard
+
+    Args:
+        file_path: Path of the file (used for language detection and reporting)
+        source: Decoded file content
+
+    Returns:
+        Dictionary with analysis results
+    """
+    try:
+        lines = source.split('\n')
+        analysis, code_lines = run_lizard(file_path, source, len(lines))
+        functions = [function_entry(func) for func in analysis.function_list]
+        blocks = []
+        if code_lines is not None:
+            blocks = [_block_entry(start, end, lines, code_lines) for start, end in top_level_blocks(functions)]
+        return build_result(file_path, analysis.nloc, functions, blocks, len(lines))
+
+    except MemoryError as error:
+        # Out of the file's memory budget (see file_budget.py), not an analysis error
+        raise as_budget_error(error) from None
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
         }
-        
+
+
+def run_lizard(file_path, source, line_count):
+    """
+    Run lizard over source and record how many lines of code each line holds
+
+    Args:
+        file_path: Path of the file (selects the language reader)
+        source: Text to analyze
+        line_count: Number of '\\n'-separated lines in source
+
+    Returns:
+        Tuple of (lizard FileInformation, list with 1 for every code line,
+        indexed by line number). The list is None when lizard's line numbers
+        do not match the text (its TypeScript reader counts the lines of some
+        template literals twice); such files get no blocks and are never
+        analyzed partially.
+
+    Raises:
+        BudgetExceeded: The file ran out of its budget (see file_budget.py);
+            its partial result holds the functions lizard finished so far
+    """
+    code_lines = [0] * (line_count + 2)
+    last_line = []
+    contexts = []
+    extensions = lizard.get_extensions([])
+    extensions.append(_code_line_recorder(code_lines, last_line, contexts))
+    try:
+        analysis = lizard.FileAnalyzer(extensions).analyze_source_code(file_path, source)
+    except (BudgetExceeded, MemoryError) as error:
+        exceeded = as_budget_error(error)
+        if contexts:
+            exceeded.partial = partial_result(file_path, contexts[0], line_count)
+        raise exceeded from None
+    return analysis, code_lines if last_line == [line_count] else None
+
+
+def partial_result(file_path, context, total_lines):
+    """
+    Result for an analysis interrupted mid-file: the functions lizard
+    finished, and "analyzedLines", the line it had reached
+
+    Args:
+        file_path: Path of the analyzed file
+        context: lizard's FileInfoBuilder for the file
+        total_lines: Number of lines in the file
+
+    Returns:
+        Dictionary with analysis results, or None when there is no memory left to build it
+    """
+    try:
+        functions = [function_entry(func) for func in context.fileinfo.function_list]
+        result = build_result(file_path, context.fileinfo.nloc, functions, [], total_lines)
+    except MemoryError:
+        return None
+    result["analyzedLines"] = context.current_line
+    return result
+
+
+def _code_line_recorder(code_lines, last_line, contexts):
+    """
+    lizard token processor that mirrors every nloc update onto code_lines
+
+    lizard counts a line when its first token arrives and some readers take
+    lines back later (Python docstrings), always as a run of lines ending at
+    the current line, so wrapping the context's add_nloc tracks both. The
+    line lizard ends on is appended to last_line, and lizard's context to
+    contexts.
+    """
+    def record(tokens, reader):
+        context = reader.context
+        contexts.append(context)
+        add_nloc = context.add_nloc
+
+        def recording_add_nloc(count):
+            line = context.current_line
+            step = 1 if count > 0 else -1
+            for counted in range(max(0, line - abs(count) + 1), min(line + 1, len(code_lines))):
+                code_lines[counted] += step
+            add_nloc(count)
+
+        # Installed before the first token reaches lizard's line_counter
+        context.add_nloc = recording_add_nloc
+        yield from tokens
+        last_line.append(context.current_line)
+    return record
+
+
+def function_entry(func):
+    """
+    Output dictionary for one lizard FunctionInfo
+
+    Args:
+        func: lizard FunctionInfo
+
+    Returns:
+        Dictionary with the function's metrics
+    """
+    # Calculate cyclomatic density safely (avoid division by zero)
+    lines_count = func.nloc if func.nloc > 0 else 1  # Ensure we never divide by zero
+    cyclomatic_density = round(func.cyclomatic_complexity / lines_count, 3)  # Round to 3 decimal places
+
+    return {
+        "name": func.name,
+        "lineStart": func.start_line,
+        "lineEnd": func.end_line,
+        "lineCount": func.nloc,
+        "complexity": func.cyclomatic_complexity,
+        "parameters": len(func.parameters),
+        "maxNestingDepth": func.max_nesting_depth if hasattr(func, 'max_nesting_depth') else 0,
+        "cyclomaticDensity": cyclomatic_density
+    }
+
+
+def build_result(file_path, nloc, functions, blocks, total_lines):
+    """
+    Assemble the analyzer output
+
+    Args:
+        file_path: Path of the analyzed file
+        nloc: Lines of code in the whole file
+        functions: Function entries in lizard's order
+        blocks: Top-level block entries
+        total_lines: Number of lines in the file
+
+    Returns:
+        Dictionary with analysis results
+    """
+    file_info = {
+        "filePath": file_path,
+        "fileName": os.path.basename(file_path),
+        "nloc": nloc,
+        "functionCount": len(functions),
+        "totalLines": total_lines
+    }
+
+    return {
+        "file": file_info,
+        "functions": functions,
+        "metrics": calculate_complexity_metrics(functions),
+        "blocks": blocks,
+        "status": "success"
+    }
+
+
+def top_level_blocks(functions):
+    """
+    Line ranges of the top-level blocks: outermost functions merged with
+    everything overlapping them (nested functions, functions sharing a line)
+
+    Args:
+        functions: Function entries
+
+    Returns:
+        Sorted list of (first line, last line) tuples
+    """
+    blocks = []
+    for start, end in sorted((func["lineStart"], func["lineEnd"]) for func in functions):
+        if blocks and start <= blocks[-1][1]:
+            blocks[-1] = (blocks[-1][0], max(blocks[-1][1], end))
+        else:
+            blocks.append((start, end))
+    return blocks
+
+
+def _block_entry(start, end, lines, code_lines):
+    """[first line, last line, code lines, text hash] for one top-level block"""
+    return [start, end, sum(code_lines[start:end + 1]), _text_hash(lines[start - 1:end])]
+
+
+def _text_hash(lines):
+    """Short content hash of a list of lines"""
+    text = '\n'.join(lines).encode('utf-8', 'surrogatepass')
+    return hashlib.blake2b(text, digest_size=8).hexdigest()
+
+
+def is_self_contained(lines):
+    """
+    Whether text can be blanked out or re-parsed without affecting how the
+    code around it parses: brackets nest, block comments close and
+    symmetric string delimiters pair up (a cheap, conservative check)
+
+    Args:
+        lines: Lines of text
+
+    Returns:
+        True if the text looks self-contained
+    """
+    text = '\n'.join(lines)
+    if any(text.count(delimiter) % 2 for delimiter in _SYMMETRIC_DELIMITERS):
+        return False
+
+    expected = []
+    for match in _BRACKET_PATTERN.finditer(text):
+        token = match.group()
+        if token in _CLOSING_BRACKETS:
+            expected.append(_CLOSING_BRACKETS[token])
+        elif token in ('/*', '*/'):
+            return False
+        elif token in ')]}' and (not expected or expected.pop() != token):
+            return False
+    return not expected
+
+
+def parse_changes(spec):
+    """
+    Parse a --changed argument
+
+    Args:
+        spec: Comma-separated START-END:LINES edits, e.g. "120-135:19,300-299:2"
+
+    Returns:
+        List of (start, end, new line count) tuples
+    """
+    changes = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        span, _, new_lines = part.partition(':')
+        start, _, end = span.partition('-')
+        changes.append((int(start), int(end or start), int(new_lines or 0)))
+    return changes
+
+
+def _line_delta(change):
+    """Lines added (positive) or removed (negative) by one edit"""
+    start, end, new_lines = change
+    return new_lines - (end - start + 1)
+
+
+def _indentation(line):
+    """Width of a line's leading whitespace"""
+    return len(line) - len(line.lstrip(' \t'))
+
+
+def _closing_line(lines, end):
+    """
+    Offset from a block's last line to the line that closes it in an
+    indentation-based language: the next line that is neither blank nor a
+    comment (None at the end of the file)
+    """
+    for offset, line in enumerate(lines[end:], 1):
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            return offset
+    return None
+
+
+def _previous_code_line(lines, start):
+    """The closest line above line start that is neither blank nor a comment, or None"""
+    for line in reversed(lines[:start - 1]):
+        stripped = line.strip()
+        if stripped and not stripped.startswith('#'):
+            return line
+    return None
+
+
+def _touches(change, start, end):
+    """Whether an edit overlaps lines start..end or sits right before or after them"""
+    return change[0] <= end + 1 and change[1] >= start - 1
+
+
+def _edit_regions(changes, blocks):
+    """
+    Old-file line ranges that have to be re-parsed: every edit widened to
+    the blocks it touches, overlapping ranges merged
+
+    Args:
+        changes: Sorted, non-overlapping (start, end, new line count) edits
+        blocks: Previous top-level block entries
+
+    Returns:
+        Sorted list of [first old line, last old line, line delta]
+    """
+    regions = []
+    for change in changes:
+        low, high = change[0], change[1]
+        for block in blocks:
+            if _touches(change, block[0], block[1]):
+                low, high = min(low, block[0]), max(high, block[1])
+        if regions and low <= regions[-1][1]:
+            region = regions[-1]
+            region[0], region[1] = min(region[0], low), max(region[1], high)
+            region[2] += _line_delta(change)
+        else:
+            regions.append([low, high, _line_delta(change)])
+    return regions
+
+
+def plan_reuse(previous, changes, lines):
+    """
+    Decide which previous top-level blocks can be reused after the edits
+
+    A block is reused when it lies before the first edit region, no edit
+    touches the line right after it (a Python function grows by appending
+    lines), its text hashes the same, and blanking it cannot change how the
+    rest parses. Everything from the first edit region to the end of the
+    file is re-parsed: lizard reads forward, so an edit cannot change how
+    the code before it parses, but it can leave the reader in a different
+    state for everything after it (a line typed into a catch block may keep
+    the enclosing function open to the end of the file), which a parse with
+    the later blocks blanked out would not show.
+
+    Args:
+        previous: Earlier result of this analyzer for the file
+        changes: (start, end, new line count) edits against the previous version
+        lines: Lines of the current file
+
+    Returns:
+        List of (previous block entry, line shift, functions in it), or None
+        when the file has to be analyzed in full
+    """
+    if previous.get("status") != "success" or not isinstance(previous.get("blocks"), list):
+        return None
+    old_total = previous.get("file", {}).get("totalLines")
+    if not isinstance(old_total, int):
+        return None
+
+    changes = sorted(changes)
+    for index, (start, end, new_lines) in enumerate(changes):
+        if start < 1 or end < start - 1 or end > old_total or new_lines < 0:
+            return None
+        if index and start <= changes[index - 1][1]:
+            return None  # overlapping edits
+    if old_total + sum(_line_delta(change) for change in changes) != len(lines):
+        return None  # edits do not describe the current file
+
+    old_blocks = previous["blocks"]
+    functions = previous.get("functions", [])
+
+    # The new text of every edit region must be self-contained, or the rest
+    # of the file (the reused blocks included) may parse differently
+    regions = _edit_regions(changes, old_blocks)
+    shift = 0
+    for low, high, delta in regions:
+        if not is_self_contained(lines[low + shift - 1:high + shift + delta]):
+            return None
+        shift += delta
+
+    # First line of the earliest edit region; nothing from there on is reused
+    first_region = regions[0][0] if regions else None
+
+    # With indentation-based scoping, a function defined in an edit region
+    # adopts the more indented functions after it: (new-file line, indentation)
+    function_start = _INDENTED_FUNCTION.get(os.path.splitext(previous["file"].get("filePath", ""))[1].lower())
+    new_definitions = []
+    if function_start is not None:
+        shift = 0
+        for low, high, delta in regions:
+            for number in range(low + shift, high + shift + delta + 1):
+                if function_start.match(lines[number - 1]):
+                    new_definitions.append((number, _indentation(lines[number - 1])))
+            shift += delta
+
+    plan = []
+    for block in old_blocks:
+        start, end, _, text_hash = block
+        if any(low <= end and high >= start for low, high, _ in regions):
+            continue
+        inside = [func for func in functions if start <= func["lineStart"] and func["lineEnd"] <= end]
+        if not inside:
+            continue
+        if first_region is not None and first_region <= start:
+            continue
+
+        shift = sum(_line_delta(change) for change in changes if change[1] < start)
+        current = lines[start + shift - 1:end + shift]
+        if _text_hash(current) != text_hash or not is_self_contained(current):
+            continue
+
+        if function_start is not None:
+            # The function must still end where it did: nothing edited up to
+            # the line that closes it, and no new enclosing definition before it
+            offset = _closing_line(lines, end + shift)
+            reach = end + (offset if offset is not None else len(lines) - end - shift)
+            if any(change[0] <= reach and change[1] >= end for change in changes):
+                continue
+            indent = _indentation(current[0])
+            if any(number < start + shift and level < indent for number, level in new_definitions):
+                continue
+            # Blanked out, a block right under a bodiless "def ...:" would become its body
+            header = _previous_code_line(lines, start + shift)
+            if header is not None and function_start.match(header):
+                continue
+
+        plan.append((block, shift, inside))
+    return plan
+
+
+def parse_diverged(spans, code_lines, previous_blocks, changes, reused_spans):
+    """
+    Whether the partial parse read the file differently from the previous one
+
+    Every reused block must still be a top-level block of its own, and
+    every re-parsed block not inside an edit region must be a previous
+    block at its shifted position. Inside a region, code outside all functions may
+    only come from lines that were outside every block before or that the
+    edits inserted. Anything else means the reader saw the masked file in
+    another state than the real one, e.g. after a statement typed into a
+    parameter list, and the file has to be parsed in full.
+
+    Args:
+        spans: Top-level (first line, last line) blocks after the partial parse
+        code_lines: Code-line flags of the partial parse, indexed by line number
+        previous_blocks: Top-level block entries of the previous result
+        changes: Sorted (start, end, new line count) edits
+        reused_spans: New-file spans of the reused blocks
+
+    Returns:
+        True when the result cannot be trusted
+    """
+    if not set(reused_spans) <= set(spans):
+        return True
+
+    regions = []
+    shift = 0
+    for low, high, delta in _edit_regions(changes, previous_blocks):
+        covered = sum(min(high, block[1]) - max(low, block[0]) + 1
+                      for block in previous_blocks if block[0] <= high and block[1] >= low)
+        inserted = sum(change[2] for change in changes if low <= change[0] and change[1] <= high)
+        regions.append((low, high, low + shift, high + shift + delta, high - low + 1 - covered + inserted))
+        shift += delta
+
+    expected = set()
+    for block in previous_blocks:
+        if not any(low <= block[1] and high >= block[0] for low, high, _, _, _ in regions):
+            shift = sum(_line_delta(change) for change in changes if change[1] < block[0])
+            expected.add((block[0] + shift, block[1] + shift))
+    parsed = {span for span in spans if span not in reused_spans and
+              not any(first <= span[0] and span[1] <= last for _, _, first, last, _ in regions)}
+    if parsed != expected - set(reused_spans):
+        return True
+
+    for _, _, first, last, allowed in regions:
+        stray = sum(code_lines[number] for number in range(first, last + 1)
+                    if not any(start <= number <= end for start, end in spans))
+        if stray > allowed:
+            return True
+    return False
+
+
+def _merge_functions(parsed, reused):
+    """
+    Insert the reused blocks' functions into lizard's function order
+
+    Args:
+        parsed: Function entries of the partial parse, in lizard's order
+        reused: (last line, function entries) per reused block, in file order
+
+    Returns:
+        Combined list of function entries
+    """
+    functions = []
+    pending = iter(reused)
+    group = next(pending, None)
+    for func in parsed:
+        while group is not None and group[0] < func["lineStart"]:
+            functions.extend(group[1])
+            group = next(pending, None)
+        functions.append(func)
+    while group is not None:
+        functions.extend(group[1])
+        group = next(pending, None)
+    return functions
+
+
+def _analyze_in_full(file_path, source):
+    """Full analysis reported in the incremental format"""
+    result = analyze_source(file_path, source)
+    if result.get("status") == "success":
+        result["incremental"] = {"reusedBlocks": 0, "parsedBlocks": len(result["blocks"]),
+                                 "fullParse": True}
+    return result
+
+
+def analyze_source_incremental(file_path, source, previous, changes):
+    """
+    Re-analyze source after edits, reusing the metrics of untouched blocks
+
+    Falls back to a full analysis when the previous result or the edits
+    cannot be used. The output matches analyze_source plus an "incremental"
+    block with reuse statistics.
+
+    Args:
+        file_path: Path of the file
+        source: Current decoded file content
+        previous: Earlier result of this analyzer for the file
+        changes: (start, end, new line count) edits against the previous version
+
+    Returns:
+        Dictionary with analysis results
+    """
+    lines = source.split('\n')
+    try:
+        plan = plan_reuse(previous, changes, lines)
+    except (KeyError, TypeError, ValueError, IndexError):
+        plan = None
+
+    if plan is None:
+        return _analyze_in_full(file_path, source)
+
+    try:
+        # Blank the reused blocks so lizard only tokenizes the rest. Where
+        # indentation ends functions, a "pass" at the block's indentation
+        # still ends whatever function precedes it.
+        indented = os.path.splitext(file_path)[1].lower() in _INDENTED_FUNCTION
+        masked = list(lines)
+        reused_functions = []
+        reused_blocks = {}
+        reused_nloc = 0
+        for (start, end, block_nloc, text_hash), shift, inside in plan:
+            masked[start + shift - 1:end + shift] = [''] * (end - start + 1)
+            if indented:
+                first = lines[start + shift - 1]
+                masked[start + shift - 1] = first[:len(first) - len(first.lstrip())] + 'pass'
+                reused_nloc -= 1
+            reused_nloc += block_nloc
+            reused_blocks[(start + shift, end + shift)] = [start + shift, end + shift, block_nloc, text_hash]
+            reused_functions.append((end + shift, [dict(func, lineStart=func["lineStart"] + shift,
+                                                        lineEnd=func["lineEnd"] + shift)
+                                                   for func in inside]))
+
+        analysis, code_lines = run_lizard(file_path, '\n'.join(masked), len(lines))
+        parsed = [function_entry(func) for func in analysis.function_list]
+
+        functions = _merge_functions(parsed, reused_functions)
+        spans = top_level_blocks(functions)
+        if code_lines is None or (plan and parse_diverged(spans, code_lines, previous["blocks"],
+                                                          sorted(changes), reused_blocks)):
+            return _analyze_in_full(file_path, source)
+        blocks = [reused_blocks.get(span) or _block_entry(span[0], span[1], lines, code_lines)
+                  for span in spans]
+
+        result = build_result(file_path, analysis.nloc + reused_nloc, functions, blocks, len(lines))
+        result["incremental"] = {"reusedBlocks": len(plan),
+                                 "parsedBlocks": sum(1 for block in blocks
+                                                     if tuple(block[0:2]) not in reused_blocks),
+                                 "fullParse": False}
         return result
-    
+
     except Exception as e:
         return {
             "error": str(e),
@@ -81,41 +665,59 @@ def analyze_file(file_path):
         }
 
 
+def analyze_file_incremental(file_path, previous, changes, timer=None, stdin=False):
+    """
+    Re-analyze a file after edits (see analyze_source_incremental)
+
+    Args:
+        file_path: Path to the file to analyze
+        previous: Earlier result of this analyzer for the file
+        changes: (start, end, new line count) edits against the previous version
+        timer: Optional PhaseTimer recording read, decode and parse times
+        stdin: Read the content from standard input instead of the file
+
+    Returns:
+        Dictionary with analysis results
+    """
+    if not stdin and not os.path.exists(file_path):
+        return {
+            "error": f"File not found: {file_path}"
+        }
+
+    try:
+        source = read_stdin_source(timer) if stdin else read_source(file_path, timer)
+    except Exception as e:
+        return {
+            "error": str(e),
+            "status": "error"
+        }
+
+    with timed(timer, 'parse'):
+        return analyze_source_incremental(file_path, source, previous, changes)
+
+
 def calculate_complexity_metrics(functions):
     """
     Calculate complexity metrics based on function data
-    
+
+    Besides the averages and threshold counts, "distribution" holds
+    p50/p90/p99 and a histogram of complexity, nesting depth, parameter
+    count and cyclomatic density (see complexity_stats.py).
+
     Args:
         functions: List of function metrics
-        
+
     Returns:
         Dictionary with calculated complexity metrics
     """
-    if not functions:
-        return {
-            "averageComplexity": 0,
-            "maxComplexity": 0,
-            "functionCount": 0,
-            "highComplexityFunctions": 0,
-            "criticalComplexityFunctions": 0
-        }
-    
-    # Extract complexities
-    complexities = [func["complexity"] for func in functions]
-    
-    # Calculate metrics
-    avg_complexity = sum(complexities) / len(complexities)
-    max_complexity = max(complexities)
-    high_complexity = sum(1 for c in complexities if c > 10)
-    critical_complexity = sum(1 for c in complexities if c > 25)
-    
-    return {
-        "averageComplexity": round(avg_complexity * 10) / 10,  # Round to 1 decimal place
-        "maxComplexity": max_complexity,
-        "functionCount": len(functions),
-        "highComplexityFunctions": high_complexity,
-        "criticalComplexityFunctions": critical_complexity
-    }
+    return complexity_metrics(FunctionColumns.from_functions(functions))
+
+
+def _option_value(args, name):
+    """Value following a command-line option, or None"""
+    if name in args[:-1]:
+        return args[args.index(name) + 1]
+    return None
 
 
 def main():
@@ -124,13 +726,39 @@ def main():
     if len(sys.argv) < 2:
         print(json.dumps({"error": "No file path provided", "status": "error"}))
         sys.exit(1)
-    
+
     file_path = sys.argv[1]
-    result = analyze_file(file_path)
-    
-    # Output as JSON
-    print(json.dumps(result))
+    options = sys.argv[2:]
+    analyze, args = analyze_file, (file_path,)
+
+    previous_path = _option_value(options, '--previous')
+    if previous_path is not None:
+        try:
+            with open(previous_path, 'r', encoding='utf-8') as file:
+                previous = json.load(file)
+            changes = parse_changes(_option_value(options, '--changed') or '')
+        except (OSError, ValueError) as e:
+            print(json.dumps({"error": f"Invalid --previous/--changed: {str(e)}", "status": "error"}))
+            sys.exit(1)
+        analyze, args = analyze_file_incremental, (file_path, previous, changes)
+
+    stdin = '--stdin' in options
+    try:
+        codec = codec_from_args(options)
+    except ValueError as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+    timer = timer_from_args(options)
+    if timer is not None:
+        # --profile / --profile-dir: add per-phase timings to the output
+        emit_result(timer.run(file_path, analyze, *args, timer=timer, stdin=stdin), codec, timer)
+        return
+
+    result = analyze(*args, stdin=stdin)
+
+    # Output as JSON (or one --codec frame, see output_codecs.py)
+    emit_result(result, codec)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
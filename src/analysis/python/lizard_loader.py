@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Lizard Loader
+
+Imports lizard without loading every language reader. lizard's
+lizard_languages package imports all of its readers up front (the Erlang
+reader alone pulls in pygments and importlib.metadata), which dominates the
+start-up time of a one-shot analysis. install() registers a lightweight
+stand-in for the package that imports a reader module only when a file with
+one of its extensions is analyzed.
+
+Extensions missing from READERS (e.g. languages added by a newer lizard),
+and readers that a different lizard release renamed or moved, fall back to
+lizard's own package code, so lookups never change behaviour, only when
+modules get imported.
+
+Usage: import lizard_loader; lizard = lizard_loader.load_lizard()
+"""
+
+import sys
+import os
+from importlib.machinery import PathFinder
+
+
+# (module, reader class, extensions) in the order of lizard_languages.languages(),
+# so the first reader claiming an extension wins exactly as in lizard
+READERS = (
+    ('clike', 'CLikeReader', ('c', 'cpp', 'cc', 'cxx', 'h', 'hpp')),
+    ('java', 'JavaReader', ('java',)),
+    ('csharp', 'CSharpReader', ('cs',)),
+    ('javascript', 'JavaScriptReader', ('js', 'cjs', 'mjs')),
+    ('python', 'PythonReader', ('py',)),
+    ('objc', 'ObjCReader', ('m', 'mm')),
+    ('ttcn', 'TTCNReader', ('ttcn', 'ttcnpp')),
+    ('ruby', 'RubyReader', ('rb',)),
+    ('php', 'PHPReader', ('php',)),
+    ('swift', 'SwiftReader', ('swift',)),
+    ('scala', 'ScalaReader', ('scala',)),
+    ('gdscript', 'GDScriptReader', ('gd',)),
+    ('go', 'GoReader', ('go',)),
+    ('lua', 'LuaReader', ('lua',)),
+    ('rust', 'RustReader', ('rs',)),
+    ('typescript', 'TypeScriptReader', ('ts',)),
+    ('fortran', 'FortranReader', ('f70', 'f90', 'f95', 'f03', 'f08', 'f', 'for', 'ftn', 'fpp')),
+    ('kotlin', 'KotlinReader', ('kt', 'kts')),
+    ('solidity', 'SolidityReader', ('sol',)),
+    ('erlang', 'ErlangReader', ('erl', 'hrl', 'es', 'escript')),
+    ('zig', 'ZigReader', ('zig',)),
+    ('tsx', 'TSXReader', ('tsx', 'jsx')),
+    ('vue', 'VueReader', ('vue',)),
+    ('perl', 'PerlReader', ('pl', 'pm')),
+    ('st', 'StReader', ('st',)),
+    ('r', 'RReader', ('r',)),
+    ('plsql', 'PLSQLReader', ('sql', 'pks', 'pkb', 'pls', 'plb', 'pck')),
+)
+
+PACKAGE = 'lizard_languages'
+
+# Lower-case extension -> (module, class); lizard matches extensions case-insensitively
+_EXTENSIONS = {}
+for _module, _class, _exts in READERS:
+    for _ext in _exts:
+        _EXTENSIONS.setdefault(_ext, (_module, _class))
+
+_CLASSES = {reader_class: module for module, reader_class, _ in READERS}
+
+# Namespace of the real lizard_languages/__init__.py once it had to be run
+_full_package = None
+
+# Entries of READERS that do not match the installed lizard
+_missing = set()
+
+
+def _load_reader(module, reader_class):
+    """
+    Import one reader module and return its reader class
+
+    Returns:
+        Reader class, or None when the installed lizard has no such module
+        or class (the caller falls back to the full package)
+    """
+    if (module, reader_class) in _missing:
+        return None
+    try:
+        __import__(f"{PACKAGE}.{module}")
+        return getattr(sys.modules[f"{PACKAGE}.{module}"], reader_class)
+    except (ImportError, AttributeError):
+        _missing.add((module, reader_class))
+        return None
+
+
+def _load_full_package():
+    """
+    Run lizard's own lizard_languages/__init__.py (imports every reader)
+
+    Returns:
+        Namespace dictionary of the real package
+    """
+    global _full_package
+    if _full_package is None:
+        package = sys.modules[PACKAGE]
+        namespace = {"__name__": PACKAGE, "__package__": PACKAGE,
+                     "__path__": package.__path__, "__file__": package.__file__}
+        exec(package.__spec__.loader.get_code(PACKAGE), namespace)
+        _full_package = namespace
+    return _full_package
+
+
+def languages():
+    """All lizard reader classes (loads every reader)"""
+    return _load_full_package()["languages"]()
+
+
+def get_reader_for(filename):
+    """
+    Reader class for a file name, importing only that reader's module
+
+    Args:
+        filename: Path or name of the file
+
+    Returns:
+        Reader class, or None when no reader handles the file
+    """
+    ext = os.path.splitext(filename)[1][1:].lower()
+    if ext in _EXTENSIONS:
+        reader = _load_reader(*_EXTENSIONS[ext])
+        if reader is not None:
+            return reader
+    return _load_full_package()["get_reader_for"](filename)
+
+
+def _package_getattr(name):
+    """Module-level __getattr__: resolve reader classes on first access"""
+    if name in _CLASSES:
+        reader = _load_reader(_CLASSES[name], name)
+        if reader is not None:
+            return reader
+    full = _load_full_package()
+    if name in full:
+        return full[name]
+    raise AttributeError(f"module {PACKAGE!r} has no attribute {name!r}")
+
+
+def install():
+    """
+    Register the lazy lizard_languages package in sys.modules
+
+    Does nothing when lizard_languages is already imported or not installed.
+
+    Returns:
+        True when the lazy package is in place
+    """
+    if PACKAGE in sys.modules:
+        return sys.modules[PACKAGE].__dict__.get('get_reader_for') is get_reader_for
+
+    spec = PathFinder.find_spec(PACKAGE)
+    if spec is None or not spec.submodule_search_locations:
+        return False
+
+    package = type(sys)(PACKAGE, "programming languages of lizard (loaded on demand)")
+    package.__spec__ = spec
+    package.__file__ = spec.origin
+    package.__path__ = list(spec.submodule_search_locations)
+    package.__package__ = PACKAGE
+    package.languages = languages
+    package.get_reader_for = get_reader_for
+    package.__getattr__ = _package_getattr
+    sys.modules[PACKAGE] = package
+    return True
+
+
+def load_lizard():
+    """
+    Import lizard with the lazy language package installed
+
+    Returns:
+        The lizard module
+    """
+    install()
+    import lizard
+    return lizard
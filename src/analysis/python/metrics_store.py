@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Metrics Store
+
+Columnar on-disk store for function-level lizard metrics. Instead of one
+JSON document holding every function as an object, a store is a directory
+of fixed-width little-endian binary columns, one value per function:
+
+    complexity.i32  nloc.i32  parameters.i32  nesting.i32
+    line_start.i32  line_end.i32  file_id.i32  name_id.i32
+
+plus two interned string tables (function names and file paths), each a
+UTF-8 blob with an offsets file (names.bin/names.idx, files.bin/files.idx),
+and store.json describing the row count and layout.
+
+MetricsStore memory-maps the columns, so opening a store costs nothing per
+function and queries slice, filter and aggregate the mapped columns
+directly. With NumPy installed the columns are zero-copy NumPy arrays and
+filters and aggregates are vectorized.
+
+Usage: python metrics_store.py write <store_dir> < batch_results.ndjson
+       python metrics_store.py query <store_dir> [--min-complexity N] [--max-complexity N]
+                                     [--file PATH] [--by-file] [--limit N]
+"""
+
+import sys
+import json
+import os
+import mmap
+import argparse
+from array import array
+
+from complexity_stats import load_numpy
+
+
+STORE_VERSION = 1
+MANIFEST_NAME = 'store.json'
+
+# Column name -> (function entry field, file name); every column is int32
+COLUMNS = {
+    'complexity': ('complexity', 'complexity.i32'),
+    'nloc': ('lineCount', 'nloc.i32'),
+    'parameters': ('parameters', 'parameters.i32'),
+    'nesting': ('maxNestingDepth', 'nesting.i32'),
+    'line_start': ('lineStart', 'line_start.i32'),
+    'line_end': ('lineEnd', 'line_end.i32'),
+}
+ID_COLUMNS = {
+    'file_id': 'file_id.i32',
+    'name_id': 'name_id.i32',
+}
+STRING_TABLES = {
+    'names': ('names.bin', 'names.idx'),
+    'files': ('files.bin', 'files.idx'),
+}
+
+# Fixed-width item types; checked at import so the files stay portable
+INT32 = 'i'
+OFFSET = 'q'
+if array(INT32).itemsize != 4 or array(OFFSET).itemsize != 8:
+    raise ImportError("metrics_store needs 4-byte 'i' and 8-byte 'q' arrays")
+
+_SWAP = sys.byteorder != 'little'
+
+
+def _write_array(path, values):
+    """Write an array as little-endian bytes, replacing path atomically"""
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as file:
+        values.tofile(file)
+    os.replace(temporary, path)
+
+
+class StringTable:
+    """Interned strings, stored as a UTF-8 blob plus end offsets"""
+
+    def __init__(self):
+        self.ids = {}
+        self.blob = bytearray()
+        self.ends = array(OFFSET)
+
+    def intern(self, text):
+        """Id of text, adding it on first use"""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.ends)
+            self.blob += text.encode('utf-8', 'surrogatepass')
+            self.ends.append(len(self.blob))
+        return string_id
+
+    def write(self, blob_path, index_path):
+        temporary = blob_path + '.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(self.blob)
+        os.replace(temporary, blob_path)
+        _write_array(index_path, self.ends)
+
+
+class MetricsStoreWriter:
+    """
+    Accumulates function entries file by file and writes a store
+
+    Only the integer columns and the interned strings are kept in memory
+    (about 32 bytes per function plus each distinct name once).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.columns = {name: array(INT32) for name in COLUMNS}
+        self.file_ids = array(INT32)
+        self.name_ids = array(INT32)
+        self.names = StringTable()
+        self.files = StringTable()
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def add_file(self, file_path, functions):
+        """
+        Append the functions of one file
+
+        Args:
+            file_path: Path of the analyzed file
+            functions: Function entries as produced by lizard_analyzer
+
+        Returns:
+            The file's id
+        """
+        file_id = self.files.intern(file_path)
+        for func in functions:
+            for name, (field, _) in COLUMNS.items():
+                self.columns[name].append(int(func.get(field) or 0))
+            self.file_ids.append(file_id)
+            self.name_ids.append(self.names.intern(str(func.get('name', ''))))
+        return file_id
+
+    def write(self):
+        """
+        Write every column and table, then the manifest (last, so a reader
+        never sees a manifest describing files that are not complete)
+
+        Returns:
+            Path of the store directory
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for name, (_, file_name) in COLUMNS.items():
+            _write_array(os.path.join(self.directory, file_name), self.columns[name])
+        _write_array(os.path.join(self.directory, ID_COLUMNS['file_id']), self.file_ids)
+        _write_array(os.path.join(self.directory, ID_COLUMNS['name_id']), self.name_ids)
+        for table, (blob_name, index_name) in STRING_TABLES.items():
+            getattr(self, table).write(os.path.join(self.directory, blob_name),
+                                       os.path.join(self.directory, index_name))
+
+        manifest = {
+            "version": STORE_VERSION,
+            "rows": len(self),
+            "files": len(self.files.ends),
+            "names": len(self.names.ends),
+            "byteOrder": "little",
+            "columns": {name: {"file": file_name, "type": "int32"}
+                        for name, (_, file_name) in COLUMNS.items()},
+            "idColumns": {name: {"file": file_name, "type": "int32"} for name, file_name in ID_COLUMNS.items()},
+            "stringTables": {table: {"blob": blob, "offsets": index, "type": "int64"}
+                             for table, (blob, index) in STRING_TABLES.items()}
+        }
+        temporary = os.path.join(self.directory, MANIFEST_NAME + '.tmp')
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(temporary, os.path.join(self.directory, MANIFEST_NAME))
+        return self.directory
+
+
+class MetricsStore:
+    """
+    Read-only, memory-mapped view of a store
+
+    column() returns the mapped values without copying: a NumPy int32 array
+    when NumPy is installed, otherwise an int32 memoryview. Rows are selected
+    with filter() and reduced with aggregate(); function() materializes one
+    row as a function entry.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as file:
+            self.manifest = json.load(file)
+        if self.manifest.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported metrics store version: {self.manifest.get('version')}")
+
+        self.rows = self.manifest["rows"]
+        self.numpy = load_numpy()
+        self._maps = []
+        self._views = []
+        self._columns = {}
+        for name, info in list(self.manifest["columns"].items()) + list(self.manifest["idColumns"].items()):
+            self._columns[name] = self._map(info["file"], INT32)
+        self._tables = {}
+        for table, info in self.manifest["stringTables"].items():
+            self._tables[table] = (self._map(info["blob"], None), self._map(info["offsets"], OFFSET))
+        self._file_ids = None
+
+    def _map(self, file_name, typecode):
+        """Memory-map one file as a typed view (bytes for typecode None)"""
+        path = os.path.join(self.directory, file_name)
+        with open(path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                data = b''
+            else:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps.append(data)
+
+        if typecode is None:
+            return data
+        if _SWAP:
+            # Big-endian host: the little-endian file has to be converted once
+            values = array(typecode)
+            values.frombytes(data)
+            values.byteswap()
+            return self.numpy.asarray(values) if self.numpy else memoryview(values)
+        if self.numpy:
+            return self.numpy.frombuffer(data, dtype='<i4' if typecode == INT32 else '<i8')
+        view = memoryview(data).cast(typecode)
+        self._views.append(view)
+        return view
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Release the mappings (columns handed out must no longer be used)"""
+        self._columns.clear()
+        self._tables.clear()
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        for data in self._maps:
+            try:
+                data.close()
+            except BufferError:
+                # A NumPy view is still alive; the mapping closes with it
+                pass
+        self._maps.clear()
+
+    def column(self, name):
+        """Mapped int32 values of a column (see COLUMNS and ID_COLUMNS)"""
+        return self._columns[name]
+
+    def _string(self, table, string_id):
+        blob, ends = self._tables[table]
+        start = ends[string_id - 1] if string_id else 0
+        return bytes(blob[start:ends[string_id]]).decode('utf-8', 'surrogatepass')
+
+    def name(self, name_id):
+        """Function name for a name id"""
+        return self._string('names', int(name_id))
+
+    def file_path(self, file_id):
+        """File path for a file id"""
+        return self._string('files', int(file_id))
+
+    def file_id(self, file_path):
+        """Id of a file path, or None when the store has no functions from it"""
+        if self._file_ids is None:
+            self._file_ids = {self.file_path(index): index for index in range(self.manifest["files"])}
+        return self._file_ids.get(file_path)
+
+    def function(self, row):
+        """One row as a function entry (as produced by lizard_analyzer)"""
+        entry = {"name": self.name(self._columns['name_id'][row]),
+                 "file": self.file_path(self._columns['file_id'][row])}
+        for name, (field, _) in COLUMNS.items():
+            entry[field] = int(self._columns[name][row])
+        return entry
+
+    def filter(self, file_path=None, **ranges):
+        """
+        Rows matching every condition
+
+        Args:
+            file_path: Only functions of this file
+            ranges: column=(minimum, maximum), inclusive, either bound None
+
+        Returns:
+            Ascending row indices (NumPy array or array('q'))
+        """
+        conditions = []
+        if file_path is not None:
+            file_id = self.file_id(file_path)
+            if file_id is None:
+                return self.numpy.zeros(0, dtype='int64') if self.numpy else array(OFFSET)
+            conditions.append(('file_id', file_id, file_id))
+        for name, (minimum, maximum) in ranges.items():
+            if name not in self._columns:
+                raise KeyError(f"Unknown column: {name}")
+            conditions.append((name, minimum, maximum))
+
+        if self.numpy:
+            mask = self.numpy.ones(self.rows, dtype=bool)
+            for name, minimum, maximum in conditions:
+                values = self._columns[name]
+                if minimum is not None:
+                    mask &= values >= minimum
+                if maximum is not None:
+                    mask &= values <= maximum
+            return self.numpy.flatnonzero(mask)
+
+        rows = array(OFFSET, range(self.rows))
+        for name, minimum, maximum in conditions:
+            values = self._columns[name]
+            rows = array(OFFSET, (row for row in rows
+                                  if (minimum is None or values[row] >= minimum)
+                                  and (maximum is None or values[row] <= maximum)))
+        return rows
+
+    def aggregate(self, name, rows=None):
+        """
+        Count, sum, min, max and mean of a column
+
+        Args:
+            name: Column name
+            rows: Row indices from filter(), or None for every row
+
+        Returns:
+            Dictionary with the aggregates (min/max/mean None when empty)
+        """
+        values = self._columns[name]
+        if self.numpy:
+            selected = values if rows is None else values[rows]
+            count = int(selected.size)
+            if not count:
+                return {"count": 0, "sum": 0, "min": None, "max": None, "mean": None}
+            total = int(selected.sum(dtype='int64'))
+            return {"count": count, "sum": total, "min": int(selected.min()),
+                    "max": int(selected.max()), "mean": total / count}
+
+        selected = values if rows is None else [values[row] for row in rows]
+        count = len(selected)
+        if not count:
+            return {"count": 0, "sum": 0, "min": None, "max": None, "mean": None}
+        total = sum(selected)
+        return {"count": count, "sum": total, "min": min(selected), "max": max(selected), "mean": total / count}
+
+    def aggregate_by_file(self, name, rows=None):
+        """
+        Per-file sums and counts of a column
+
+        Returns:
+            Dictionary file path -> {"count", "sum"}
+        """
+        values = self._columns[name]
+        file_ids = self._columns['file_id']
+        if self.numpy:
+            ids = file_ids if rows is None else file_ids[rows]
+            selected = values if rows is None else values[rows]
+            counts = self.numpy.bincount(ids, minlength=self.manifest["files"])
+            sums = self.numpy.bincount(ids, weights=selected, minlength=self.manifest["files"])
+            return {self.file_path(file_id): {"count": int(counts[file_id]), "sum": int(sums[file_id])}
+                    for file_id in self.numpy.flatnonzero(counts)}
+
+        totals = {}
+        for row in (range(self.rows) if rows is None else rows):
+            entry = totals.setdefault(file_ids[row], [0, 0])
+            entry[0] += 1
+            entry[1] += values[row]
+        return {self.file_path(file_id): {"count": count, "sum": total}
+                for file_id, (count, total) in sorted(totals.items())}
+
+
+def write_store_from_results(stream, directory):
+    """
+    Build a store from batch_analyzer NDJSON output
+
+    Args:
+        stream: Text stream of batch records
+        directory: Store directory
+
+    Returns:
+        Number of functions written
+    """
+    writer = MetricsStoreWriter(directory)
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        lizard_result = record.get("results", {}).get("lizard") if record.get("type") == "result" else None
+        if isinstance(lizard_result, dict) and lizard_result.get("status") == "success":
+            writer.add_file(record["path"], lizard_result.get("functions", []))
+    writer.write()
+    return len(writer)
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Write or query a columnar function-metrics store")
+    commands = parser.add_subparsers(dest='command', required=True)
+    write = commands.add_parser('write', help="Build a store from batch_analyzer output on stdin")
+    write.add_argument('store', help="Store directory")
+    query = commands.add_parser('query', help="Filter and aggregate a store")
+    query.add_argument('store', help="Store directory")
+    query.add_argument('--min-complexity', type=int, default=None)
+    query.add_argument('--max-complexity', type=int, default=None)
+    query.add_argument('--file', default=None, help="Only functions of this file")
+    query.add_argument('--by-file', action='store_true', help="Also report complexity per file")
+    query.add_argument('--limit', type=int, default=0, help="List up to N matching functions")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'write':
+            rows = write_store_from_results(sys.stdin, args.store)
+            print(json.dumps({"store": args.store, "rows": rows, "status": "success"}))
+            return
+
+        with MetricsStore(args.store) as store:
+            ranges = {}
+            if args.min_complexity is not None or args.max_complexity is not None:
+                ranges['complexity'] = (args.min_complexity, args.max_complexity)
+            rows = store.filter(args.file, **ranges)
+            result = {name: store.aggregate(name, rows) for name in COLUMNS if name not in ('line_start', 'line_end')}
+            if args.by_file:
+                result["byFile"] = store.aggregate_by_file('complexity', rows)
+            if args.limit:
+                result["functions"] = [store.function(row) for row in rows[:args.limit]]
+            result["status"] = "success"
+            print(json.dumps(result))
+    except Exception as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Output Codecs
+
+Alternative encodings for analyzer results. Without --codec an analyzer
+prints one line of JSON as before; with --codec NAME the result is written
+to stdout as a single binary frame:
+
+    4-byte big-endian payload length | 1-byte codec tag | payload
+
+Codecs:
+  json     stdlib JSON (tag 'J')
+  orjson   JSON encoded with orjson when it is installed, otherwise the
+           stdlib encoder (tag 'J'; same bytes a JSON parser accepts)
+  msgpack  MessagePack (tag 'M'), with the msgpack package when installed
+           and a small built-in encoder otherwise
+  compact  key-dictionary JSON (tag 'K'): every object key is replaced by
+           a short token for its position in a key table ("a", "b", ...,
+           "Z", "ba", ...), {"keys": [...], "data": ...}, so the camelCase
+           keys repeated for every function or DOM node are written once
+
+decode_frame/decode_payload turn a frame back into the result. They are the
+only reader of the format so far (the codec benchmark uses them); the
+extension does not pass --codec and still reads the default JSON line.
+"""
+
+import sys
+import json
+import time
+import struct
+
+from profiling import add_serialize_time
+
+
+CODECS = ('json', 'orjson', 'msgpack', 'compact')
+
+CODEC_TAGS = {'json': b'J', 'orjson': b'J', 'msgpack': b'M', 'compact': b'K'}
+
+FRAME_HEADER = struct.Struct('>Ic')
+
+# Digits of compact key tokens; letters only, because JavaScript engines
+# store numeric-looking object keys as array elements, which parses slowly
+KEY_TOKEN_DIGITS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+_orjson = None
+_msgpack = None
+
+
+def _load(name):
+    """Import an optional module once; None when it is not installed"""
+    try:
+        return __import__(name)
+    except ImportError:
+        return False
+
+
+def get_orjson():
+    """The orjson module, or None"""
+    global _orjson
+    if _orjson is None:
+        _orjson = _load('orjson')
+    return _orjson or None
+
+
+def get_msgpack():
+    """The msgpack module, or None"""
+    global _msgpack
+    if _msgpack is None:
+        _msgpack = _load('msgpack')
+    return _msgpack or None
+
+
+def codec_from_args(argv):
+    """
+    Codec selected with --codec NAME
+
+    Args:
+        argv: Command-line arguments after the file path
+
+    Returns:
+        Codec name, or None for the default line of JSON text
+
+    Raises:
+        ValueError: For an unknown codec
+    """
+    if '--codec' not in argv[:-1]:
+        return None
+    codec = argv[argv.index('--codec') + 1]
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec: {codec} (expected one of {', '.join(CODECS)})")
+    return codec
+
+
+# --- JSON ----------------------------------------------------------------
+
+def _encode_json(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _encode_orjson(value):
+    orjson = get_orjson()
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except (TypeError, orjson.JSONEncodeError):
+            # Integers beyond 64 bits, lone surrogates: the stdlib encoder copes
+            pass
+    return _encode_json(value)
+
+
+def _decode_json(payload):
+    orjson = get_orjson()
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+# --- Key-dictionary JSON --------------------------------------------------
+
+def key_token(index):
+    """Compact key token for a key table position"""
+    base = len(KEY_TOKEN_DIGITS)
+    token = KEY_TOKEN_DIGITS[index % base]
+    index //= base
+    while index:
+        token = KEY_TOKEN_DIGITS[index % base] + token
+        index //= base
+    return token
+
+
+def compact_keys(value):
+    """
+    Replace every object key by its key token (see key_token)
+
+    The structure is walked iteratively, so arbitrarily deep DOM trees do
+    not hit the recursion limit here.
+
+    Returns:
+        {"keys": [...], "data": transformed value}
+    """
+    keys = {}
+    root = [value]
+    stack = [(root, 0, value)]
+    while stack:
+        parent, slot, item = stack.pop()
+        if isinstance(item, dict):
+            converted = {}
+            for key, child in item.items():
+                index = keys.get(key)
+                if index is None:
+                    index = keys[key] = key_token(len(keys))
+                converted[index] = child
+                if isinstance(child, (dict, list, tuple)):
+                    stack.append((converted, index, child))
+            parent[slot] = converted
+        elif isinstance(item, (list, tuple)):
+            converted = list(item)
+            for index, child in enumerate(converted):
+                if isinstance(child, (dict, list, tuple)):
+                    stack.append((converted, index, child))
+            parent[slot] = converted
+    return {"keys": list(keys), "data": root[0]}
+
+
+def expand_keys(document):
+    """Inverse of compact_keys"""
+    keys = {key_token(index): key for index, key in enumerate(document["keys"])}
+    root = [document["data"]]
+    stack = [(root, 0, root[0])]
+    while stack:
+        parent, slot, item = stack.pop()
+        if isinstance(item, dict):
+            converted = {}
+            for index, child in item.items():
+                key = keys[index]
+                converted[key] = child
+                if isinstance(child, (dict, list)):
+                    stack.append((converted, key, child))
+            parent[slot] = converted
+        elif isinstance(item, list):
+            for index, child in enumerate(item):
+                if isinstance(child, (dict, list)):
+                    stack.append((item, index, child))
+    return root[0]
+
+
+# --- MessagePack ----------------------------------------------------------
+
+def _pack(value, out):
+    """Built-in MessagePack encoder for JSON-like values"""
+    if value is None:
+        out += b'\xc0'
+    elif value is True:
+        out += b'\xc3'
+    elif value is False:
+        out += b'\xc2'
+    elif isinstance(value, int):
+        if 0 <= value < 0x80:
+            out.append(value)
+        elif -0x20 <= value < 0:
+            out += struct.pack('b', value)
+        elif 0 <= value < 1 << 64:
+            out += b'\xcf' + struct.pack('>Q', value) if value >= 1 << 32 else b'\xce' + struct.pack('>I', value)
+        elif -(1 << 63) <= value < 0:
+            out += b'\xd3' + struct.pack('>q', value)
+        else:
+            raise OverflowError("Integer out of MessagePack range")
+    elif isinstance(value, float):
+        out += b'\xcb' + struct.pack('>d', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8', 'surrogatepass')
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        elif size < 1 << 8:
+            out += b'\xd9' + struct.pack('>B', size)
+        elif size < 1 << 16:
+            out += b'\xda' + struct.pack('>H', size)
+        else:
+            out += b'\xdb' + struct.pack('>I', size)
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        out += b'\xc6' + struct.pack('>I', len(value)) + value
+    elif isinstance(value, (list, tuple)):
+        size = len(value)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size < 1 << 16:
+            out += b'\xdc' + struct.pack('>H', size)
+        else:
+            out += b'\xdd' + struct.pack('>I', size)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        size = len(value)
+        if size < 16:
+            out.append(0x80 | size)
+        elif size < 1 << 16:
+            out += b'\xde' + struct.pack('>H', size)
+        else:
+            out += b'\xdf' + struct.pack('>I', size)
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as MessagePack")
+
+
+# Fixed-size headers: first byte -> (struct format, kind)
+_UNPACK_HEADERS = {
+    0xcc: ('>B', 'scalar'), 0xcd: ('>H', 'scalar'), 0xce: ('>I', 'scalar'), 0xcf: ('>Q', 'scalar'),
+    0xd0: ('>b', 'scalar'), 0xd1: ('>h', 'scalar'), 0xd2: ('>i', 'scalar'), 0xd3: ('>q', 'scalar'),
+    0xca: ('>f', 'scalar'), 0xcb: ('>d', 'scalar'),
+    0xd9: ('>B', 'str'), 0xda: ('>H', 'str'), 0xdb: ('>I', 'str'),
+    0xc4: ('>B', 'bin'), 0xc5: ('>H', 'bin'), 0xc6: ('>I', 'bin'),
+    0xdc: ('>H', 'array'), 0xdd: ('>I', 'array'),
+    0xde: ('>H', 'map'), 0xdf: ('>I', 'map'),
+}
+
+
+def _unpack(data, position=0):
+    """Built-in MessagePack decoder (inverse of _pack); returns (value, next position)"""
+    first = data[position]
+    position += 1
+    if first < 0x80:
+        return first, position
+    if first >= 0xe0:
+        return first - 0x100, position
+    if 0xa0 <= first <= 0xbf:
+        size = first & 0x1f
+        return data[position:position + size].decode('utf-8', 'surrogatepass'), position + size
+    if 0x90 <= first <= 0x9f:
+        kind, size = 'array', first & 0x0f
+    elif 0x80 <= first <= 0x8f:
+        kind, size = 'map', first & 0x0f
+    elif first == 0xc0:
+        return None, position
+    elif first in (0xc2, 0xc3):
+        return first == 0xc3, position
+    else:
+        fmt, kind = _UNPACK_HEADERS[first]
+        width = struct.calcsize(fmt)
+        size = struct.unpack_from(fmt, data, position)[0]
+        position += width
+        if kind == 'scalar':
+            return size, position
+        if kind == 'str':
+            return data[position:position + size].decode('utf-8', 'surrogatepass'), position + size
+        if kind == 'bin':
+            return bytes(data[position:position + size]), position + size
+
+    if kind == 'array':
+        items = []
+        for _ in range(size):
+            item, position = _unpack(data, position)
+            items.append(item)
+        return items, position
+    mapping = {}
+    for _ in range(size):
+        key, position = _unpack(data, position)
+        mapping[key], position = _unpack(data, position)
+    return mapping, position
+
+
+def _encode_msgpack(value):
+    msgpack = get_msgpack()
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True)
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+def _decode_msgpack(payload):
+    msgpack = get_msgpack()
+    if msgpack is not None:
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    return _unpack(payload)[0]
+
+
+# --- Frames ---------------------------------------------------------------
+
+def encode_payload(value, codec):
+    """
+    Encode a result with a codec
+
+    Args:
+        value: JSON-serialisable result
+        codec: One of CODECS
+
+    Returns:
+        Encoded bytes (without the frame header)
+    """
+    if codec == 'json':
+        return _encode_json(value)
+    if codec == 'orjson':
+        return _encode_orjson(value)
+    if codec == 'msgpack':
+        return _encode_msgpack(value)
+    if codec == 'compact':
+        return _encode_orjson(compact_keys(value))
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decode_payload(payload, tag):
+    """Decode a payload given its frame tag"""
+    if tag == b'J':
+        return _decode_json(payload)
+    if tag == b'M':
+        return _decode_msgpack(payload)
+    if tag == b'K':
+        return expand_keys(_decode_json(payload))
+    raise ValueError(f"Unknown codec tag: {tag!r}")
+
+
+def encode_frame(value, codec):
+    """Length-prefixed, tagged frame for a result"""
+    payload = encode_payload(value, codec)
+    return FRAME_HEADER.pack(len(payload), CODEC_TAGS[codec]) + payload
+
+
+def decode_frame(data):
+    """
+    Decode one frame
+
+    Returns:
+        (result, number of bytes consumed)
+    """
+    length, tag = FRAME_HEADER.unpack_from(data)
+    start = FRAME_HEADER.size
+    return decode_payload(bytes(data[start:start + length]), tag), start + length
+
+
+def write_result(result, codec, timer=None, stream=None):
+    """
+    Write a result as one frame
+
+    With a PhaseTimer the frame carries a "timings" block whose serialize
+    phase is the time the encoding took; the result is then encoded a
+    second time with that block included.
+
+    Args:
+        result: Result dictionary
+        codec: One of CODECS
+        timer: Optional PhaseTimer
+        stream: Binary stream (default: stdout's buffer)
+    """
+    if stream is None:
+        sys.stdout.flush()
+        stream = sys.stdout.buffer
+    started = time.perf_counter()
+    payload = encode_payload(result, codec)
+    if timer is not None and isinstance(result, dict):
+        timings = add_serialize_time(timer.as_dict(), time.perf_counter() - started)
+        payload = encode_payload(dict(result, timings=timings), codec)
+    stream.write(FRAME_HEADER.pack(len(payload), CODEC_TAGS[codec]))
+    stream.write(payload)
+    stream.flush()
+
+
+def emit_result(result, codec=None, timer=None):
+    """
+    Write an analyzer result to stdout: one line of JSON text without a
+    codec (with a timings block when a PhaseTimer is given), otherwise one
+    frame (see write_result)
+    """
+    if codec is None:
+        print(timer.dumps(result) if timer is not None else json.dumps(result))
+    else:
+        write_result(result, codec, timer)
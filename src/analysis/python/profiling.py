@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Profiling
+
+Per-phase timing and memory instrumentation for the analyzers. A PhaseTimer
+is passed down an analysis (read -> decode -> parse/scan -> serialize) and
+collects how long each phase took; its timings block is added to the
+result as "timings". Optionally the analysis runs under cProfile and the
+stats are dumped to one .prof file per analyzed file.
+"""
+
+import sys
+import os
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Phases reported in every timings block, in output order
+PHASES = ('read', 'decode', 'parse', 'scan', 'cache', 'serialize')
+
+# Phase each analyzer's work is reported under
+ANALYZER_PHASES = {
+    'lizard': 'parse',
+    'dom': 'parse',
+    'comments': 'scan',
+    'classes': 'scan',
+    'clones': 'parse',
+}
+
+
+def peak_rss_kb():
+    """
+    Peak resident set size of the current process so far
+
+    Returns:
+        Size in KB, or None where getrusage is unavailable
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def timed(timer, phase):
+    """Context manager timing a phase on timer, or doing nothing when timer is None"""
+    return timer.phase(phase) if timer is not None else nullcontext()
+
+
+class PhaseTimer:
+    """Accumulates wall-clock time per analysis phase"""
+
+    def __init__(self, profile_dir=None):
+        self.durations = {}
+        self.profile_dir = profile_dir
+        self.profile_path = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block and add it to the named phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - started
+
+    def run(self, file_path, function, *args, **kwargs):
+        """
+        Call function, under cProfile when a profile directory was given
+
+        Args:
+            file_path: File being analyzed (names the .prof dump)
+            function: Callable to run
+
+        Returns:
+            Whatever function returns
+        """
+        if not self.profile_dir:
+            return function(*args, **kwargs)
+
+        import cProfile
+
+        # Known up front so output written during the call can mention it
+        self.profile_path = profile_dump_path(self.profile_dir, file_path)
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function, *args, **kwargs)
+        finally:
+            profiler.dump_stats(self.profile_path)
+
+    def as_dict(self):
+        """
+        Timings block (milliseconds) without the serialize phase, which is
+        added by dumps_with_timings once the result has been encoded
+        """
+        timings = {f"{name}Ms": round(self.durations.get(name, 0.0) * 1000, 3)
+                   for name in PHASES if name != 'serialize'}
+        timings["totalMs"] = round(sum(self.durations.values()) * 1000, 3)
+        timings["peakRssKb"] = peak_rss_kb()
+        if self.profile_path:
+            timings["profile"] = self.profile_path
+        return timings
+
+    def dumps(self, result):
+        """Encode result as JSON with this timer's timings block included"""
+        return dumps_with_timings(result, self.as_dict())
+
+
+def timer_from_args(argv):
+    """
+    Build a PhaseTimer from command-line options
+
+    --profile adds a timings block; --profile-dir DIR also writes a cProfile
+    dump per file into DIR.
+
+    Args:
+        argv: Command-line arguments after the file path
+
+    Returns:
+        PhaseTimer, or None when profiling was not requested
+    """
+    profile_dir = None
+    if '--profile-dir' in argv[:-1]:
+        profile_dir = argv[argv.index('--profile-dir') + 1]
+    if profile_dir is None and '--profile' not in argv:
+        return None
+    return PhaseTimer(profile_dir)
+
+
+def profile_dump_path(profile_dir, file_path):
+    """One stable .prof path per analyzed file"""
+    import hashlib
+
+    os.makedirs(profile_dir, exist_ok=True)
+    digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:10]
+    return os.path.join(profile_dir, f"{os.path.basename(file_path)}-{digest}.prof")
+
+
+def embed_encoded(envelope, key, encoded):
+    """
+    Encode envelope with an already-encoded JSON value added under key
+
+    Args:
+        envelope: JSON-serialisable dictionary
+        key: Member name for the embedded value
+        encoded: JSON text of the value
+
+    Returns:
+        JSON text
+    """
+    head = json.dumps(envelope)
+    if head == '{}':
+        return f'{{{json.dumps(key)}: {encoded}}}'
+    return f'{head[:-1]}, {json.dumps(key)}: {encoded}}}'
+
+
+def add_serialize_time(timings, seconds):
+    """Copy of a timings block with the serialize phase filled in"""
+    serialize_ms = round(seconds * 1000, 3)
+    timings = dict(timings)
+    timings["serializeMs"] = serialize_ms
+    timings["totalMs"] = round(timings.get("totalMs", 0.0) + serialize_ms, 3)
+    return timings
+
+
+def dumps_with_timings(document, timings):
+    """
+    Encode document as JSON and add a "timings" member holding timings plus
+    the time the encoding itself took
+
+    The document is encoded once; the timings object is appended to the
+    encoded text rather than re-encoding everything.
+
+    Args:
+        document: JSON-serialisable dictionary (without a "timings" key)
+        timings: Timings block from PhaseTimer.as_dict()
+
+    Returns:
+        JSON text
+    """
+    started = time.perf_counter()
+    body = json.dumps(document)
+    encoded = json.dumps(add_serialize_time(timings, time.perf_counter() - started))
+
+    if body == '{}':
+        return f'{{"timings": {encoded}}}'
+    return f'{body[:-1]}, "timings": {encoded}}}'
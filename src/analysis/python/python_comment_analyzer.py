@@ -3,24 +3,43 @@
 Comment Analyzer
 
 This script analyzes a source code file and counts comment lines,
-including lines within multi-line comments or strings.
+including lines within multi-line comments or docstrings.
 
-Usage: python comment_analyzer.py <file_path>
+With --stdin the content is read from standard input (an unsaved editor
+buffer) and file_path only selects the language.
+
+Usage: python comment_analyzer.py <file_path> [--stdin | --stream] [--codec NAME] [--profile] [--profile-dir DIR]
 """
 
 import sys
 import json
 import os
-import re
 import tokenize
-from io import BytesIO
+from io import StringIO
+
+from source_reader import read_source, read_stdin_source, open_source_lines
+from profiling import timed, timer_from_args
+from comment_lexer import CommentLexer, CommentRanges, get_spec, scan_text
+from output_codecs import codec_from_args, emit_result
+
+
+# Bump whenever the shape or meaning of the output changes (invalidates cached results)
+ANALYZER_VERSION = '4'
+
+# Files larger than this are analyzed line by line instead of being loaded whole
+STREAMING_THRESHOLD_BYTES = 16 * 1024 * 1024
 
-def analyze_comments(file_path):
+def analyze_comments(file_path, stream=None, timer=None, stdin=False):
     """
     Analyzes comments in a source code file
     
     Args:
         file_path (str): Path to the file to analyze
+        stream (bool): Read the file line by line instead of loading it;
+            by default only files larger than STREAMING_THRESHOLD_BYTES are streamed
+        timer (PhaseTimer): Optional timer recording read, decode and scan times
+        stdin (bool): Read the content from standard input instead of the file
+            (never streamed)
         
     Returns:
         dict: Analysis result with comment count
@@ -28,9 +47,17 @@ def analyze_comments(file_path):
     print(json.dumps({"debug": f"Analyzing file: {file_path}"}), file=sys.stderr)
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-            print(json.dumps({"debug": f"File loaded, size: {len(content)} bytes"}), file=sys.stderr)
+        if stdin:
+            content = read_stdin_source(timer)
+        else:
+            if stream is None:
+                stream = os.path.getsize(file_path) > STREAMING_THRESHOLD_BYTES
+            if stream:
+                # Reading, decoding and scanning are interleaved when streaming
+                with timed(timer, 'scan'):
+                    return analyze_comment_stream(file_path)
+            content = read_source(file_path, timer)
+        print(json.dumps({"debug": f"File loaded, size: {len(content)} bytes"}), file=sys.stderr)
     except Exception as e:
         print(json.dumps({"debug": f"Error reading file: {str(e)}"}), file=sys.stderr)
         return {
@@ -39,180 +66,138 @@ def analyze_comments(file_path):
             "error": str(e)
         }
 
+    with timed(timer, 'scan'):
+        return analyze_comment_content(file_path, content)
+
+def analyze_comment_stream(file_path):
+    """
+    Analyzes comments reading the file one line at a time
+    
+    Only the lexer state, a counter and the comment line ranges are kept, so
+    memory use does not grow with the size of the file.
+    
+    Args:
+        file_path (str): Path to the file to analyze
+        
+    Returns:
+        dict: Analysis result with comment count and comment line ranges
+    """
     _, ext = os.path.splitext(file_path.lower())
-    print(json.dumps({"debug": f"File extension: {ext}"}), file=sys.stderr)
-    comment_lines = set()
+    print(json.dumps({"debug": f"Streaming file, size: {os.path.getsize(file_path)} bytes"}), file=sys.stderr)
     
-    # Handle different comment styles based on language
+    comments = None
     if ext == '.py':
-        comment_lines = analyze_python_comments(file_path, content)
-    elif ext in ['.rb']:
-        comment_lines = analyze_ruby_comments(content)
-    elif ext in ['.js', '.ts', '.jsx', '.tsx', '.c', '.cpp', '.cc', '.cxx', '.h', '.hpp', '.cs', '.java', '.sol', '.m', '.zig', '.ttcn', '.ttcn3']:
-        comment_lines = analyze_c_style_comments(content)
-    elif ext == '.vue':
-        comment_lines = analyze_vue_comments(content)
-    elif ext in ['.f90', '.f95', '.f03', '.f08']:  # Fortran
-        comment_lines = analyze_fortran_comments(content)
-    elif ext in ['.gd']:  # GDScript
-        comment_lines = analyze_hash_comments(content)
-    else:
-        print(json.dumps({"debug": f"Extension '{ext}' not supported"}), file=sys.stderr)
-
-    print(json.dumps({"debug": f"Found {len(comment_lines)} comment lines"}), file=sys.stderr)
+        try:
+            with open_source_lines(file_path) as source:
+                comments = python_comment_ranges(source.readline)
+        except (tokenize.TokenError, SyntaxError) as e:
+            # Fall back to the generic lexer, starting over from the first line
+            print(json.dumps({"debug": f"Tokenizer failed: {e}, using fallback"}), file=sys.stderr)
+    
+    if comments is None:
+        spec = get_spec(ext)
+        if spec is None:
+            print(json.dumps({"debug": f"Extension '{ext}' not supported"}), file=sys.stderr)
+            comments = CommentRanges()
+        else:
+            with open_source_lines(file_path) as source:
+                comments = CommentLexer(spec).feed_lines(source).comments
     
+    print(json.dumps({"debug": f"Found {comments.count} comment lines"}), file=sys.stderr)
     return {
         "file": file_path,
-        "commentLines": len(comment_lines)
+        "commentLines": comments.count,
+        "commentRanges": comments.ranges
     }
 
-def analyze_python_comments(file_path, content):
+def analyze_comment_content(file_path, content):
     """
-    Analyzes Python comments using tokenizer (most accurate)
+    Analyzes comments in already-decoded source code
     
     Args:
-        file_path (str): Path to the Python file
+        file_path (str): Path of the file (used for language detection and reporting)
         content (str): File content
         
     Returns:
-        set: Set of line numbers containing comments
+        dict: Analysis result with comment count and comment line ranges
     """
-    comment_lines = set()
+    comment_ranges = find_comment_ranges(file_path, content)
+    comment_lines = sum(end - start + 1 for start, end in comment_ranges)
+    print(json.dumps({"debug": f"Found {comment_lines} comment lines"}), file=sys.stderr)
     
-    try:
-        with open(file_path, 'rb') as file:
-            content_bytes = file.read()
-            
-        # Use Python's tokenizer for accurate comment detection
-        all_tokens = list(tokenize.tokenize(BytesIO(content_bytes).readline))
-        
-        for tok in all_tokens:
-            if tok.type == tokenize.COMMENT:
-                comment_lines.add(tok.start[0])
-            elif tok.type == tokenize.STRING:
-                # Only count triple-quoted strings (docstrings)
-                if (tok.string.startswith('"""') or tok.string.startswith("'''")):
-                    for line_num in range(tok.start[0], tok.end[0] + 1):
-                        comment_lines.add(line_num)
-                        
-    except Exception as e:
-        print(json.dumps({"debug": f"Tokenizer failed: {e}, using fallback"}), file=sys.stderr)
-        # Fallback to simple line scanning
-        comment_lines = analyze_hash_comments(content)
-    
-    return comment_lines
+    return {
+        "file": file_path,
+        "commentLines": comment_lines,
+        "commentRanges": comment_ranges
+    }
 
-def analyze_c_style_comments(content):
+def find_comment_ranges(file_path, content):
     """
-    Analyzes C-style comments (//, /* ... */) using regex.
-    Supports: Java, JavaScript, C/C++, C#, Solidity, Objective-C, Zig, TTCN-3, etc.
-    """
-    comment_lines = set()
-    # Remove string literals to avoid false positives
-    string_pattern = re.compile(r'(\"(\\.|[^"\\])*\"|\'(\\.|[^\'\\])*\')')
-    content_wo_strings = []
-    for line in content.split('\n'):
-        content_wo_strings.append(string_pattern.sub('', line))
-    content_wo_strings = '\n'.join(content_wo_strings)
-
-    # Find all multiline comments
-    multiline_pattern = re.compile(r'/\*.*?\*/', re.DOTALL)
-    for match in multiline_pattern.finditer(content_wo_strings):
-        start = content_wo_strings[:match.start()].count('\n') + 1
-        lines = match.group(0).split('\n')
-        for offset in range(len(lines)):
-            comment_lines.add(start + offset)
-
-    # Remove multiline comments to avoid double-counting single-line markers inside them
-    content_no_multiline = multiline_pattern.sub(lambda m: '\n' * m.group(0).count('\n'), content_wo_strings)
-
-    # Find all single-line comments
-    for i, line in enumerate(content_no_multiline.split('\n'), 1):
-        if re.search(r'//', line):
-            comment_lines.add(i)
-
-    return comment_lines
-
-def analyze_hash_comments(content):
-    """
-    Analyzes hash-style comments (single line with #)
-    Used for GDScript and fallback for Python
-    """
-    comment_lines = set()
-    string_pattern = re.compile(r'(\"(\\.|[^"\\])*\"|\'(\\.|[^\'\\])*\')')
-    for i, line in enumerate(content.split('\n'), 1):
-        line_wo_strings = string_pattern.sub('', line)
-        if re.search(r'#', line_wo_strings):
-            comment_lines.add(i)
-    return comment_lines
-
-def analyze_fortran_comments(content):
-    """
-    Analyzes Fortran comments (single line with !)
+    Finds the comment lines, choosing the scanner by extension
+    
+    Python files go through the tokenizer; every other language is scanned by
+    the table-driven lexer in comment_lexer.py.
+    
+    Args:
+        file_path (str): Path of the file (only the extension is used)
+        content (str): File content
+        
+    Returns:
+        list: Inclusive [start, end] line ranges (1-based) of comment lines
     """
-    comment_lines = set()
-    string_pattern = re.compile(r'(\"(\\.|[^"\\])*\"|\'(\\.|[^\'\\])*\')')
-    for i, line in enumerate(content.split('\n'), 1):
-        line_wo_strings = string_pattern.sub('', line)
-        if re.search(r'!', line_wo_strings):
-            comment_lines.add(i)
-    return comment_lines
-
-def analyze_ruby_comments(content):
+    _, ext = os.path.splitext(file_path.lower())
+    print(json.dumps({"debug": f"File extension: {ext}"}), file=sys.stderr)
+    
+    if ext == '.py':
+        return analyze_python_comments(content)
+    
+    spec = get_spec(ext)
+    if spec is None:
+        print(json.dumps({"debug": f"Extension '{ext}' not supported"}), file=sys.stderr)
+        return []
+    
+    return scan_text(content, spec).ranges
+
+def analyze_python_comments(content):
     """
-    Analyzes Ruby comments:
-    - Single-line comments: '#'
-    - Multiline comments: =begin to =end
-    Ignores comment markers inside strings.
+    Analyzes Python comments using tokenizer (most accurate)
+    
+    Args:
+        content (str): File content
+        
+    Returns:
+        list: Inclusive [start, end] line ranges of comment lines
     """
-    comment_lines = set()
-    in_multiline = False
-    string_pattern = re.compile(r'(\"(\\.|[^"\\])*\"|\'(\\.|[^\'\\])*\')')
-
-    lines = content.split('\n')
-    for i, line in enumerate(lines, 1):
-        stripped = string_pattern.sub('', line.strip())
-
-        if not stripped:
-            continue
-
-        if in_multiline:
-            comment_lines.add(i)
-            if re.match(r'^\s*=end\b', stripped):
-                in_multiline = False
-            continue
-
-        if re.match(r'^\s*=begin\b', stripped):
-            in_multiline = True
-            comment_lines.add(i)
-            continue
-
-        if '#' in stripped:
-            comment_lines.add(i)
-
-    return comment_lines
-
+    try:
+        return python_comment_ranges(StringIO(content).readline).ranges
+    except (tokenize.TokenError, SyntaxError) as e:
+        print(json.dumps({"debug": f"Tokenizer failed: {e}, using fallback"}), file=sys.stderr)
+        # Fallback to the generic lexer
+        return scan_text(content, get_spec('.py')).ranges
 
-def analyze_vue_comments(content):
+def python_comment_ranges(readline):
     """
-    Analyzes Vue.js comments (HTML-style <!-- ... -->)
+    Collects comment and docstring lines from Python's tokenizer
+    
+    Tokens are consumed as they are produced; the token list is never built.
+    
+    Args:
+        readline (callable): Returns the next source line, '' at the end
+        
+    Returns:
+        CommentRanges: Comment line count and ranges
     """
-    comment_lines = set()
-    # Remove string literals to avoid false positives
-    string_pattern = re.compile(r'(\"(\\.|[^"\\])*\"|\'(\\.|[^\'\\])*\')')
-    content_wo_strings = []
-    for line in content.split('\n'):
-        content_wo_strings.append(string_pattern.sub('', line))
-    content_wo_strings = '\n'.join(content_wo_strings)
-
-    # Find all HTML comments
-    html_comment_pattern = re.compile(r'<!--.*?-->', re.DOTALL)
-    for match in html_comment_pattern.finditer(content_wo_strings):
-        start = content_wo_strings[:match.start()].count('\n') + 1
-        lines = match.group(0).split('\n')
-        for offset in range(len(lines)):
-            comment_lines.add(start + offset)
-    return comment_lines
+    comments = CommentRanges()
+    
+    for tok in tokenize.generate_tokens(readline):
+        if tok.type == tokenize.COMMENT:
+            comments.add(tok.start[0])
+        elif tok.type == tokenize.STRING:
+            # Only count triple-quoted strings (docstrings)
+            if (tok.string.startswith('"""') or tok.string.startswith("'''")):
+                comments.add_span(tok.start[0], tok.end[0])
+    
+    return comments
 
 def main():
     """Main entry point"""
@@ -222,10 +207,23 @@ def main():
         sys.exit(1)
 
     file_path = sys.argv[1]
-    result = analyze_comments(file_path)
+    stream = True if '--stream' in sys.argv[2:] else None
+    stdin = '--stdin' in sys.argv[2:]
+    try:
+        codec = codec_from_args(sys.argv[2:])
+    except ValueError as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+    timer = timer_from_args(sys.argv[2:])
+    if timer is not None:
+        # --profile / --profile-dir: add per-phase timings to the output
+        emit_result(timer.run(file_path, analyze_comments, file_path, stream, timer, stdin), codec, timer)
+        return
+    
+    result = analyze_comments(file_path, stream, stdin=stdin)
 
-    # Output as JSON
-    print(json.dumps(result))
+    # Output as JSON (or one --codec frame, see output_codecs.py)
+    emit_result(result, codec)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Request Scheduler
+
+Priority queues for the analyzer server (analyzer_server.py). Every request
+carries a priority: "interactive" (the file open in the editor) or
+"background" (a directory scan). Queued interactive requests are always
+dispatched before queued background ones, so saving the open file while a
+deep scan is running no longer waits behind thousands of scan requests.
+
+Requests are keyed by (op, path). A newer request for the same key
+supersedes the older one: a queued older request is dropped, an in-flight
+one keeps running (a worker process cannot be interrupted safely) but its
+result is discarded. Either way the older request is answered as
+"cancelled" right away.
+
+The scheduler itself does no locking; the server calls it under its state
+lock.
+"""
+
+import os
+import time
+from collections import deque
+
+
+PRIORITIES = ('interactive', 'background')
+
+# Priority of requests that do not name one
+DEFAULT_PRIORITY = 'background'
+
+# Latencies kept per priority for the percentiles in stats()
+LATENCY_SAMPLES = 1024
+
+LATENCY_PERCENTILES = (50, 95)
+
+
+class ScheduledRequest:
+    """One analysis request waiting for, or running on, a worker"""
+
+    def __init__(self, request_id, op, path, priority=DEFAULT_PRIORITY, profile=False):
+        self.request_id = request_id
+        self.op = op
+        self.path = path
+        self.priority = priority
+        self.profile = profile
+        self.key = (op, os.path.abspath(path))
+        self.queued_at = time.perf_counter()
+        self.started_at = None
+        self.cancelled = False
+
+
+def _percentile(ordered, percentile):
+    """Nearest-rank percentile of sorted values"""
+    return ordered[min(len(ordered) - 1, (len(ordered) * percentile) // 100)]
+
+
+def _latency_summary(samples):
+    """Mean, percentiles and maximum of latency samples (seconds) in milliseconds"""
+    if not samples:
+        return {"mean": 0, "max": 0, **{f"p{percentile}": 0 for percentile in LATENCY_PERCENTILES}}
+    ordered = sorted(samples)
+    summary = {"mean": round(sum(ordered) * 1000 / len(ordered), 2)}
+    for percentile in LATENCY_PERCENTILES:
+        summary[f"p{percentile}"] = round(_percentile(ordered, percentile) * 1000, 2)
+    summary["max"] = round(ordered[-1] * 1000, 2)
+    return summary
+
+
+class RequestScheduler:
+    """Per-priority FIFO queues with supersession of older requests for the same (op, path)"""
+
+    def __init__(self):
+        self._queues = {priority: deque() for priority in PRIORITIES}
+        # Queued requests per priority; superseded requests stay in the deques until popped
+        self._depth = dict.fromkeys(PRIORITIES, 0)
+        self._latest = {}  # key -> newest queued or running request
+        self.stats = {
+            priority: {
+                'requests': 0,
+                'completed': 0,
+                'cancelled': 0,
+                'maxQueueDepth': 0,
+                'waitSeconds': deque(maxlen=LATENCY_SAMPLES),
+                'totalSeconds': deque(maxlen=LATENCY_SAMPLES),
+            }
+            for priority in PRIORITIES
+        }
+
+    def __len__(self):
+        return sum(self._depth.values())
+
+    def push(self, request):
+        """
+        Queue a request
+
+        Args:
+            request: ScheduledRequest
+
+        Returns:
+            The older request it supersedes (now cancelled), or None
+        """
+        stats = self.stats[request.priority]
+        stats['requests'] += 1
+        older = self._latest.get(request.key)
+        if older is not None:
+            older.cancelled = True
+            self.stats[older.priority]['cancelled'] += 1
+            if older.started_at is None:
+                self._depth[older.priority] -= 1
+
+        self._latest[request.key] = request
+        self._queues[request.priority].append(request)
+        self._depth[request.priority] += 1
+        stats['maxQueueDepth'] = max(stats['maxQueueDepth'], self._depth[request.priority])
+        return older
+
+    def pop(self):
+        """
+        Take the next request to run: the oldest queued request of the highest priority
+
+        Returns:
+            ScheduledRequest, or None when nothing is queued
+        """
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue:
+                request = queue.popleft()
+                if request.cancelled:
+                    continue
+                self._depth[priority] -= 1
+                request.started_at = time.perf_counter()
+                self.stats[priority]['waitSeconds'].append(request.started_at - request.queued_at)
+                return request
+        return None
+
+    def finish(self, request):
+        """
+        Record that a dispatched request finished
+
+        Returns:
+            False if the request was superseded while it ran (its result is
+            to be discarded), True otherwise
+        """
+        if self._latest.get(request.key) is request:
+            del self._latest[request.key]
+        if request.cancelled:
+            return False
+        stats = self.stats[request.priority]
+        stats['completed'] += 1
+        stats['totalSeconds'].append(time.perf_counter() - request.queued_at)
+        return True
+
+    def get_stats(self):
+        """
+        Per-priority queue depth, counters and latencies
+
+        Returns:
+            Dictionary priority -> {"queued", "maxQueueDepth", "requests",
+            "completed", "cancelled", "waitMs", "latencyMs"}; waitMs is the
+            time spent queued, latencyMs the time until the result was ready
+        """
+        return {
+            priority: {
+                'queued': self._depth[priority],
+                'maxQueueDepth': stats['maxQueueDepth'],
+                'requests': stats['requests'],
+                'completed': stats['completed'],
+                'cancelled': stats['cancelled'],
+                'waitMs': _latency_summary(stats['waitSeconds']),
+                'latencyMs': _latency_summary(stats['totalSeconds']),
+            }
+            for priority, stats in self.stats.items()
+        }
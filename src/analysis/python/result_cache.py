@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Result Cache
+
+Content-addressed, on-disk cache for analyzer results. Entries are keyed by
+(SHA-256 of the file bytes, analyzer name, analyzer version), so a file that
+comes back after a branch switch, or the same vendored library opened from
+another workspace, is answered without parsing it again.
+
+The cache is a SQLite database in WAL mode so several VS Code windows can
+share it; the least recently used entries are evicted once the stored
+payloads exceed a size budget.
+
+Usage: python result_cache.py [--clear] [--cache-dir DIR]
+"""
+
+import sys
+import json
+import os
+import time
+import hashlib
+
+try:
+    import sqlite3
+except ImportError:  # Some embedded Python builds ship without sqlite3
+    sqlite3 = None
+
+
+CACHE_FILE_NAME = 'analysis-cache.sqlite3'
+
+# Default budget for stored payloads (bytes)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Fraction of the budget kept after an eviction pass, so eviction is not
+# triggered again by the very next insert
+EVICTION_TARGET = 0.9
+
+# Check the budget every N inserts instead of on every insert
+EVICTION_CHECK_INTERVAL = 64
+
+# How long a connection waits for another process holding the write lock (ms)
+BUSY_TIMEOUT_MS = 5000
+
+
+def default_cache_dir():
+    """
+    Resolve the cache directory
+
+    Returns:
+        CODEXR_CACHE_DIR if set, otherwise codexr/ under the user's cache directory
+    """
+    configured = os.environ.get('CODEXR_CACHE_DIR')
+    if configured:
+        return configured
+
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'codexr')
+
+
+def content_hash(data):
+    """
+    Hash file contents the same way the extension's FileMetrics.fileHash does
+
+    Args:
+        data: Raw file bytes
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """SQLite-backed LRU cache of analyzer results"""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.path = os.path.join(self.cache_dir, CACHE_FILE_NAME)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._puts = 0
+        self._connection = None
+
+    @property
+    def available(self):
+        """Whether the cache can be used in this interpreter"""
+        return sqlite3 is not None
+
+    def _connect(self):
+        """Open (and initialise) the database on first use"""
+        if self._connection is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            connection.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results ('
+                ' content_hash TEXT NOT NULL,'
+                ' analyzer TEXT NOT NULL,'
+                ' version TEXT NOT NULL,'
+                ' payload BLOB NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' last_access REAL NOT NULL,'
+                ' PRIMARY KEY (content_hash, analyzer, version))'
+            )
+            connection.execute(
+                'CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)'
+            )
+            self._connection = connection
+        return self._connection
+
+    def get(self, digest, analyzer, version):
+        """
+        Look up a cached result
+
+        Args:
+            digest: SHA-256 of the file contents
+            analyzer: Analyzer name (including anything else that changes its output)
+            version: Analyzer version string
+
+        Returns:
+            The cached result dictionary, or None on a miss
+        """
+        if not self.available:
+            self.misses += 1
+            return None
+
+        try:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT payload FROM results WHERE content_hash = ? AND analyzer = ? AND version = ?',
+                (digest, analyzer, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            connection.execute(
+                'UPDATE results SET last_access = ? WHERE content_hash = ? AND analyzer = ? AND version = ?',
+                (time.time(), digest, analyzer, version)
+            )
+            self.hits += 1
+            return json.loads(row[0])
+        except (sqlite3.Error, OSError, ValueError):
+            # A busy or damaged cache must never fail the analysis itself
+            self.errors += 1
+            self.misses += 1
+            return None
+
+    def put(self, digest, analyzer, version, result):
+        """
+        Store a result
+
+        Args:
+            digest: SHA-256 of the file contents
+            analyzer: Analyzer name
+            version: Analyzer version string
+            result: JSON-serialisable result dictionary
+        """
+        if not self.available:
+            return
+
+        try:
+            payload = json.dumps(result).encode('utf-8')
+            connection = self._connect()
+            connection.execute(
+                'INSERT OR REPLACE INTO results'
+                ' (content_hash, analyzer, version, payload, size, last_access)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                (digest, analyzer, version, payload, len(payload), time.time())
+            )
+            self._puts += 1
+            if self._puts % EVICTION_CHECK_INTERVAL == 0:
+                self.evict()
+        except (sqlite3.Error, OSError):
+            self.errors += 1
+
+    def evict(self):
+        """Drop least recently used entries until the payloads fit the budget"""
+        connection = self._connect()
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+
+        target = int(self.max_bytes * EVICTION_TARGET)
+        removed = 0
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            rows = connection.execute(
+                'SELECT content_hash, analyzer, version, size FROM results ORDER BY last_access'
+            ).fetchall()
+            victims = []
+            for digest, analyzer, version, size in rows:
+                if total <= target:
+                    break
+                victims.append((digest, analyzer, version))
+                total -= size
+            connection.executemany(
+                'DELETE FROM results WHERE content_hash = ? AND analyzer = ? AND version = ?',
+                victims
+            )
+            removed = len(victims)
+            connection.execute('COMMIT')
+        except sqlite3.Error:
+            connection.execute('ROLLBACK')
+            raise
+        return removed
+
+    def clear(self):
+        """Remove every entry"""
+        if self.available:
+            self._connect().execute('DELETE FROM results')
+
+    def counters(self):
+        """Hit/miss counters for this process"""
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+    def describe(self):
+        """Counters plus the size of the shared database"""
+        info = {"path": self.path, "maxBytes": self.max_bytes, **self.counters()}
+        if self.available:
+            entries, size = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results'
+            ).fetchone()
+            info.update({"entries": entries, "bytes": size})
+        return info
+
+    def close(self):
+        """Close the database connection"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the CodeXR analyzer result cache")
+    parser.add_argument('--cache-dir', default=None, help="Cache directory (default: CODEXR_CACHE_DIR or ~/.cache/codexr)")
+    parser.add_argument('--clear', action='store_true', help="Remove every cached result")
+    args = parser.parse_args()
+
+    cache = ResultCache(args.cache_dir)
+    if not cache.available:
+        print(json.dumps({"error": "sqlite3 is not available in this Python", "status": "error"}))
+        sys.exit(1)
+
+    try:
+        if args.clear:
+            cache.clear()
+        print(json.dumps(cache.describe()))
+    except Exception as e:
+        print(json.dumps({"error": str(e), "status": "error"}))
+        sys.exit(1)
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Source Reader
+
+Shared helpers for reading and decoding a source file exactly once so the
+same text buffer can be handed to every analyzer. With --stdin the analyzers
+read an unsaved editor buffer from standard input instead of the file.
+"""
+
+import sys
+import re
+import codecs
+
+from profiling import timed
+
+
+# A line containing nothing but whitespace (the newline itself excluded)
+_BLANK_LINE_PATTERN = re.compile(r'^[^\S\n]*$', re.MULTILINE)
+
+
+def read_source_bytes(file_path):
+    """
+    Read the raw bytes of a file
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        File contents as bytes
+    """
+    with open(file_path, 'rb') as file:
+        return file.read()
+
+
+def decode_source(data):
+    """
+    Decode source bytes the way lizard reads files: UTF-8 (BOM aware) with
+    undecodable bytes dropped, and universal newlines
+
+    Args:
+        data: Raw file contents
+
+    Returns:
+        Decoded text using '\\n' line endings
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        data = data[len(codecs.BOM_UTF8):]
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        text = data.decode('utf-8', 'ignore')
+
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def read_source(file_path, timer=None):
+    """
+    Read and decode a source file
+
+    Args:
+        file_path: Path to the file
+        timer: Optional PhaseTimer recording the read and decode phases
+
+    Returns:
+        Decoded text using '\\n' line endings
+    """
+    with timed(timer, 'read'):
+        data = read_source_bytes(file_path)
+    with timed(timer, 'decode'):
+        return decode_source(data)
+
+
+def read_stdin_source(timer=None):
+    """
+    Read and decode source text piped to standard input (an unsaved editor
+    buffer), with the same decoding rules as read_source
+
+    Args:
+        timer: Optional PhaseTimer recording the read and decode phases
+
+    Returns:
+        Decoded text using '\\n' line endings
+    """
+    with timed(timer, 'read'):
+        data = sys.stdin.buffer.read()
+    with timed(timer, 'decode'):
+        return decode_source(data)
+
+
+def open_source_lines(file_path):
+    """
+    Open a source file for line-by-line reading with the same decoding rules
+    as decode_source (BOM stripped, undecodable bytes dropped, universal
+    newlines), so very large files can be processed without loading them
+
+    Args:
+        file_path: Path to the file
+
+    Returns:
+        Text file object yielding '\\n'-terminated lines
+    """
+    return open(file_path, 'r', encoding='utf-8-sig', errors='ignore', newline=None)
+
+
+def count_lines(text):
+    """
+    Count total and blank lines with the same rules as the extension's
+    countFileLines (a file is split on '\\n', whitespace-only lines are blank)
+
+    Args:
+        text: Decoded file content
+
+    Returns:
+        Dictionary with "total" and "blank" line counts
+    """
+    return {
+        "total": text.count('\n') + 1,
+        "blank": sum(1 for _ in _BLANK_LINE_PATTERN.finditer(text))
+    }
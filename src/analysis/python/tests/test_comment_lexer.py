@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for comment_lexer.py
+
+Usage: python -m unittest discover -s src/analysis/python/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comment_lexer import get_spec, scan_text
+
+
+def comment_ranges(text, ext):
+    return scan_text(text, get_spec(ext)).ranges
+
+
+class RegexLiteralTest(unittest.TestCase):
+    """A quote or backtick inside a regex literal must not open a string"""
+
+    def test_backtick_in_regex_keeps_later_comments(self):
+        # Shape of eslint's lib/rules/curly.js
+        text = (
+            "function needsSemicolon(token) {\n"          # 1
+            "    return /^[([/`+-]/u.test(token.value);\n"  # 2
+            "}\n"                                           # 3
+            "\n"                                            # 4
+            "/**\n"                                         # 5
+            " * Later documentation\n"                      # 6
+            " */\n"                                         # 7
+            "const x = a / b; // division, then a comment\n"  # 8
+            "const y = s.split(/'/); // quote in a regex\n"   # 9
+        )
+        self.assertEqual(comment_ranges(text, '.js'), [[5, 9]])
+
+    def test_regex_after_keyword_and_operator(self):
+        text = (
+            "if (x) return /\"/.test(s);\n"  # 1
+            "const r = cond ? /`/ : /'/;\n"   # 2
+            "// comment\n"                     # 3
+        )
+        self.assertEqual(comment_ranges(text, '.ts'), [[3, 3]])
+
+    def test_slashes_in_character_class_and_escapes(self):
+        text = (
+            "const a = /[/]`/g, b = /\\/`/;\n"  # 1
+            "/* block */\n"                      # 2
+        )
+        self.assertEqual(comment_ranges(text, '.js'), [[2, 2]])
+
+    def test_division_is_not_a_regex(self):
+        text = "const ratio = total / count; const url = \"a//b\"; // note\n"
+        self.assertEqual(comment_ranges(text, '.js'), [[1, 1]])
+
+
+class LanguageCoverageTest(unittest.TestCase):
+    """Every lizard language has a spec"""
+
+    def test_lizard_extensions_have_specs(self):
+        for ext in ('.sql', '.pks', '.pkb', '.st', '.f', '.for', '.ftn', '.fpp', '.ttcnpp', '.es', '.escript'):
+            self.assertIsNotNone(get_spec(ext), ext)
+
+    def test_fixed_form_fortran(self):
+        text = (
+            "C     Comment in column 1\n"          # 1
+            "      PROGRAM MAIN\n"                 # 2
+            "*     Star comment\n"                 # 3
+            "      X = 'C is not a comment here'\n"  # 4
+            "      END ! trailing\n"               # 5
+        )
+        self.assertEqual(comment_ranges(text, '.f'), [[1, 1], [3, 3], [5, 5]])
+
+    def test_plsql(self):
+        text = (
+            "-- header\n"                        # 1
+            "SELECT 'it''s -- not' FROM dual;\n"  # 2
+            "/* block\n"                          # 3
+            "   comment */\n"                     # 4
+        )
+        self.assertEqual(comment_ranges(text, '.sql'), [[1, 1], [3, 4]])
+
+    def test_structured_text(self):
+        text = (
+            "(* header\n"                   # 1
+            "   comment *)\n"               # 2
+            "x := '(* not *)'; // note\n"   # 3
+        )
+        self.assertEqual(comment_ranges(text, '.st'), [[1, 3]])
+
+
+if __name__ == '__main__':
+    unittest.main()
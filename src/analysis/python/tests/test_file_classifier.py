@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Tests for file_classifier.py
+
+Usage: python -m unittest discover -s src/analysis/python/tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_classifier import FileClassifier, sample_verdict
+
+
+def content_reason(text):
+    verdict = sample_verdict(text.encode('utf-8'))
+    return verdict["reason"] if verdict else None
+
+
+class GeneratedBannerTest(unittest.TestCase):
+    """Generated-code banners only count in the comments at the top of a file"""
+
+    def test_marker_in_string_is_full(self):
+        text = (
+            "import re\n"
+            "\n"
+            "WARNING = \"DO NOT EDIT this table by hand\"\n"
+            "MARKER = re.compile(r'@generated')\n"
+            "\n"
+            "def check(text):\n"
+            "    return MARKER.search(text)\n"
+        )
+        self.assertIsNone(content_reason(text))
+
+    def test_marker_after_code_is_full(self):
+        text = "package main\n\n// Code generated by hand, really. DO NOT EDIT.\nfunc main() {}\n"
+        self.assertIsNone(content_reason(text))
+
+    def test_comment_banners_are_generated(self):
+        banners = (
+            "// Code generated by protoc-gen-go. DO NOT EDIT.\npackage pb\n",
+            "#!/usr/bin/env python\n# -*- coding: utf-8 -*-\n"
+            "# Generated by the protocol buffer compiler.  DO NOT EDIT!\nimport sys\n",
+            "//------------------------------------------------------------------------------\n"
+            "// <auto-generated>\n//     This code was generated by a tool.\n// </auto-generated>\n"
+            "namespace App {}\n",
+            "/* eslint-disable */\n/**\n * This file was automatically generated.\n */\nexport {};\n",
+            "/*\n   Licensed under MIT\n   @generated\n*/\nint x;\n",
+            "<!-- DO NOT EDIT: generated from template.vue -->\n<template></template>\n",
+        )
+        for text in banners:
+            self.assertEqual(content_reason(text), 'generated', text)
+
+    def test_classifier_module_itself_is_full(self):
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'file_classifier.py')
+        self.assertEqual(FileClassifier().classify(path)["analysis"], 'full')
+
+
+if __name__ == '__main__':
+    unittest.main()